@@ -0,0 +1,140 @@
+"""Typed A2UI message builder whose component types come from a2ui_schema.json."""
+
+import json
+
+from a2ui_validation import A2UI_SCHEMA_PATH
+
+
+class A2uiBuildError(ValueError):
+  """Raised when a component does not match its schema definition."""
+
+
+class ComponentType:
+  """Property names, required properties and enum values for one component."""
+
+  def __init__(self, name: str, schema: dict):
+    self.name = name
+    properties = schema.get("properties", {})
+    self.properties = frozenset(properties)
+    self.required = frozenset(schema.get("required", ()))
+    self.enums = {
+        key: frozenset(prop["enum"])
+        for key, prop in properties.items() if "enum" in prop
+    }
+
+  def check(self, props: dict):
+    unknown = props.keys() - self.properties
+    if unknown:
+      raise A2uiBuildError(f"{self.name} has no properties {sorted(unknown)}.")
+    missing = self.required - props.keys()
+    if missing:
+      raise A2uiBuildError(f"{self.name} requires {sorted(missing)}.")
+    for key, allowed in self.enums.items():
+      if key in props and props[key] not in allowed:
+        raise A2uiBuildError(
+            f"{self.name}.{key} must be one of {sorted(allowed)}, got {props[key]!r}."
+        )
+
+
+def load_component_types(path: str = A2UI_SCHEMA_PATH) -> dict:
+  """Returns {component name: ComponentType} from the A2UI message schema."""
+  with open(path, "r") as f:
+    schema = json.load(f)
+  components = (
+      schema["properties"]["surfaceUpdate"]["properties"]["components"]
+      ["items"]["properties"]["component"]["properties"]
+  )
+  return {name: ComponentType(name, spec) for name, spec in components.items()}
+
+
+COMPONENT_TYPES = load_component_types()
+
+
+def literal(value: str) -> dict:
+  return {"literalString": value}
+
+
+def bound(path: str) -> dict:
+  return {"path": path}
+
+
+def action(name: str, **context) -> dict:
+  """A Button action; string context values are sent as literals."""
+  return {
+      "name": name,
+      "context": [
+          {"key": key, "value": value if isinstance(value, dict) else literal(str(value))}
+          for key, value in context.items()
+      ],
+  }
+
+
+def submit(message: str, **context) -> dict:
+  """The `submit` action the client turns into a user message plus context."""
+  return action("submit", message=message, **context)
+
+
+class SurfaceBuilder:
+  """Accumulates components for one surface and emits its A2UI messages.
+
+  Every component is checked against its schema definition as it is added,
+  so a built surface is valid by construction.
+  """
+
+  def __init__(self, surface_id: str = "main", component_types: dict = None):
+    self.surface_id = surface_id
+    self._types = component_types or COMPONENT_TYPES
+    self._components = []
+    self._ids = set()
+    self._data = []
+
+  def add(self, type_name: str, component_id: str, weight: float = None, **props) -> str:
+    component_type = self._types.get(type_name)
+    if component_type is None:
+      raise A2uiBuildError(f"Unknown component type {type_name!r}.")
+    if component_id in self._ids:
+      raise A2uiBuildError(f"Duplicate component id {component_id!r}.")
+    props = {k: v for k, v in props.items() if v is not None}
+    component_type.check(props)
+    component = {"id": component_id, "component": {type_name: props}}
+    if weight is not None:
+      component["weight"] = weight
+    self._components.append(component)
+    self._ids.add(component_id)
+    return component_id
+
+  def text(self, component_id: str, text: str, usage_hint: str = None) -> str:
+    return self.add("Text", component_id, text=literal(text), usageHint=usage_hint)
+
+  def column(self, component_id: str, children: list, **props) -> str:
+    return self.add("Column", component_id, children={"explicitList": list(children)}, **props)
+
+  def row(self, component_id: str, children: list, **props) -> str:
+    return self.add("Row", component_id, children={"explicitList": list(children)}, **props)
+
+  def card(self, component_id: str, child: str) -> str:
+    return self.add("Card", component_id, child=child)
+
+  def divider(self, component_id: str) -> str:
+    return self.add("Divider", component_id)
+
+  def button(self, component_id: str, label: str, button_action: dict, primary: bool = None) -> str:
+    """Adds a Button together with the Text component that labels it."""
+    label_id = self.text(f"{component_id}_txt", label)
+    return self.add("Button", component_id, child=label_id, action=button_action, primary=primary)
+
+  def set_data(self, key: str, value: str):
+    self._data.append({"key": key, "valueString": value})
+
+  def messages(self, root: str) -> list:
+    if root not in self._ids:
+      raise A2uiBuildError(f"Root {root!r} is not a component of this surface.")
+    messages = [
+        {"beginRendering": {"surfaceId": self.surface_id, "root": root}},
+        {"surfaceUpdate": {"surfaceId": self.surface_id, "components": self._components}},
+    ]
+    if self._data:
+      messages.append({
+          "dataModelUpdate": {"surfaceId": self.surface_id, "path": "/", "contents": self._data}
+      })
+    return messages
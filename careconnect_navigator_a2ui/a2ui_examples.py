@@ -42,7 +42,7 @@ PROVIDER_LIST_EXAMPLE = r"""
           { "id": "p2_name", "component": { "Text": { "text": { "literalString": "Dr. Charles" }, "usageHint": "h2" } } },
           { "id": "p2_specialty", "component": { "Text": { "text": { "literalString": "Dermatology" } } } },
           { "id": "p2_network", "component": { "Text": { "text": { "literalString": "Out-of-Network" } } } },
-          { "id": "p2_warning", "component": { "Text": { "text": { "literalString": "Warning: Out-of-Network. Higher costs may apply." }, "usageHint": "warning" } } },
+          { "id": "p2_warning", "component": { "Text": { "text": { "literalString": "Warning: Out-of-Network. Higher costs may apply." }, "usageHint": "caption" } } },
           { "id": "p2_btn", "component": { "Button": { "child": "p2_btn_txt", "action": { "name": "submit", "context": [{"key": "message", "value": {"literalString": "Check availability for Dr. Charles"}}, {"key": "provider_id", "value": {"literalString": "derma_3"}}] } } } },
           { "id": "p2_btn_txt", "component": { "Text": { "text": { "literalString": "Check Availability" } } } }
         ]
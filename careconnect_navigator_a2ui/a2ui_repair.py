@@ -0,0 +1,358 @@
+"""Deterministic repair of malformed A2UI payloads before an LLM retry."""
+
+import collections
+import json
+import re
+import threading
+
+A2UI_DELIMITER = "---a2ui_JSON---"
+
+# Structural repair passes per message before giving up.
+MAX_REPAIR_PASSES = 8
+
+_CODE_FENCE = re.compile(r"```(?:json)?", re.IGNORECASE)
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class RepairError(ValueError):
+  """Raised when a payload cannot be repaired locally."""
+
+
+class RepairStats:
+  """Counters showing how often local repair saved an LLM round trip."""
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self.attempts = 0
+    self.repaired = 0
+    self.failed = 0
+    self.round_trips_saved = 0
+    self.fixes = collections.Counter()
+
+  def record(self, fixes, repaired: bool, retry_avoided: bool = False):
+    """Records one repair; `retry_avoided` when a model retry would have followed."""
+    with self._lock:
+      self.attempts += 1
+      if repaired:
+        self.repaired += 1
+        self.round_trips_saved += retry_avoided
+        self.fixes.update(fixes)
+      else:
+        self.failed += 1
+
+  def snapshot(self) -> dict:
+    with self._lock:
+      return {
+          "attempts": self.attempts,
+          "repaired": self.repaired,
+          "failed": self.failed,
+          # Repairs on the last attempt end the turn but replace no retry.
+          "llm_round_trips_saved": self.round_trips_saved,
+          "fixes": dict(self.fixes),
+      }
+
+
+# ----------------------------------------------------------------------
+# Response splitting
+# ----------------------------------------------------------------------
+def split_response(response: str):
+  """Splits a model response into (text, json_text).
+
+  Falls back to locating an `a2ui_messages` object when the delimiter is
+  missing. json_text is None when no payload can be found.
+  """
+  if A2UI_DELIMITER in response:
+    text, json_text = response.split(A2UI_DELIMITER, 1)
+    return text, json_text
+  marker = response.find('"a2ui_messages"')
+  if marker == -1:
+    return response, None
+  start = response.rfind("{", 0, marker)
+  if start == -1:
+    return response, None
+  return response[:start], response[start:]
+
+
+# ----------------------------------------------------------------------
+# Syntactic repair
+# ----------------------------------------------------------------------
+def _scan_repair(text: str, fixes: list) -> str:
+  """Single pass over the JSON text outside of string literals.
+
+  Drops trailing commas and // comments, rewrites Python literals, and
+  closes any brackets (or an unterminated string) left open at the end.
+  """
+  out = []
+  stack = []
+  i, n = 0, len(text)
+  in_string = False
+  while i < n:
+    ch = text[i]
+    if in_string:
+      out.append(ch)
+      if ch == "\\" and i + 1 < n:
+        out.append(text[i + 1])
+        i += 2
+        continue
+      if ch == '"':
+        in_string = False
+      i += 1
+      continue
+
+    if ch == '"':
+      in_string = True
+      out.append(ch)
+    elif ch in _CLOSERS:
+      stack.append(_CLOSERS[ch])
+      out.append(ch)
+    elif ch in "}]":
+      # Trailing comma before a closer.
+      j = len(out) - 1
+      while j >= 0 and out[j].isspace():
+        j -= 1
+      if j >= 0 and out[j] == ",":
+        del out[j]
+        fixes.append("trailing_comma")
+      if stack and stack[-1] == ch:
+        stack.pop()
+        out.append(ch)
+      else:
+        fixes.append("unbalanced_closer")
+    elif ch == "/" and text.startswith("//", i):
+      end = text.find("\n", i)
+      i = n if end == -1 else end
+      fixes.append("comment")
+      continue
+    elif ch.isalpha():
+      j = i
+      while j < n and text[j].isalnum():
+        j += 1
+      word = text[i:j]
+      if word in _PY_LITERALS:
+        out.append(_PY_LITERALS[word])
+        fixes.append("python_literal")
+      else:
+        out.append(word)
+      i = j
+      continue
+    else:
+      out.append(ch)
+    i += 1
+
+  if in_string:
+    out.append('"')
+    fixes.append("unterminated_string")
+  if stack:
+    while out and (out[-1].isspace() or out[-1] == ","):
+      out.pop()
+    out.extend(reversed(stack))
+    fixes.append("unclosed_brackets")
+  return "".join(out)
+
+
+def parse_lenient(json_text: str, fixes: list):
+  """Parses JSON text, repairing common syntactic defects.
+
+  Raises:
+    RepairError: If the text still does not parse.
+  """
+  text = json_text.strip()
+  if "```" in text:
+    text = _CODE_FENCE.sub("", text).strip()
+    fixes.append("code_fence")
+  if not text:
+    return []
+  try:
+    return json.loads(text)
+  except ValueError:
+    pass
+
+  # Prose before or after the payload.
+  starts = [p for p in (text.find("{"), text.find("[")) if p != -1]
+  if not starts:
+    raise RepairError("No JSON object or array found.")
+  start = min(starts)
+  if start:
+    fixes.append("leading_text")
+  text = _scan_repair(text[start:], fixes)
+
+  decoder = json.JSONDecoder()
+  values = []
+  position = 0
+  while position < len(text):
+    while position < len(text) and text[position] in " \t\r\n,":
+      position += 1
+    if position >= len(text):
+      break
+    try:
+      value, position = decoder.raw_decode(text, position)
+    except ValueError as e:
+      if values:
+        fixes.append("trailing_text")
+        break
+      raise RepairError(f"Unparseable JSON: {e}") from e
+    values.append(value)
+  if len(values) > 1:
+    # Several top-level messages emitted back to back.
+    fixes.append("concatenated_values")
+    return values
+  return values[0]
+
+
+# ----------------------------------------------------------------------
+# Structural repair
+# ----------------------------------------------------------------------
+def _unwrap(payload, fixes: list):
+  """Returns the list of messages, recovering a misnamed or missing wrapper."""
+  if isinstance(payload, list):
+    return payload
+  if not isinstance(payload, dict):
+    raise RepairError("Payload is not an object or array.")
+  if "a2ui_messages" in payload:
+    messages = payload["a2ui_messages"]
+    if isinstance(messages, dict):
+      fixes.append("wrapper_not_array")
+      return [messages]
+    return messages
+  # Wrapped under a different key ({"messages": [...]}).
+  lists = [v for v in payload.values() if isinstance(v, list) and v and all(isinstance(m, dict) for m in v)]
+  if len(payload) == 1 and len(lists) == 1:
+    fixes.append("wrapper_key")
+    return lists[0]
+  return [payload]
+
+
+def _drop_component(components: list, component_id: str, fixes: list):
+  """Removes a component and everything that can no longer render without it."""
+  pending = [component_id]
+  while pending:
+    target = pending.pop()
+    before = len(components)
+    components[:] = [c for c in components if c.get("id") != target]
+    if len(components) != before:
+      fixes.append("dropped_component")
+    for component in components:
+      body = next(iter(component.get("component", {}).values()), None)
+      if not isinstance(body, dict):
+        continue
+      children = body.get("children", {})
+      if isinstance(children, dict) and target in children.get("explicitList", ()):
+        children["explicitList"] = [c for c in children["explicitList"] if c != target]
+      if body.get("child") == target:
+        pending.append(component.get("id"))
+
+
+def _component_body(component) -> dict:
+  body = next(iter(component.get("component", {}).values()), None) if isinstance(component, dict) else None
+  return body if isinstance(body, dict) else {}
+
+
+def _reachable_actions(messages: list) -> set:
+  """Ids of action components reachable from their surface's root.
+
+  Raises:
+    RepairError: If a surface's root is not among its components.
+  """
+  surfaces = collections.defaultdict(dict)
+  for message in messages:
+    update = message.get("surfaceUpdate")
+    if isinstance(update, dict) and isinstance(update.get("components"), list):
+      for component in update["components"]:
+        if isinstance(component, dict) and "id" in component:
+          surfaces[update.get("surfaceId")][component["id"]] = _component_body(component)
+  actions = set()
+  for message in messages:
+    begin = message.get("beginRendering")
+    if not isinstance(begin, dict) or begin.get("surfaceId") not in surfaces:
+      continue
+    components = surfaces[begin["surfaceId"]]
+    if begin.get("root") not in components:
+      raise RepairError(f"Root component {begin.get('root')!r} no longer resolves.")
+    pending, seen = [begin["root"]], set()
+    while pending:
+      component_id = pending.pop()
+      if component_id in seen or component_id not in components:
+        continue
+      seen.add(component_id)
+      body = components[component_id]
+      if "action" in body:
+        actions.add((begin["surfaceId"], component_id))
+      children = body.get("children")
+      if isinstance(children, dict):
+        pending.extend(c for c in children.get("explicitList", ()) if isinstance(c, str))
+        template = children.get("template")
+        if isinstance(template, dict):
+          pending.append(template.get("componentId"))
+      pending.append(body.get("child"))
+  return actions
+
+
+def _fix_message(message: dict, validator, fixes: list) -> dict:
+  for _ in range(MAX_REPAIR_PASSES):
+    errors = validator.errors(message)
+    if not errors:
+      return message
+    error = errors[0]
+    path = list(error.absolute_path)
+    components = message.get("surfaceUpdate", {}).get("components")
+    in_component = (
+        isinstance(components, list) and len(path) >= 3
+        and path[:2] == ["surfaceUpdate", "components"] and isinstance(path[2], int)
+    )
+
+    if error.validator == "additionalProperties" and isinstance(error.instance, dict):
+      allowed = set(error.schema.get("properties", {}))
+      for key in [k for k in error.instance if k not in allowed]:
+        del error.instance[key]
+      fixes.append("unknown_property")
+    elif in_component and error.validator != "required" and len(path) > 4 and isinstance(path[-1], str):
+      # A bad optional field inside a component (e.g. an unknown usageHint).
+      container = message
+      for step in path[:-1]:
+        container = container[step]
+      del container[path[-1]]
+      fixes.append(f"invalid_{error.validator}")
+    elif in_component and path[2] < len(components):
+      _drop_component(components, components[path[2]].get("id"), fixes)
+      if not components:
+        raise RepairError("No valid components left in surfaceUpdate.")
+    else:
+      raise RepairError(error.message)
+  raise RepairError("Payload still invalid after repair passes.")
+
+
+def repair_payload(json_text: str, validator):
+  """Repairs and validates an A2UI payload.
+
+  Args:
+    json_text: The text after the A2UI delimiter.
+    validator: An a2ui_validation.A2uiValidator.
+
+  Returns:
+    (messages, fixes): the validated message list and the fixes applied.
+
+  Raises:
+    RepairError: If the payload cannot be made valid locally.
+  """
+  fixes = []
+  payload = parse_lenient(json_text, fixes)
+  messages = _unwrap(payload, fixes)
+  if not isinstance(messages, list) or not all(isinstance(m, dict) for m in messages):
+    raise RepairError("Messages must be JSON objects.")
+  try:
+    actions = _reachable_actions(messages)
+  except RepairError:
+    actions = set()  # Already missing a root; checked again below after any drop.
+  repaired = [_fix_message(m, validator, fixes) for m in messages]
+  if not all(repaired):
+    # Stripping unknown keys must not turn a non-A2UI object into an empty message.
+    raise RepairError("Payload has no A2UI message content.")
+  validator.validate(repaired)
+  if "dropped_component" in fixes:
+    # A schema-valid surface can still be broken: the root gone, or a
+    # button the user needs unreachable. Those go back to the model.
+    lost = actions - _reachable_actions(repaired)
+    if lost:
+      raise RepairError(f"Repair removed action components: {sorted(c for _, c in lost)}.")
+  return repaired, fixes
@@ -0,0 +1,167 @@
+"""Server-side A2UI surfaces rendered from tool results.
+
+For provider lists, slot pickers and booking confirmations the model no
+longer writes component JSON. It ends its reply with a render directive such
+as `{"render": "provider_list"}` and the executor builds the surface here
+from the latest matching tool result.
+"""
+
+import datetime
+
+from a2ui_builder import SurfaceBuilder, submit
+
+# Upper bound on slot buttons per surface, to keep the picker readable.
+MAX_SLOT_BUTTONS = 12
+
+
+class RenderError(ValueError):
+  """Raised when a render directive cannot be satisfied."""
+
+
+def is_render_directive(payload) -> bool:
+  return isinstance(payload, dict) and "render" in payload and "a2ui_messages" not in payload
+
+
+def _slot_label(slot: str) -> str:
+  moment = datetime.datetime.strptime(slot, "%Y-%m-%d %H:%M")
+  return moment.strftime("%a %b %d, %I:%M %p")
+
+
+def _error_surface(title: str, message: str) -> list:
+  surface = SurfaceBuilder()
+  surface.text("title_txt", title, "h3")
+  surface.text("message_txt", message)
+  surface.card("error_card", surface.column("error_col", ["title_txt", "message_txt"]))
+  return surface.messages("error_card")
+
+
+def _availability_context(provider: dict) -> dict:
+  # With the provider's first open day attached, the click needs no model turn.
+  context = {"provider_id": provider["id"]}
+  if provider.get("next_available"):
+    context["date"] = provider["next_available"][:10]
+  return context
+
+
+def render_provider_list(result: dict) -> list:
+  """Provider cards for a `search_providers` result, in ranked order."""
+  surface = SurfaceBuilder()
+  if result.get("status") != "success":
+    supported = result.get("supported_specialties")
+    if not supported:
+      return _error_surface("Search problem", result.get("message", "The search failed."))
+    children = [surface.text("title_txt", "Choose a specialty:", "h3")]
+    for i, specialty in enumerate(supported, 1):
+      children.append(surface.button(
+          f"spec_btn_{i}", specialty,
+          submit(f"Search for {specialty}", specialty=specialty),
+      ))
+    return surface.messages(surface.column("specialty_col", children))
+
+  providers = result.get("results", [])
+  matched = result.get("matched_specialty", "")
+  if not providers:
+    return _error_surface("No providers found", f"No {matched} providers matched those criteria.")
+
+  children = [surface.text("title_txt", f"{matched} providers", "h3")]
+  for i, provider in enumerate(providers, 1):
+    details = [surface.text(f"p{i}_name", provider["name"], "h3")]
+    summary = provider.get("specialty", matched)
+    if provider.get("distance_miles") is not None:
+      summary = f"{summary} · {provider['distance_miles']} mi"
+    details.append(surface.text(f"p{i}_specialty", summary))
+    details.append(surface.text(f"p{i}_network", provider["network_status"]))
+    if provider.get("next_available"):
+      details.append(surface.text(
+          f"p{i}_next", f"Next available: {_slot_label(provider['next_available'])}", "caption"
+      ))
+    if provider["network_status"] != "In-Network":
+      details.append(surface.text(
+          f"p{i}_warning", "Out-of-Network. Higher costs may apply.", "caption"
+      ))
+    details.append(surface.button(
+        f"p{i}_btn", "Check Availability",
+        submit(f"Check availability for {provider['name']}", **_availability_context(provider)),
+    ))
+    children.append(surface.card(f"provider_card_{i}", surface.column(f"p{i}_col", details)))
+
+  if result.get("next_cursor"):
+    children.append(surface.button(
+        "more_btn", "Show more providers",
+        submit("Show more providers", cursor=result["next_cursor"]),
+    ))
+  return surface.messages(surface.column("provider_list_col", children))
+
+
+def render_availability(result: dict) -> list:
+  """Slot buttons for a `check_availability` or `check_availability_bulk` result."""
+  if result.get("status") != "success":
+    return _error_surface("Availability problem", result.get("message", "The lookup failed."))
+
+  if "provider_id" in result:
+    names = {result["provider_id"]: result.get("provider_name")}
+    slots = [(result["provider_id"], slot) for slot in result["slots"]]
+  else:
+    names = result.get("provider_names", {})
+    slots = [(entry["provider_id"], entry["slot"]) for entry in result["slots"]]
+  if not slots:
+    return _error_surface("No open slots", "There are no open slots in that date range.")
+
+  surface = SurfaceBuilder()
+  single_provider = len(names) == 1
+  title = "Select a time slot:"
+  if single_provider and next(iter(names.values())):
+    title = f"Select a time slot with {next(iter(names.values()))}:"
+  children = [surface.text("title_txt", title, "h3")]
+  for i, (provider_id, slot) in enumerate(slots[:MAX_SLOT_BUTTONS], 1):
+    label = _slot_label(slot)
+    if not single_provider:
+      label = f"{names.get(provider_id) or provider_id} · {label}"
+    children.append(surface.button(
+        f"slot_btn_{i}", label,
+        submit(f"Book slot {slot}", slot=slot, provider_id=provider_id),
+    ))
+  return surface.messages(surface.column("slots_col", children))
+
+
+def render_booking_confirmation(result: dict) -> list:
+  """Summary card for a `book_appointment` result."""
+  if result.get("status") != "success":
+    return _error_surface("Booking failed", result.get("message", "The booking could not be completed."))
+  surface = SurfaceBuilder()
+  children = [
+      surface.text("title_txt", "Appointment Confirmed!", "h2"),
+      surface.text("provider_txt", f"Provider: {result.get('provider_name') or result['provider_id']}"),
+      surface.text("datetime_txt", f"Date/Time: {_slot_label(result['slot'])}"),
+      surface.text("conf_id_txt", f"Confirmation ID: {result['confirmation_id']}", "caption"),
+  ]
+  surface.card("confirm_card", surface.column("confirm_col", children))
+  return surface.messages("confirm_card")
+
+
+# Directive name -> (tools whose results it renders, renderer).
+SURFACES = {
+    "provider_list": (("search_providers",), render_provider_list),
+    "availability": (("check_availability", "check_availability_bulk"), render_availability),
+    "booking_confirmation": (("book_appointment",), render_booking_confirmation),
+}
+
+
+def render(directive: dict, tool_results: dict) -> list:
+  """Builds the A2UI messages a render directive asks for.
+
+  Args:
+    directive: The parsed directive, e.g. {"render": "availability"}.
+    tool_results: Tool name -> latest response dict, oldest call first.
+
+  Raises:
+    RenderError: For an unknown surface or when no matching tool ran.
+  """
+  name = directive.get("render")
+  if name not in SURFACES:
+    raise RenderError(f"Unknown render directive {name!r}; use one of {sorted(SURFACES)}.")
+  tool_names, renderer = SURFACES[name]
+  for tool_name in reversed(list(tool_results)):
+    if tool_name in tool_names:
+      return renderer(tool_results[tool_name])
+  raise RenderError(f"Render directive {name!r} needs a {' or '.join(tool_names)} result; call the tool first.")
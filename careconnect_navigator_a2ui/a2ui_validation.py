@@ -0,0 +1,61 @@
+"""Compiled A2UI payload validation for the agent executor."""
+
+import json
+import os
+
+import jsonschema
+
+A2UI_SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "a2ui_schema.json")
+
+
+def split_messages(payload) -> list:
+  """Returns the messages of a wrapped, array or single-message payload."""
+  if isinstance(payload, dict) and "a2ui_messages" in payload:
+    return payload["a2ui_messages"]
+  if isinstance(payload, list):
+    return payload
+  return [payload]
+
+
+class A2uiValidator:
+  """Validates A2UI payloads against a schema compiled once.
+
+  The agent may return a single message, an array of messages or an object
+  wrapping them under `a2ui_messages`. Rather than trying each shape as an
+  `anyOf` alternative, `validate` dispatches on the payload's shape and runs
+  the compiled single-message validator over each message.
+  """
+
+  def __init__(self, single_message_schema: dict):
+    validator_cls = jsonschema.validators.validator_for(single_message_schema)
+    # The meta-schema check is paid once here instead of on every payload.
+    validator_cls.check_schema(single_message_schema)
+    self._validator = validator_cls(single_message_schema)
+
+  @classmethod
+  def from_file(cls, path: str = A2UI_SCHEMA_PATH) -> "A2uiValidator":
+    with open(path, "r") as f:
+      return cls(json.load(f))
+
+  def validate(self, payload) -> list:
+    """Validates a parsed payload and returns its messages as a list.
+
+    Raises:
+      jsonschema.ValidationError: If the payload or any message is invalid.
+    """
+    messages = split_messages(payload)
+    if not isinstance(messages, list):
+      raise jsonschema.ValidationError(
+          "'a2ui_messages' must be an array of A2UI messages."
+      )
+    for message in messages:
+      self._validator.validate(message)
+    return messages
+
+  def errors(self, message) -> list:
+    """Returns every schema error for one message, deepest path first."""
+    return sorted(
+        self._validator.iter_errors(message),
+        key=lambda e: len(e.absolute_path),
+        reverse=True,
+    )
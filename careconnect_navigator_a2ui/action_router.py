@@ -0,0 +1,127 @@
+"""Deterministic fast path for A2UI button actions.
+
+Many button clicks carry everything the next step needs in their action
+context: a slot button names the provider and slot, a provider card names
+the provider and date. For those the router calls the tool directly and
+renders the next surface from a template, skipping the model entirely.
+Anything it does not recognize returns None and goes to the model as before.
+"""
+
+import asyncio
+import inspect
+import types
+
+import a2ui_surfaces
+import tools
+
+# Search criteria a "Show more providers" click replays along with the cursor.
+_SEARCH_ARGS = ("specialty", "zip_code", "plan_type", "date_time", "radius_miles", "nearest", "page_size")
+
+
+class RoutedAction:
+  """The outcome of an action handled without the model."""
+
+  def __init__(
+      self, tool_name: str, args: dict, result: dict, surface: str, text: str, messages: list,
+      state_delta: dict = None,
+  ):
+    self.tool_name = tool_name
+    self.args = args
+    self.result = result
+    # What the tool wrote to session state, as ADK would record it.
+    self.state_delta = state_delta or {}
+    self.surface = surface
+    self.text = text
+    self.messages = messages
+
+
+def _tool_context(session_id: str):
+  # The tools read the session id and write flow state; the writes are
+  # collected in a plain dict and recorded with the tool's response.
+  return types.SimpleNamespace(session=types.SimpleNamespace(id=session_id), state={})
+
+
+def _last_search_args(events) -> dict:
+  for event in reversed(events):
+    for call in event.get_function_calls():
+      if call.name == "search_providers":
+        return {k: v for k, v in (call.args or {}).items() if k in _SEARCH_ARGS}
+  return None
+
+
+def _provider_label(result: dict) -> str:
+  return result.get("provider_name") or result.get("provider_id", "the provider")
+
+
+class ActionRouter:
+  """Maps a button's action context to a direct tool call and surface."""
+
+  def __init__(self, tool_functions: dict = None):
+    self._tools = tool_functions or {
+        "search_providers": tools.search_providers,
+        "check_availability": tools.check_availability,
+        "book_appointment": tools.book_appointment,
+    }
+
+  def match(self, context: dict, state: dict, events=()):
+    """Returns (tool name, args, surface) for a recognized action, else None.
+
+    Keys in the action's own context decide the route; session state only
+    fills in search criteria chosen on earlier screens (plan type, zip).
+    Slot and date buttons must name their provider: the one in state may
+    be from an earlier screen, and booking it would be wrong.
+    """
+    known = {**state, **context}
+    if context.get("slot") and context.get("provider_id"):
+      return "book_appointment", {
+          "provider_id": context["provider_id"], "slot": context["slot"],
+      }, "booking_confirmation"
+    if context.get("date") and context.get("provider_id"):
+      return "check_availability", {
+          "provider_id": context["provider_id"], "date": context["date"],
+      }, "availability"
+    if context.get("cursor"):
+      args = _last_search_args(events)
+      if args is None:
+        return None
+      return "search_providers", dict(args, cursor=context["cursor"]), "provider_list"
+    if context.get("specialty") and known.get("zip_code") and known.get("plan_type"):
+      return "search_providers", {
+          "specialty": context["specialty"],
+          "zip_code": known["zip_code"],
+          "plan_type": known["plan_type"],
+      }, "provider_list"
+    return None
+
+  async def route(self, context: dict, state: dict, session_id: str, events=()):
+    """Runs a recognized action and renders its surface, or returns None."""
+    matched = self.match(context, state, events)
+    if matched is None:
+      return None
+    tool_name, args, surface = matched
+    tool_context = _tool_context(session_id)
+    tool = self._tools[tool_name]
+    if inspect.iscoroutinefunction(tool):
+      result = await tool(**args, tool_context=tool_context)
+    else:
+      # Sync tools take locks and scan calendars; keep them off the event loop.
+      result = await asyncio.to_thread(tool, **args, tool_context=tool_context)
+    messages = a2ui_surfaces.render({"render": surface}, {tool_name: result})
+    return RoutedAction(
+        tool_name, args, result, surface, _summary(tool_name, result), messages, tool_context.state
+    )
+
+
+def _summary(tool_name: str, result: dict) -> str:
+  """The short conversational line sent alongside a routed surface."""
+  if result.get("status") != "success":
+    return result.get("message", "Something went wrong.")
+  if tool_name == "book_appointment":
+    return f"You're booked with {_provider_label(result)} at {result['slot']}."
+  if tool_name == "check_availability":
+    if not result["slots"]:
+      return f"{_provider_label(result)} has no open slots on {result['date']}."
+    return f"Here are the open times with {_provider_label(result)} on {result['date']}."
+  if tool_name == "search_providers":
+    return f"Here are {result['matched_specialty']} providers for you."
+  return ""
@@ -11,8 +11,13 @@ except Exception as e:
 
 import os
 from google.adk.agents import Agent
-from tools import search_providers, check_availability, book_appointment
-import a2ui_examples
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.models.google_llm import Gemini
+from tools import (search_providers, check_availability, check_availability_bulk, book_appointment,
+                   get_session_state)
+import concurrency
+import flow_steps
+import history_compaction
 
 # ----------------------------------------------------------------------
 # Agent Definition
@@ -24,44 +29,67 @@ if not os.getenv("GOOGLE_CLOUD_PROJECT"):
 if not os.getenv("GOOGLE_CLOUD_LOCATION"):
     raise ValueError("GOOGLE_CLOUD_LOCATION environment variable not set. Please check your .env file.")
 
-root_agent = Agent(
-    name="careconnect_navigator_a2ui",
-    model="gemini-2.5-flash",
-    instruction=f"""You are an empathetic and efficient healthcare navigator for 'CareConnect Navigator'.
+# Identical on every turn, so it forms the cacheable prefix of each request.
+STATIC_INSTRUCTION = """You are an empathetic and efficient healthcare navigator for 'CareConnect Navigator'.
 You operate in an Agent-Driven User Interface (A2UI) environment.
 
-**Welcoming Intro**: At the beginning of a conversation, introduce yourself, explain your capabilities (searching providers, checking availability, booking appointments), and list the supported Greater Atlanta area zip codes: 30303, 30301, 30305, 30022, 30062.
+**Welcoming Intro**: At the beginning of a conversation, introduce yourself, explain your capabilities (searching providers, checking availability, booking appointments), and mention that you can search by zip code or by distance (e.g., "within 10 miles of 30305") anywhere in the Greater Atlanta area.
 
 **A2UI Rules**:
 1. You MUST generate structured UI descriptions in JSON format for key steps.
 2. You MUST separate your conversational response from the A2UI JSON output using the delimiter `---a2ui_JSON---`.
 3. The JSON must appear EXACTLY once at the end of your response.
 4. Do NOT use markdown code blocks (```json) for the A2UI payload.
-5. The A2UI payload MUST be a JSON object with a top-level `"a2ui_messages"` key containing an array of messages.
+5. The A2UI payload MUST be a JSON object with a top-level `"a2ui_messages"` key containing an array of messages (except for the render directives under **Rendered Surfaces**).
 
 **Flow Guidelines**:
 - **Step 1 (Plan Selection)**: If plan type is unknown, present a `MultipleChoice` for HMO/PPO.
-- **Step 2 (Criteria Selection)**: Ask for specialty and zip code, presenting selectable options for both (since zip codes are limited to 30303, 30301, 30305, 30022, 30062).
-- **Step 3 (Provider Selection)**: Present a list of Cards for providers found.
-- **Step 4 (Slot Selection)**: Present available slots as a list of choices.
-- **Step 5 (Confirmation)**: Present a summary card.
+- **Step 2 (Criteria Selection)**: Ask for specialty and zip code, presenting selectable options for both (offer 30303, 30301, 30305, 30022, 30062 as quick picks).
+- **Specialty Wording**: Pass the user's own wording for the specialty (e.g., "skin doctor") to `search_providers`; it resolves synonyms and typos itself. If it returns `supported_specialties`, offer those as choices instead of guessing again.
+- **Distance Searches**: When the user asks for providers "within N miles" of a zip, call `search_providers` with `radius_miles`; when they ask for the closest providers, use `nearest`, which limits the search to the N closest providers. Both still rank in-network providers first and then by soonest availability, so do not describe the results as ordered by distance; each one includes `distance_miles`.
+- **Step 3 (Provider Selection)**: `search_providers` returns one ranked page (in-network first, then soonest availability, then distance), each provider with its `next_available` slot. If the result has a `next_cursor` and the user presses "Show more providers", call `search_providers` again with the same criteria and `cursor` set to it.
+- **Step 4 (Slot Selection)**: When the user wants to compare several providers, call `check_availability_bulk` once with all of their IDs instead of calling `check_availability` for each one.
+- **Step 5 (Confirmation)**: Book with `book_appointment`.
+
+**Rendered Surfaces**: For Steps 3, 4 and 5 do NOT write component JSON. The server renders these surfaces from the tool result. After the delimiter, output only a render directive:
+- after `search_providers`: {"render": "provider_list"}
+- after `check_availability` or `check_availability_bulk`: {"render": "availability"}
+- after `book_appointment`: {"render": "booking_confirmation"}
+Keep the conversational text to a sentence or two, and do not repeat what the surface will show.
 
-**Examples**:
-Use the following examples as templates for your A2UI output:
+**Session State**: User messages end with `[State changes: key=value; ...]` listing only what changed since the previous message (`null` means removed). Keep earlier values in mind; if you need one you no longer have, call `get_session_state` instead of asking the user again.
 
-Plan Clarification Example:
-{a2ui_examples.PLAN_CLARIFICATION_EXAMPLE}
+**Examples**: The current step and the A2UI examples to use as templates for it follow these instructions in each request.
 
-Provider Search Form Example:
-{a2ui_examples.PROVIDER_SEARCH_FORM_EXAMPLE}
+When the user requests an action, first perform the action using the appropriate tool, and then generate the corresponding A2UI response.
+"""
 
-Provider List Example:
-{a2ui_examples.PROVIDER_LIST_EXAMPLE}
 
-Date Selection Example:
-{a2ui_examples.DATE_SELECTION_EXAMPLE}
+class PacedGemini(Gemini):
+    """Gemini with calls paced by the shared token bucket and 429s retried with backoff."""
 
-When the user requests an action, first perform the action using the appropriate tool, and then generate the corresponding A2UI response.
-""",
-    tools=[search_providers, check_availability, book_appointment]
+    async def generate_content_async(self, llm_request, stream=False):
+        async for response in concurrency.MODEL_PACER.run(super().generate_content_async, llm_request, stream):
+            yield response
+
+
+def step_instruction(context: ReadonlyContext) -> str:
+    """
+    Per-call prompt: the current flow step and only the examples it needs.
+
+    Derived from the state on every model call, since tool calls earlier in
+    the same turn move the flow on; the `flow_step` stored at the start of
+    the turn only keys the response cache.
+    """
+    return flow_steps.step_instruction(flow_steps.current_step(context.state))
+
+
+root_agent = Agent(
+    name="careconnect_navigator_a2ui",
+    model=PacedGemini(model="gemini-2.5-flash"),
+    static_instruction=STATIC_INSTRUCTION,
+    instruction=step_instruction,
+    # Compacts earlier turns in each request; session events are left intact.
+    before_model_callback=history_compaction.compact_history,
+    tools=[search_providers, check_availability, check_availability_bulk, book_appointment, get_session_state]
 )
@@ -11,8 +11,6 @@ try:
 except Exception as e:
     pass
 
-import sys
-from typing import Any
 try:
     import vertexai.preview.reasoning_engines.templates.a2a as a2a_module
     import starlette.requests
@@ -25,25 +23,40 @@ try:
 except ImportError:
     pass
 
+import asyncio
 import json
 import logging
-import os
+import time
+import uuid
 from a2a import types
 from a2a import utils
 from a2a.server import agent_execution
 from a2a.server import events
 from a2a.server import tasks
-from a2a.utils import errors as a2a_errors
 from agent import root_agent
+import action_router
+import a2ui_repair
+import a2ui_surfaces
+import a2ui_validation
+import concurrency
+import flow_steps
+import instrumentation
+import response_cache
+import response_stream
+import session_store
+import state_context
+import tools
+from google.adk import events as adk_events
 from google.adk import runners
-from google.adk.artifacts import in_memory_artifact_service
+from google.adk.agents import run_config
 from google.adk.memory import in_memory_memory_service
-from google.adk.sessions import in_memory_session_service
 from google.genai import types as genai_types
-import jsonschema
 
 logger = logging.getLogger(__name__)
 
+# How long cancel() waits for a canceled turn to finish unwinding.
+CANCEL_GRACE_SECONDS = 5.0
+
 
 class AdkAgentToA2AExecutor(agent_execution.AgentExecutor):
   """An agent executor for ADK agents."""
@@ -51,53 +64,72 @@ class AdkAgentToA2AExecutor(agent_execution.AgentExecutor):
   _runner: runners.Runner
 
   def __init__(self):
-    # Prepare A2UI schema validator by reading the JSON file
+    # Compile the A2UI schema validator once; it is reused for every response.
     try:
-      schema_path = os.path.join(os.path.dirname(__file__), "a2ui_schema.json")
-      with open(schema_path, "r") as f:
-        single_message_schema = json.load(f)
-      
-      # The schema validates a single message, but the agent might return an array of messages
-      # or a wrapped object. The example executor handled arrays.
-      # Let's support both single message and array of messages in validation.
-      self.a2ui_schema_object = {
-          "anyOf": [
-              single_message_schema,
-              {
-                  "type": "array",
-                  "items": single_message_schema
-              },
-              {
-                  "type": "object",
-                  "properties": {
-                      "a2ui_messages": {
-                          "type": "array",
-                          "items": single_message_schema
-                      }
-                  },
-                  "required": ["a2ui_messages"]
-              }
-          ]
-      }
+      self.a2ui_validator = a2ui_validation.A2uiValidator.from_file()
       logger.info("[DEBUG] A2UI_SCHEMA successfully loaded from file.")
     except Exception as e:  # pylint: disable=broad-except
       logger.error("[DEBUG] Failed to load A2UI_SCHEMA from file: %s", e)
-      self.a2ui_schema_object = None
+      self.a2ui_validator = None
+    self.repair_stats = a2ui_repair.RepairStats()
+    self.metrics = instrumentation.Instrumentation()
+    self.metrics.add_gauges("availability_prefetch", tools.prefetch_stats)
+    instrumentation.start_exporters(self.metrics)
+    self._action_router = action_router.ActionRouter()
+    # Validated template surfaces (plan, criteria form) served without the model.
+    self._response_cache = response_cache.ResponseCache()
+    # SSE streaming yields partial text events, so the first model token
+    # reaches the client instead of the whole response at the end.
+    self._run_config = run_config.RunConfig(
+        streaming_mode=run_config.StreamingMode.SSE
+    )
 
     self._agent = root_agent
+    # Bounded in memory by default, or durable SQLite; see session_store.
+    session_service, artifact_service = session_store.make_services()
     self._runner = runners.Runner(
         app_name=self._agent.name,
         agent=self._agent,
-        session_service=in_memory_session_service.InMemorySessionService(),
-        artifact_service=in_memory_artifact_service.InMemoryArtifactService(),
+        session_service=session_service,
+        artifact_service=artifact_service,
         memory_service=in_memory_memory_service.InMemoryMemoryService(),
     )
     self._user_id = "remote_agent"
+    # Turns of one conversation run in order; conversations run in parallel.
+    self._context_locks = concurrency.ContextLocks()
+    # Bounds turns in flight across conversations; excess waits or is turned away.
+    self._admission = concurrency.AdmissionController()
+    # Task id -> the asyncio task running its execute(), for cancel().
+    self._running = {}
 
   async def execute(
       self,
       context: agent_execution.RequestContext,
       event_queue: events.EventQueue,
+  ) -> None:
+    task_id = context.task_id
+    self._running[task_id] = asyncio.current_task()
+    try:
+      context_wait = self.metrics.start("context_wait")
+      async with self._context_locks.hold(context.context_id):
+        context_wait.stop()
+        async with self._admission.admit():
+          with self.metrics.stage("turn"):
+            await self._execute(context, event_queue)
+    except concurrency.Busy as busy:
+      self.metrics.count("turns", outcome="busy", reason=busy.reason)
+      await self._reject_busy(context, event_queue, busy)
+    except asyncio.CancelledError:
+      self.metrics.count("turns", outcome="canceled")
+      raise
+    finally:
+      if self._running.get(task_id) is asyncio.current_task():
+        del self._running[task_id]
+
+  async def _execute(
+      self,
+      context: agent_execution.RequestContext,
+      event_queue: events.EventQueue,
   ) -> None:
     query = context.get_user_input()
     extracted_context = {}
@@ -135,35 +167,97 @@ class AdkAgentToA2AExecutor(agent_execution.AgentExecutor):
     updater = tasks.TaskUpdater(event_queue, task.id, task.context_id)
     session_id = task.context_id
 
-    session = await self._runner.session_service.get_session(
-        app_name=self._agent.name,
-        user_id=self._user_id,
-        session_id=session_id,
-    )
-    if session is None:
-      session = await self._runner.session_service.create_session(
+    with self.metrics.stage("session_lookup"):
+      session = await self._runner.session_service.get_session(
           app_name=self._agent.name,
           user_id=self._user_id,
-          state={},
           session_id=session_id,
       )
-
-    # Save extracted context to session state
+      if session is None:
+        session = await self._runner.session_service.create_session(
+            app_name=self._agent.name,
+            user_id=self._user_id,
+            state={},
+            session_id=session_id,
+        )
+    if self.metrics.enabled:
+      self.metrics.observe_session_bytes(self._session_bytes(session))
+
+    # Save extracted context to session state. The fetched session is a
+    # copy, so the same keys also go to the runner as a state delta.
+    action_state = {
+        k: v for k, v in extracted_context.items() if k != 'message'
+    }
     if extracted_context:
         for k, v in extracted_context.items():
             if k != 'message':
                 session.state[k] = v
         logger.warning("[DEBUG] Updated session state: %s", session.state)
+
+    # Typed text can carry anything, so the response cache stops here.
+    if not extracted_context:
+      action_state[response_cache.FREE_TEXT_KEY] = True
+
+    # The step the turn starts at keys the response cache; the prompt
+    # recomputes it on every model call (agent.step_instruction).
+    action_state["flow_step"] = flow_steps.current_step(session.state)
+    session.state["flow_step"] = action_state["flow_step"]
     
-    # Inject session state into query
-    state_vars = [f"{k}={v}" for k, v in session.state.items()]
-    if state_vars:
-        query = f"{query} [State: {', '.join(state_vars)}]"
-        logger.warning("[DEBUG] Appended state to query: %s", query)
+    # Button clicks fully described by their context skip the model.
+    if extracted_context:
+      try:
+        with self.metrics.stage("action_route"):
+          routed = await self._action_router.route(
+              extracted_context, session.state, session.id, session.events
+          )
+      except Exception as e:  # pylint: disable=broad-except
+        logger.warning("[DEBUG] Action fast path failed, using the model: %s", e)
+        routed = None
+      if routed:
+        logger.info("[DEBUG] Routed action to %s without the model", routed.tool_name)
+        await self._record_routed_turn(session, query, action_state, routed)
+        with self.metrics.stage("add_artifact"):
+          await updater.add_artifact(
+              self._response_parts(routed.text, routed.messages), name="response"
+          )
+        await updater.complete()
+        self.metrics.count("turns", outcome="routed")
+        return
+
+    cache_key = self._response_cache.make_key(
+        query,
+        action_state["flow_step"],
+        session.state,
+        first_turn=not session.events,
+        click=bool(extracted_context),
+    )
+    if cache_key is not None:
+      cached = self._response_cache.get(cache_key)
+      self.metrics.count("response_cache", outcome="hit" if cached else "miss")
+      if cached:
+        text, messages = cached
+        logger.info("[DEBUG] Served %s surface from the response cache", action_state["flow_step"])
+        await self._record_cached_turn(session, query, action_state, text, messages)
+        with self.metrics.stage("add_artifact"):
+          await updater.add_artifact(self._response_parts(text, messages), name="response")
+        await updater.complete()
+        self.metrics.count("turns", outcome="cached")
+        return
+
+    # Inject only the state that changed since the model last saw it; the
+    # full state is available through the get_session_state tool.
+    state_suffix, action_state[state_context.SENT_KEY] = state_context.state_changes(session.state)
+    if state_suffix:
+        query = f"{query}{state_suffix}"
+        logger.warning("[DEBUG] Appended state changes to query: %s", query)
 
     current_query_text = query
     max_retries = 1
     attempt = 0
+    # Tool name -> latest response this turn; render directives draw on it.
+    tool_results = {}
+    # Tool call id (or name) -> when the call was seen, for the tool histogram.
+    tool_started = {}
 
     # Working status
     await updater.start_work()
@@ -175,13 +269,52 @@ class AdkAgentToA2AExecutor(agent_execution.AgentExecutor):
       )
 
       final_response_content = None
+      stream_parser = response_stream.DelimiterStreamParser()
 
       logger.info("[DEBUG] attempt: %s", attempt)
 
+      model_loop = self.metrics.start("model_loop")
+      stream = self._runner.run_async(
+          user_id=self._user_id,
+          session_id=session.id,
+          new_message=content,
+          state_delta=action_state,
+          run_config=self._run_config,
+      )
       try:
-        async for event in self._runner.run_async(
-            user_id=self._user_id, session_id=session.id, new_message=content
-        ):
+        async for event in stream:
+          # Surface progress as it happens instead of after the final event.
+          if event.partial and event.content and event.content.parts:
+            delta = stream_parser.feed(
+                "".join(p.text for p in event.content.parts if p.text)
+            )
+            if delta:
+              await updater.update_status(
+                  types.TaskState.working,
+                  message=updater.new_agent_message(
+                      [types.Part(root=types.TextPart(text=delta))],
+                      metadata={"progress": "text_delta", "attempt": attempt},
+                  ),
+              )
+            continue
+
+          for function_response in event.get_function_responses():
+            tool_results.pop(function_response.name, None)
+            tool_results[function_response.name] = function_response.response
+            started = tool_started.pop(function_response.id or function_response.name, None)
+            if started is not None:
+              self.metrics.observe_tool(function_response.name, time.perf_counter() - started)
+          for call in event.get_function_calls():
+            tool_started[call.id or call.name] = time.perf_counter()
+            await updater.update_status(
+                types.TaskState.working,
+                message=updater.new_agent_message(
+                    [types.Part(root=types.TextPart(
+                        text=response_stream.tool_progress_text(call.name)
+                    ))],
+                    metadata={"progress": "tool_call", "tool": call.name},
+                ),
+            )
           if event.is_final_response():
             if (
                 event.content
@@ -196,18 +329,40 @@ class AdkAgentToA2AExecutor(agent_execution.AgentExecutor):
               )
 
       except Exception as e:  # pylint: disable=broad-except
+        tools.release_shown(session.id, tool_results)
+        self.metrics.count("turns", outcome="failed")
         await updater.failed(
             message=utils.new_agent_text_message(
                 f"Task failed with error: {str(e)}"
             )
         )
         return
+      finally:
+        # On cancellation this stops the model call and tools right away
+        # instead of whenever the abandoned generator is collected.
+        await stream.aclose()
+        model_loop.stop()
+
+      tail = stream_parser.close()
+      if tail.strip():
+        await updater.update_status(
+            types.TaskState.working,
+            message=updater.new_agent_message(
+                [types.Part(root=types.TextPart(text=tail))],
+                metadata={"progress": "text_delta", "attempt": attempt},
+            ),
+        )
 
       if final_response_content is None:
+        await self._discard_streamed(updater, stream_parser, attempt)
         if attempt <= max_retries:
           current_query_text = "I received no response. Please try again."
+          self.metrics.count("retries", reason="no_response")
           continue
         else:
+          # The slots this turn held will not be shown.
+          tools.release_shown(session.id, tool_results)
+          self.metrics.count("turns", outcome="failed")
           await updater.failed(
               message=utils.new_agent_text_message("No response generated.")
           )
@@ -215,69 +370,97 @@ class AdkAgentToA2AExecutor(agent_execution.AgentExecutor):
 
       logger.info("[DEBUG]Final response content: %s", final_response_content)
       is_valid = False
+      rendered = False
       error_message = ""
       json_string_cleaned = "[]"
       text_part = final_response_content
 
       if "---a2ui_JSON---" not in final_response_content:
         error_message = "Delimiter '---a2ui_JSON---' not found."
+        self.metrics.count("validation_failures", reason="delimiter")
       else:
         try:
-          text_part, json_string = final_response_content.split(
-              "---a2ui_JSON---", 1
-          )
-          json_string_cleaned = (
-              json_string.strip().lstrip("```json").rstrip("```").strip()
-          )
+          with self.metrics.stage("delimiter_split"):
+            text_part, json_string = final_response_content.split(
+                "---a2ui_JSON---", 1
+            )
+            json_string_cleaned = (
+                json_string.strip().lstrip("```json").rstrip("```").strip()
+            )
 
           if not json_string_cleaned:
             json_string_cleaned = "[]"
 
-          parsed_json = json.loads(json_string_cleaned)
+          with self.metrics.stage("json_parse"):
+            parsed_json = json.loads(json_string_cleaned)
           logger.info("[DEBUG] Parsed JSON: %s", parsed_json)
-          if self.a2ui_schema_object:
-            jsonschema.validate(
-                instance=parsed_json, schema=self.a2ui_schema_object
-            )
+          if a2ui_surfaces.is_render_directive(parsed_json):
+            rendered = True
+            with self.metrics.stage("render_surface"):
+              messages_to_send = await self._render_surface(
+                  parsed_json, tool_results, session.id
+              )
+            json_string_cleaned = json.dumps(messages_to_send)
+          elif self.a2ui_validator:
+            with self.metrics.stage("schema_validation"):
+              messages_to_send = self.a2ui_validator.validate(parsed_json)
+          else:
+            messages_to_send = a2ui_validation.split_messages(parsed_json)
 
           is_valid = True
         except Exception as e:  # pylint: disable=broad-except
           error_message = f"Validation failed: {str(e)}"
+          if isinstance(e, json.JSONDecodeError):
+            reason = "json_parse"
+          elif isinstance(e, a2ui_surfaces.RenderError):
+            reason = "render"
+          else:
+            reason = "schema"
+          self.metrics.count("validation_failures", reason=reason)
+
+      # Most invalid responses are mechanical slips (fences, trailing commas,
+      # a stray property); fix those locally instead of paying for a retry.
+      if not is_valid and self.a2ui_validator:
+        repair_text, repair_json = a2ui_repair.split_response(
+            final_response_content
+        )
+        if repair_json is not None:
+          try:
+            with self.metrics.stage("repair"):
+              messages_to_send, fixes = a2ui_repair.repair_payload(
+                  repair_json, self.a2ui_validator
+              )
+            text_part = repair_text
+            json_string_cleaned = json.dumps(messages_to_send)
+            is_valid = True
+            self.repair_stats.record(fixes, repaired=True, retry_avoided=attempt <= max_retries)
+            self.metrics.count("repairs", outcome="repaired")
+            logger.warning(
+                "[DEBUG] Repaired A2UI payload locally (%s): %s",
+                ", ".join(fixes) or "no changes",
+                error_message,
+            )
+          except Exception as e:  # pylint: disable=broad-except
+            self.repair_stats.record((), repaired=False)
+            self.metrics.count("repairs", outcome="failed")
+            logger.warning("[DEBUG] Local A2UI repair failed: %s", e)
 
       if is_valid:
-        parts = []
-        if text_part.strip():
-          parts.append(types.Part(root=types.TextPart(text=text_part.strip())))
-
         logger.info("[DEBUG]UI JSON: %s", json_string_cleaned)
-
-        json_data = json.loads(json_string_cleaned)
-        
-        # Handle wrapped object or array
-        messages_to_send = []
-        if isinstance(json_data, dict) and "a2ui_messages" in json_data:
-            messages_to_send = json_data["a2ui_messages"]
-        elif isinstance(json_data, list):
-            messages_to_send = json_data
-        else:
-            messages_to_send = [json_data]
-
-        for message in messages_to_send:
-            ui_data_part = types.Part(
-                root=types.DataPart(
-                    data=message,
-                    metadata={"mimeType": "application/json+a2ui"},
-                )
-            )
-            parts.append(ui_data_part)
-            
+        # Only surfaces that drew on no tool output are the same for everyone.
+        if cache_key is not None and not tool_results and not rendered:
+          self._response_cache.put(cache_key, text_part, messages_to_send)
+        parts = self._response_parts(text_part, messages_to_send)
         logger.info("[DEBUG] Parts: %s", parts)
 
-        await updater.add_artifact(parts, name="response")
+        with self.metrics.stage("add_artifact"):
+          await updater.add_artifact(parts, name="response")
         await updater.complete()
+        self.metrics.count("turns", outcome="response")
         return
 
       else:
+        await self._discard_streamed(updater, stream_parser, attempt)
         if attempt <= max_retries:
           current_query_text = (
               f"Your previous response was invalid. {error_message} You MUST"
@@ -287,8 +470,11 @@ class AdkAgentToA2AExecutor(agent_execution.AgentExecutor):
           logger.warning(
               "[DEBUG] Retrying due to validation error: %s", error_message
           )
+          self.metrics.count("retries", reason="invalid_a2ui")
           continue
         else:
+          # The slots this turn held will not be shown.
+          tools.release_shown(session.id, tool_results)
           await updater.add_artifact(
               [
                   types.Part(
@@ -304,11 +490,168 @@ class AdkAgentToA2AExecutor(agent_execution.AgentExecutor):
               name="error_response",
           )
           await updater.complete()
+          self.metrics.count("turns", outcome="error_response")
           return
 
+  async def _discard_streamed(self, updater, stream_parser, attempt: int) -> None:
+    """Tells the client to drop the text deltas of an attempt that failed."""
+    if not stream_parser.text:
+      return
+    await updater.update_status(
+        types.TaskState.working,
+        message=updater.new_agent_message(
+            [types.Part(root=types.TextPart(text="Retrying…"))],
+            metadata={"progress": "discard_text", "attempt": attempt},
+        ),
+    )
+
+  async def _reject_busy(self, context, event_queue, busy) -> None:
+    """Turns a request away with a rejected status the client can retry on."""
+    task = context.current_task
+    if not task:
+      if not context.message:
+        return
+      task = utils.new_task(context.message)
+      await event_queue.enqueue_event(task)
+    updater = tasks.TaskUpdater(event_queue, task.id, task.context_id)
+    await updater.reject(
+        message=updater.new_agent_message(
+            [types.Part(root=types.TextPart(
+                text="I'm handling a lot of requests right now. Please try again in a moment."
+            ))],
+            metadata={"busy": busy.reason, "retry_after_seconds": busy.retry_after},
+        )
+    )
+
+  def _session_bytes(self, session) -> int:
+    """Approximate serialized size of a session, for the session-size histogram."""
+    # The bounded and SQLite services track it as events are appended.
+    tracked = getattr(self._runner.session_service, "session_bytes", None)
+    if tracked is not None:
+      return tracked(session.app_name, session.user_id, session.id)
+    return sum(session_store.event_size(event) for event in session.events)
+
+  def _response_parts(self, text: str, messages: list) -> list:
+    parts = []
+    if text.strip():
+      parts.append(types.Part(root=types.TextPart(text=text.strip())))
+    for message in messages:
+      parts.append(
+          types.Part(
+              root=types.DataPart(
+                  data=message,
+                  metadata={"mimeType": "application/json+a2ui"},
+              )
+          )
+      )
+    return parts
+
+  async def _record_routed_turn(
+      self, session, query: str, action_state: dict, routed
+  ) -> None:
+    """Appends a routed turn to the session as if the model had run it.
+
+    Later model turns then see the tool call, its result and the rendered
+    surface in their history, and the action context lands in session state.
+    """
+    invocation_id = f"e-{uuid.uuid4()}"
+    call = genai_types.FunctionCall(
+        id=f"routed-{uuid.uuid4()}", name=routed.tool_name, args=routed.args
+    )
+    turn = [
+        adk_events.Event(
+            invocation_id=invocation_id,
+            author="user",
+            content=genai_types.Content(role="user", parts=[genai_types.Part(text=query)]),
+            actions=adk_events.EventActions(state_delta=action_state),
+        ),
+        adk_events.Event(
+            invocation_id=invocation_id,
+            author=self._agent.name,
+            content=genai_types.Content(
+                role="model", parts=[genai_types.Part(function_call=call)]
+            ),
+        ),
+        adk_events.Event(
+            invocation_id=invocation_id,
+            author=self._agent.name,
+            content=genai_types.Content(role="user", parts=[genai_types.Part(
+                function_response=genai_types.FunctionResponse(
+                    id=call.id, name=call.name, response=routed.result
+                )
+            )]),
+            actions=adk_events.EventActions(state_delta=routed.state_delta),
+        ),
+        adk_events.Event(
+            invocation_id=invocation_id,
+            author=self._agent.name,
+            content=genai_types.Content(role="model", parts=[genai_types.Part(
+                text=f"{routed.text}\n---a2ui_JSON---\n"
+                + json.dumps({"render": routed.surface})
+            )]),
+        ),
+    ]
+    for event in turn:
+      await self._runner.session_service.append_event(session, event)
+
+  async def _record_cached_turn(
+      self, session, query: str, action_state: dict, text: str, messages: list
+  ) -> None:
+    """Appends a turn served from the response cache to the session."""
+    invocation_id = f"e-{uuid.uuid4()}"
+    turn = [
+        adk_events.Event(
+            invocation_id=invocation_id,
+            author="user",
+            content=genai_types.Content(role="user", parts=[genai_types.Part(text=query)]),
+            actions=adk_events.EventActions(state_delta=action_state),
+        ),
+        adk_events.Event(
+            invocation_id=invocation_id,
+            author=self._agent.name,
+            content=genai_types.Content(role="model", parts=[genai_types.Part(
+                text=f"{text.strip()}\n---a2ui_JSON---\n{json.dumps(messages)}"
+            )]),
+        ),
+    ]
+    for event in turn:
+      await self._runner.session_service.append_event(session, event)
+
+  async def _render_surface(
+      self, directive: dict, tool_results: dict, session_id: str
+  ) -> list:
+    """Builds the surface a render directive names from tool results."""
+    try:
+      messages = a2ui_surfaces.render(directive, tool_results)
+    except a2ui_surfaces.RenderError:
+      # The tool may have run on an earlier turn; look through the session.
+      session = await self._runner.session_service.get_session(
+          app_name=self._agent.name,
+          user_id=self._user_id,
+          session_id=session_id,
+      )
+      earlier_results = {}
+      for event in session.events if session else ():
+        for function_response in event.get_function_responses():
+          earlier_results.pop(function_response.name, None)
+          earlier_results[function_response.name] = function_response.response
+      messages = a2ui_surfaces.render(directive, earlier_results)
+    if self.a2ui_validator:
+      self.a2ui_validator.validate(messages)
+    return messages
+
   async def cancel(
       self,
       context: agent_execution.RequestContext,
       event_queue: events.EventQueue,
   ) -> None:
-    raise a2a_errors.ServerError(error=types.UnsupportedOperationError())
+    """Stops the task's running or queued turn and marks the task canceled."""
+    running = self._running.get(context.task_id)
+    if running is not None and running is not asyncio.current_task():
+      running.cancel()
+      # Let it unwind (close the model stream, release the context lock).
+      await asyncio.wait({running}, timeout=CANCEL_GRACE_SECONDS)
+    # Slots the canceled conversation was holding go back to the pool.
+    tools.RESERVATIONS.release_all(context.context_id)
+    updater = tasks.TaskUpdater(event_queue, context.task_id, context.context_id)
+    await updater.cancel()
@@ -0,0 +1,187 @@
+"""Bitmap slot calendars backing CareConnect availability and booking."""
+
+import datetime
+
+# ----------------------------------------------------------------------
+# Slot grid
+# ----------------------------------------------------------------------
+# Each provider day is a fixed-width bitmap: bit i is the slot starting
+# SLOT_MINUTES * i after DAY_START_MINUTES (08:00, 08:30, ... 17:30).
+SLOT_MINUTES = 30
+DAY_START_MINUTES = 8 * 60
+SLOTS_PER_DAY = 20
+FULL_DAY = (1 << SLOTS_PER_DAY) - 1
+
+# Hours every directory provider keeps unless given an explicit schedule.
+DEFAULT_OPEN_TIMES = ("09:00", "10:00", "14:00")
+
+# How far ahead "next N open slots" queries look before giving up.
+MAX_LOOKAHEAD_DAYS = 90
+
+
+def parse_day(date: str) -> int:
+    """Turn a YYYY-MM-DD date (or the date part of a slot) into a day ordinal."""
+    return datetime.date.fromisoformat(date.strip()[:10]).toordinal()
+
+
+def slot_index(time_str: str) -> int:
+    """Turn an HH:MM time into its bit position on the slot grid."""
+    hours, minutes = time_str.strip().split(":")
+    offset = int(hours) * 60 + int(minutes) - DAY_START_MINUTES
+    index, remainder = divmod(offset, SLOT_MINUTES)
+    if remainder or not 0 <= index < SLOTS_PER_DAY:
+        raise ValueError(f"{time_str} is not on the {SLOT_MINUTES}-minute slot grid.")
+    return index
+
+
+def parse_slot(slot: str):
+    """Split a 'YYYY-MM-DD HH:MM' slot into (day ordinal, bit position)."""
+    date_part, _, time_part = slot.strip().partition(" ")
+    if not time_part:
+        raise ValueError(f"Slot '{slot}' must be formatted as YYYY-MM-DD HH:MM.")
+    return parse_day(date_part), slot_index(time_part)
+
+
+def format_slot(day: int, index: int) -> str:
+    minutes = DAY_START_MINUTES + index * SLOT_MINUTES
+    date = datetime.date.fromordinal(day).isoformat()
+    return f"{date} {minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def current_slot_key(now: datetime.datetime = None):
+    """(day ordinal, bit position) of the first slot that has not started yet."""
+    now = now or datetime.datetime.now()
+    offset = now.hour * 60 + now.minute - DAY_START_MINUTES
+    index = max(0, -(-offset // SLOT_MINUTES))
+    day = now.date().toordinal()
+    if index >= SLOTS_PER_DAY:
+        day, index = day + 1, 0
+    return day, index
+
+
+def current_slot(now: datetime.datetime = None) -> str:
+    """The first 'YYYY-MM-DD HH:MM' slot that has not started yet."""
+    return format_slot(*current_slot_key(now))
+
+
+def slots_mask(times) -> int:
+    """Bitmap with the given HH:MM times set."""
+    mask = 0
+    for time_str in times:
+        mask |= 1 << slot_index(time_str)
+    return mask
+
+
+def iter_bits(bits: int):
+    """Yield the set bit positions of `bits`, lowest first."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+# ----------------------------------------------------------------------
+# Calendar
+# ----------------------------------------------------------------------
+class SlotCalendar:
+    """
+    Per-provider day bitmaps of open and booked slots.
+
+    Providers with an explicit schedule (`set_open`) are open only on the
+    days they were given; every other known provider follows the default
+    daily template. Free slots are `open & ~booked`, so what
+    `check_availability` shows is exactly what `book` will accept.
+    """
+
+    def __init__(self, default_template: int = 0, is_known=None):
+        self._default_template = default_template
+        self._is_known = is_known or (lambda provider_id: False)
+        self._open = {}
+        self._booked = {}
+
+    def set_open(self, provider_id: str, slots):
+        """Give a provider an explicit schedule from 'YYYY-MM-DD HH:MM' slots."""
+        days = self._open.setdefault(provider_id, {})
+        for slot in slots:
+            day, index = parse_slot(slot)
+            days[day] = days.get(day, 0) | (1 << index)
+
+    def knows(self, provider_id: str) -> bool:
+        return provider_id in self._open or self._is_known(provider_id)
+
+    def open_bits(self, provider_id: str, day: int) -> int:
+        explicit = self._open.get(provider_id)
+        if explicit is not None:
+            return explicit.get(day, 0)
+        return self._default_template if self._is_known(provider_id) else 0
+
+    def booked_bits(self, provider_id: str, day: int) -> int:
+        return self._booked.get(provider_id, {}).get(day, 0)
+
+    def free_bits(self, provider_id: str, day: int) -> int:
+        return self.open_bits(provider_id, day) & ~self.booked_bits(provider_id, day)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def free_slots(self, provider_id: str, date: str) -> list:
+        """Free slots on a single YYYY-MM-DD date."""
+        day = parse_day(date)
+        return [format_slot(day, i) for i in iter_bits(self.free_bits(provider_id, day))]
+
+    def free_slots_range(self, provider_id: str, start_date: str, end_date: str) -> list:
+        """Free slots from start_date through end_date (inclusive), in time order."""
+        first, last = parse_day(start_date), parse_day(end_date)
+        if last < first:
+            raise ValueError("end_date must not be before start_date.")
+        slots = []
+        for day in range(first, last + 1):
+            slots.extend(format_slot(day, i) for i in iter_bits(self.free_bits(provider_id, day)))
+        return slots
+
+    def next_open(self, provider_id: str, after: str, count: int = 1) -> list:
+        """
+        The next `count` free slots at or after `after`.
+
+        Args:
+            provider_id: The provider to look up.
+            after: A YYYY-MM-DD date or 'YYYY-MM-DD HH:MM' slot to start from.
+            count: How many slots to return.
+        """
+        if " " in after.strip():
+            day, index = parse_slot(after)
+            floor = FULL_DAY & ~((1 << index) - 1)
+        else:
+            day, floor = parse_day(after), FULL_DAY
+
+        slots = []
+        for offset in range(MAX_LOOKAHEAD_DAYS):
+            bits = self.free_bits(provider_id, day + offset) & floor
+            for i in iter_bits(bits):
+                slots.append(format_slot(day + offset, i))
+                if len(slots) == count:
+                    return slots
+            floor = FULL_DAY
+        return slots
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def book(self, provider_id: str, slot: str) -> bool:
+        """Mark a slot booked; False if it is not currently free."""
+        day, index = parse_slot(slot)
+        bit = 1 << index
+        if not self.free_bits(provider_id, day) & bit:
+            return False
+        days = self._booked.setdefault(provider_id, {})
+        days[day] = days.get(day, 0) | bit
+        return True
+
+    def release(self, provider_id: str, slot: str):
+        """Free a previously booked slot."""
+        day, index = parse_slot(slot)
+        days = self._booked.get(provider_id)
+        if days and day in days:
+            days[day] &= ~(1 << index)
+            if not days[day]:
+                del days[day]
@@ -0,0 +1,79 @@
+"""Benchmark: per-payload A2UI validation latency, anyOf + jsonschema.validate vs. A2uiValidator.
+
+Payloads are built by repeating the messages of the bundled A2UI examples,
+so sizes track what the agent actually emits.
+
+Run from this directory:
+    python bench_a2ui_validation.py
+"""
+
+import json
+import time
+
+import jsonschema
+
+import a2ui_examples
+from a2ui_validation import A2UI_SCHEMA_PATH, A2uiValidator
+
+EXAMPLES = [
+    a2ui_examples.PLAN_CLARIFICATION_EXAMPLE,
+    a2ui_examples.PROVIDER_SEARCH_FORM_EXAMPLE,
+    a2ui_examples.PROVIDER_LIST_EXAMPLE,
+    a2ui_examples.AVAILABILITY_SELECTION_EXAMPLE,
+    a2ui_examples.DATE_SELECTION_EXAMPLE,
+    a2ui_examples.BOOKING_CONFIRMATION_EXAMPLE,
+]
+
+
+def _legacy_schema(single_message_schema):
+  """The anyOf wrapper the executor used to validate against on every call."""
+  return {
+      "anyOf": [
+          single_message_schema,
+          {"type": "array", "items": single_message_schema},
+          {
+              "type": "object",
+              "properties": {
+                  "a2ui_messages": {"type": "array", "items": single_message_schema}
+              },
+              "required": ["a2ui_messages"],
+          },
+      ]
+  }
+
+
+def _per_call_ms(fn, payload, budget_s=1.0):
+  calls = 0
+  start = time.perf_counter()
+  while time.perf_counter() - start < budget_s or calls < 3:
+    fn(payload)
+    calls += 1
+  return (time.perf_counter() - start) / calls * 1e3
+
+
+def main():
+  with open(A2UI_SCHEMA_PATH) as f:
+    single_message_schema = json.load(f)
+  legacy = _legacy_schema(single_message_schema)
+  validator = A2uiValidator(single_message_schema)
+  messages = []
+  for example in EXAMPLES:
+    for message in json.loads(example)["a2ui_messages"]:
+      # Only time the success path; skip any example message the schema rejects.
+      try:
+        validator.validate(message)
+      except jsonschema.ValidationError:
+        continue
+      messages.append(message)
+
+  print(f"{'messages':>8} {'bytes':>8} {'legacy(ms)':>11} {'compiled(ms)':>13} {'speedup':>8}")
+  for count in (1, 4, 16, 64):
+    payload = {"a2ui_messages": [messages[i % len(messages)] for i in range(count)]}
+    legacy_ms = _per_call_ms(lambda p: jsonschema.validate(instance=p, schema=legacy), payload)
+    compiled_ms = _per_call_ms(validator.validate, payload)
+    size = len(json.dumps(payload))
+    print(f"{count:>8} {size:>8} {legacy_ms:>11.2f} {compiled_ms:>13.3f} {legacy_ms / compiled_ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+  main()
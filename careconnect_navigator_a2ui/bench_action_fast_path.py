@@ -0,0 +1,101 @@
+"""Benchmark: end-to-end latency of button clicks handled by the action fast path.
+
+Each simulated user clicks a specialty, a provider card and a slot button.
+All three go through AdkAgentToA2AExecutor.execute(); with the router they
+finish without a model call, so the figures below are the whole click. The
+same clicks used to cost a full Gemini turn (seconds, tool call included).
+
+Run from this directory:
+    python bench_action_fast_path.py [--users 200]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+
+# agent.py insists on these; no model is called on this path.
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "bench")
+os.environ.setdefault("GOOGLE_CLOUD_LOCATION", "us-central1")
+
+from a2a import types
+from a2a.server.agent_execution import RequestContext
+from a2a.server.events import EventQueue
+
+from agent_executor import AdkAgentToA2AExecutor
+
+ZIPS = ("30303", "30301", "30305", "30022", "30062")
+
+
+def _click(context: dict, context_id: str) -> RequestContext:
+  message = types.Message(
+      role=types.Role.user,
+      message_id=uuid.uuid4().hex,
+      context_id=context_id,
+      parts=[types.Part(root=types.DataPart(
+          data={"userAction": {"name": "submit", "context": context}},
+          metadata={"mimeType": "application/json+a2ui"},
+      ))],
+  )
+  return RequestContext(request=types.MessageSendParams(message=message))
+
+
+async def _send(executor, context: dict, context_id: str):
+  """Runs one click; returns (ms, the action context of the first button shown)."""
+  queue = EventQueue()
+  start = time.perf_counter()
+  await executor.execute(_click(context, context_id), queue)
+  elapsed = (time.perf_counter() - start) * 1e3
+  buttons = []
+  while not queue.queue.empty():
+    event = await queue.dequeue_event()
+    if isinstance(event, types.TaskArtifactUpdateEvent):
+      for part in event.artifact.parts:
+        data = getattr(part.root, "data", None)
+        for component in (data or {}).get("surfaceUpdate", {}).get("components", ()):
+          button = component["component"].get("Button")
+          if button:
+            buttons.append({c["key"]: c["value"]["literalString"] for c in button["action"]["context"]})
+  return elapsed, buttons
+
+
+async def _user(executor, index: int, timings: dict):
+  context_id = f"bench-{index}"
+  await executor._runner.session_service.create_session(
+      app_name=executor._agent.name, user_id=executor._user_id, session_id=context_id,
+      state={"plan_type": "PPO", "zip_code": ZIPS[index % len(ZIPS)]},
+  )
+  ms, buttons = await _send(executor, {"message": "Search for Dermatology", "specialty": "Dermatology"}, context_id)
+  timings["search"].append(ms)
+  provider = next(b for b in buttons if "provider_id" in b)
+  ms, buttons = await _send(executor, provider, context_id)
+  timings["availability"].append(ms)
+  slot = next((b for b in buttons if "slot" in b), None)
+  if slot:
+    ms, _ = await _send(executor, slot, context_id)
+    timings["booking"].append(ms)
+
+
+async def _main(users: int):
+  executor = AdkAgentToA2AExecutor()
+  timings = {"search": [], "availability": [], "booking": []}
+  for index in range(users):
+    await _user(executor, index, timings)
+  print(f"{'click':<13} {'count':>6} {'p50(ms)':>8} {'p95(ms)':>8}")
+  for click, samples in timings.items():
+    samples.sort()
+    p95 = samples[int(len(samples) * 0.95) - 1] if samples else 0.0
+    print(f"{click:<13} {len(samples):>6} {statistics.median(samples):>8.2f} {p95:>8.2f}")
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--users", type=int, default=200)
+  args = parser.parse_args()
+  asyncio.run(_main(args.users))
+
+
+if __name__ == "__main__":
+  main()
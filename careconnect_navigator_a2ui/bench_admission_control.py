@@ -0,0 +1,161 @@
+"""Benchmark: a traffic spike against a rate-limited model, with and without admission control.
+
+A stub model stands in for a provider with a per-second quota. Calls over
+the quota fail at once with a 429; calls within it answer after --latency
+seconds. --conversations single-turn conversations arrive spread over
+--arrival-seconds. They run through the executor in three setups:
+- unprotected: no admission limit and no pacing, so every 429 fails a turn;
+- paced: model calls go through a ModelPacer (token bucket plus jittered
+  backoff on 429);
+- admission+paced: the pacer plus an AdmissionController that queues turns
+  above --max-concurrent and turns the rest away with a busy status.
+
+Use the flags to tune the limits offline against the quota.
+
+Run from this directory:
+    python bench_admission_control.py [--conversations 300] [--quota 20]
+"""
+
+import argparse
+import asyncio
+import collections
+import os
+import statistics
+import time
+from typing import Any
+
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "bench")
+os.environ.setdefault("GOOGLE_CLOUD_LOCATION", "us-central1")
+
+from a2a import types
+from a2a.server.agent_execution import RequestContext
+from a2a.server.events import EventQueue
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.genai import errors as genai_errors
+from google.genai import types as genai_types
+
+import a2ui_examples
+import agent
+import agent_executor
+import concurrency
+import response_cache
+from bench_state_injection import _NoFastPath, _message
+
+_REPLY = "Here you go.\n---a2ui_JSON---\n" + a2ui_examples.PLAN_CLARIFICATION_EXAMPLE
+
+
+class QuotaModel(BaseLlm):
+  """Accepts `quota` calls per sliding second and answers 429 to the rest."""
+
+  model: str = "quota-stub"
+  quota: int = 20
+  latency: float = 0.3
+  pacer: Any = None
+  accepted: Any = None
+  rejected: int = 0
+
+  async def generate_content_async(self, llm_request, stream=False):
+    if self.pacer is None:
+      async for response in self._generate(llm_request, stream):
+        yield response
+    else:
+      async for response in self.pacer.run(self._generate, llm_request, stream):
+        yield response
+
+  async def _generate(self, llm_request, stream=False):
+    now = time.monotonic()
+    while self.accepted and now - self.accepted[0] > 1.0:
+      self.accepted.popleft()
+    if len(self.accepted) >= self.quota:
+      self.rejected += 1
+      raise genai_errors.ClientError(429, {"error": {
+          "code": 429, "message": "Resource exhausted.", "status": "RESOURCE_EXHAUSTED"}})
+    self.accepted.append(now)
+    await asyncio.sleep(self.latency)
+    yield LlmResponse(content=genai_types.Content(role="model", parts=[genai_types.Part(text=_REPLY)]))
+
+
+def _outcome(queue: EventQueue) -> str:
+  state = None
+  while not queue.queue.empty():
+    event = queue.queue.get_nowait()
+    if isinstance(event, types.TaskStatusUpdateEvent):
+      state = event.status.state
+  return {types.TaskState.completed: "ok", types.TaskState.rejected: "busy"}.get(state, "failed")
+
+
+async def _spike(args, pacer, admission) -> dict:
+  model = QuotaModel(quota=args.quota, latency=args.latency, pacer=pacer, accepted=collections.deque())
+  agent.root_agent.model = model
+  executor = agent_executor.AdkAgentToA2AExecutor()
+  executor._action_router = _NoFastPath()  # pylint: disable=protected-access
+  executor._response_cache = response_cache.ResponseCache(max_entries=0)  # pylint: disable=protected-access
+  executor._admission = admission  # pylint: disable=protected-access
+  outcomes = collections.Counter()
+  latencies = []
+
+  async def conversation(index: int):
+    await asyncio.sleep(index * args.arrival_seconds / args.conversations)
+    message = _message("Hi, I need a doctor.", None)
+    message.context_id = f"spike-{index}"
+    queue = EventQueue()
+    start = time.perf_counter()
+    await executor.execute(RequestContext(request=types.MessageSendParams(message=message)), queue)
+    outcome = _outcome(queue)
+    outcomes[outcome] += 1
+    if outcome == "ok":
+      latencies.append(time.perf_counter() - start)
+
+  start = time.perf_counter()
+  await asyncio.gather(*(conversation(i) for i in range(args.conversations)))
+  elapsed = time.perf_counter() - start
+  latencies.sort()
+  return {
+      "ok": outcomes["ok"], "busy": outcomes["busy"], "failed": outcomes["failed"],
+      "429s": model.rejected,
+      "p50_s": latencies and round(statistics.median(latencies), 2),
+      "p95_s": latencies and round(latencies[int(0.95 * (len(latencies) - 1))], 2),
+      "max_s": latencies and round(latencies[-1], 2),
+      "elapsed_s": round(elapsed, 1),
+  }
+
+
+async def _main(args):
+  unbounded = lambda: concurrency.AdmissionController(max_concurrent=10**9, max_queue=10**9)
+  pacer = lambda: concurrency.ModelPacer(rate=args.rps, burst=args.burst)
+  setups = {
+      "unprotected": (None, unbounded()),
+      "paced": (pacer(), unbounded()),
+      "admission+paced": (pacer(), concurrency.AdmissionController(
+          max_concurrent=args.max_concurrent, max_queue=args.max_queue, max_wait=args.max_wait)),
+  }
+  print(f"{args.conversations} conversations over {args.arrival_seconds}s; model quota {args.quota}/s, "
+        f"latency {args.latency}s; pacer {args.rps}/s burst {args.burst}; admission "
+        f"{args.max_concurrent} running, {args.max_queue} queued, {args.max_wait}s max wait")
+  for name, (setup_pacer, admission) in setups.items():
+    result = await _spike(args, setup_pacer, admission)
+    extra = {}
+    if setup_pacer is not None:
+      extra["pacer"] = setup_pacer.stats()
+    if name == "admission+paced":
+      extra["admission"] = admission.stats()
+    print(f"{name:<16} {result} {extra}")
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--conversations", type=int, default=300)
+  parser.add_argument("--arrival-seconds", type=float, default=0.5)
+  parser.add_argument("--quota", type=int, default=20, help="model calls per second before 429s")
+  parser.add_argument("--latency", type=float, default=0.3)
+  parser.add_argument("--rps", type=float, default=18.0, help="pacer token rate")
+  parser.add_argument("--burst", type=int, default=5)
+  parser.add_argument("--max-concurrent", type=int, default=8)
+  parser.add_argument("--max-queue", type=int, default=64)
+  parser.add_argument("--max-wait", type=float, default=5.0)
+  asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+  main()
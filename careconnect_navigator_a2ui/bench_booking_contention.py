@@ -0,0 +1,170 @@
+"""Benchmark: concurrent bookings from real threads against ReservationBook.
+
+Sessions run on a thread pool, like the sync booking tool does under ADK,
+and the interpreter switches threads every microsecond, so check-then-book
+windows really interleave. Three phases:
+1. flow: every session checks a random provider's day, holds what it sees,
+   then commits one slot. Some sessions retry with the same idempotency key.
+2. stampede: for every slot, --racers threads wait on a barrier and then
+   commit that same slot at once, without holds.
+3. unlocked stampede: phase 2 again with the provider locks replaced by
+   no-ops. It should double-book; this shows the race is real.
+The run fails loudly if any locked phase books a slot twice.
+
+Then it checks that:
+- idempotency keys are scoped to the holder;
+- a key reused for another slot is rejected;
+- expired holds on providers nobody queries again are swept.
+
+Run from this directory:
+    python bench_booking_contention.py [--sessions 5000] [--providers 20] [--racers 16]
+"""
+
+import argparse
+import contextlib
+import datetime
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from availability import SlotCalendar, parse_day, slots_mask
+from reservations import ReservationBook
+
+# Tomorrow: slots that have already started cannot be booked.
+DATE = (datetime.date.today() + datetime.timedelta(days=1)).isoformat()
+OPEN_TIMES = ("09:00", "09:30", "10:00", "10:30", "11:00", "14:00", "14:30", "15:00")
+
+
+class _UnlockedBook(ReservationBook):
+    def _lock_for(self, provider_id):
+        return contextlib.nullcontext()
+
+
+def _book(unlocked=False):
+    calendar = SlotCalendar(default_template=slots_mask(OPEN_TIMES), is_known=lambda provider_id: True)
+    return calendar, (_UnlockedBook if unlocked else ReservationBook)(calendar)
+
+
+def _check(calendar, providers, confirmations) -> tuple:
+    """(slots with more than one confirmation, slots the calendar shows booked)."""
+    double_booked = sum(1 for ids in confirmations.values() if len(ids) > 1)
+    calendar_booked = sum(
+        bin(calendar.booked_bits(f"p{p}", parse_day(DATE))).count("1") for p in range(providers)
+    )
+    return double_booked, calendar_booked
+
+
+def _flow(args) -> dict:
+    calendar, book = _book()
+    outcomes = Counter()
+    confirmations = defaultdict(set)
+    lock = threading.Lock()
+
+    def session(i):
+        rng = random.Random(args.seed * 1_000_003 + i)
+        provider_id, session_id = f"p{rng.randrange(args.providers)}", f"s{i}"
+        held = book.hold(provider_id, book.visible_slots(provider_id, DATE, DATE, session_id), session_id)
+        # Sessions that saw nothing still race for a random slot to add contention.
+        slot = rng.choice(held) if held else f"{DATE} {rng.choice(OPEN_TIMES)}"
+        key = f"{provider_id}:{slot}"
+        result = book.commit(provider_id, slot, session_id, key)
+        retried = rng.random() < 0.2 and book.commit(provider_id, slot, session_id, key) == result
+        with lock:
+            outcomes["retry_same_result"] += retried
+            if result["status"] == "success":
+                outcomes["booked"] += 1
+                confirmations[(provider_id, slot)].add(result["confirmation_id"])
+            else:
+                outcomes["rejected"] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(session, range(args.sessions)))
+    elapsed = time.perf_counter() - start
+    double_booked, calendar_booked = _check(calendar, args.providers, confirmations)
+    return dict(outcomes, double_booked=double_booked, calendar_booked=calendar_booked,
+                attempts_per_s=round(args.sessions / elapsed))
+
+
+def _stampede(args, unlocked: bool) -> dict:
+    calendar, book = _book(unlocked)
+    confirmations = defaultdict(set)
+    lock = threading.Lock()
+    targets = [(f"p{p}", f"{DATE} {t}") for p in range(args.providers) for t in OPEN_TIMES]
+
+    def race(target):
+        provider_id, slot = target
+        barrier = threading.Barrier(args.racers)
+
+        def racer(r):
+            barrier.wait()
+            result = book.commit(provider_id, slot, f"racer-{r}")
+            if result["status"] == "success":
+                with lock:
+                    confirmations[target].add(result["confirmation_id"])
+
+        threads = [threading.Thread(target=racer, args=(r,)) for r in range(args.racers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    for target in targets:
+        race(target)
+    double_booked, calendar_booked = _check(calendar, args.providers, confirmations)
+    return {"slots": len(targets), "racers_per_slot": args.racers,
+            "confirmations": sum(len(ids) for ids in confirmations.values()),
+            "double_booked": double_booked, "calendar_booked": calendar_booked}
+
+
+def _idempotency_and_sweep() -> dict:
+    _, book = _book()
+    first = book.commit("p0", f"{DATE} 09:00", "alice", "key-1")
+    other_holder = book.commit("p0", f"{DATE} 10:00", "bob", "key-1")
+    reused = book.commit("p0", f"{DATE} 11:00", "alice", "key-1")
+    retried = book.commit("p0", f"{DATE} 09:00", "alice", "key-1")
+
+    now = [0.0]
+    calendar = SlotCalendar(default_template=slots_mask(OPEN_TIMES), is_known=lambda provider_id: True)
+    book = ReservationBook(calendar, hold_ttl=120, clock=lambda: now[0])
+    for p in range(1000):
+        book.hold(f"p{p}", [f"{DATE} 09:00"], "s")
+    before = book.hold_count()
+    now[0] = 121.0
+    # One unrelated hold later sweeps every provider nobody looked at again.
+    book.hold("fresh", [f"{DATE} 09:00"], "s")
+    return {
+        "other_holder_gets_own_booking": other_holder.get("confirmation_id") not in (None, first["confirmation_id"]),
+        "reused_key_rejected": reused["status"] == "error",
+        "retry_same_result": retried == first,
+        "holds_before_sweep": before,
+        "holds_after_sweep": book.hold_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=5_000)
+    parser.add_argument("--providers", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--racers", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    sys.setswitchinterval(1e-6)
+
+    flow = _flow(args)
+    locked = _stampede(args, unlocked=False)
+    unlocked = _stampede(args, unlocked=True)
+    print(f"flow ({args.sessions} sessions, {args.threads} threads): {flow}")
+    print(f"stampede, locked:   {locked}")
+    print(f"stampede, unlocked: {unlocked}")
+    print(f"idempotency + sweep: {_idempotency_and_sweep()}")
+    if flow["double_booked"] or flow["booked"] != flow["calendar_booked"] or locked["double_booked"]:
+        raise SystemExit("FAIL: slots were double-booked")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark: cold-start time and RSS, generated directory vs. memory-mapped file.
+
+Each measurement runs in a fresh interpreter and reports the time and
+resident-memory growth of building (or opening) the directory and serving
+one lookup, excluding interpreter and import overhead. Linux only (reads
+/proc/self/status). Mapped pages count towards RSS only once touched.
+
+Run from this directory:
+    python bench_directory_cold_start.py [--sizes 1000 100000 1000000]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from provider_directory import ProviderDirectory
+from tools import _generate_providers
+
+_PROBE = r"""
+import json, sys, time
+from provider_directory import MappedProviderDirectory, ProviderDirectory
+if sys.argv[1] == "generate":
+    from tools import _generate_providers
+
+def rss_kb():
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+
+before = rss_kb()
+start = time.perf_counter()
+if sys.argv[1] == "generate":
+    directory = ProviderDirectory.from_records(_generate_providers(int(sys.argv[2])))
+else:
+    directory = MappedProviderDirectory(sys.argv[2])
+row = directory.find(directory[len(directory) // 2].id)
+list(directory.lookup(row.specialty, row.zip))
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "rss_kb": rss_kb() - before}))
+"""
+
+
+def _probe(mode, argument):
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE, mode, str(argument)],
+        capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'providers':>10} {'generate(s)':>12} {'gen +RSS(MB)':>12} {'mmap(s)':>9} {'mmap +RSS(MB)':>13} {'file(MB)':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, f"providers_{size}.ccdir")
+            ProviderDirectory.from_records(_generate_providers(size)).save(path)
+            generated = _probe("generate", size)
+            mapped = _probe("mmap", path)
+            print(
+                f"{size:>10} {generated['seconds']:>12.3f} {generated['rss_kb'] / 1024:>12.1f}"
+                f" {mapped['seconds']:>9.3f} {mapped['rss_kb'] / 1024:>13.1f}"
+                f" {os.path.getsize(path) / 2**20:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
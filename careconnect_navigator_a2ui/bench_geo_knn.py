@@ -0,0 +1,65 @@
+"""Benchmark: k-nearest zip latency for ZipGrid vs. a full haversine scan.
+
+Uses a synthetic national centroid table (uniform over the contiguous US)
+so the numbers reflect directory scale rather than the bundled Atlanta
+table.
+
+Run from this directory:
+    python bench_geo_knn.py [--zips 42000] [--k 10]
+"""
+
+import argparse
+import heapq
+import random
+import time
+
+from geo import ZipGrid, haversine_miles
+
+
+def _brute_force(centroids, zip_code, k):
+    lat, lon = centroids[zip_code]
+    return heapq.nsmallest(
+        k, ((haversine_miles(lat, lon, other_lat, other_lon), other) for other, (other_lat, other_lon) in centroids.items())
+    )
+
+
+def _time_per_call(fn, origins, budget_s=2.0):
+    calls = 0
+    start = time.perf_counter()
+    for origin in origins:
+        fn(origin)
+        calls += 1
+        if time.perf_counter() - start > budget_s:
+            break
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--zips", type=int, default=42_000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=2_000)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    centroids = {f"{i:05d}": (rng.uniform(25.0, 49.0), rng.uniform(-124.0, -67.0)) for i in range(args.zips)}
+    start = time.perf_counter()
+    grid = ZipGrid(centroids)
+    build_s = time.perf_counter() - start
+
+    origins = rng.sample(sorted(centroids), min(args.queries, len(centroids)))
+    for origin in origins[:20]:
+        assert [z for _, z in grid.nearest(origin, args.k)] == [z for _, z in _brute_force(centroids, origin, args.k)]
+
+    grid_s = _time_per_call(lambda z: grid.nearest(z, args.k), origins)
+    scan_s = _time_per_call(lambda z: _brute_force(centroids, z, args.k), origins)
+    print(f"zips: {args.zips}  k: {args.k}  grid build: {build_s * 1e3:.0f} ms")
+    print(f"full scan: {scan_s * 1e3:8.2f} ms/query")
+    print(f"grid:      {grid_s * 1e3:8.3f} ms/query  ({scan_s / grid_s:.0f}x)")
+    # A hostile radius is clamped and scans only occupied cells.
+    huge_s = _time_per_call(lambda z: grid.within(z, 100_000), origins[:5])
+    print(f"radius 100000 mi: {huge_s * 1e3:8.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
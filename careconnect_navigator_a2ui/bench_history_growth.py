@@ -0,0 +1,138 @@
+"""Report: prompt size by turn, with and without history compaction.
+
+Drives the real executor and tools through a scripted 30-turn session with
+four search -> availability -> booking cycles. It includes free-text
+questions answered with model-written A2UI and one invalid response per
+cycle that forces a retry. A scripted stub model plays the model's side.
+For every turn the report shows the size of the first request the model
+received, outside the static system instruction, in bytes and in estimated
+tokens (4 bytes per token).
+
+Run from this directory:
+    python bench_history_growth.py
+"""
+
+import asyncio
+import json
+import os
+
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "bench")
+os.environ.setdefault("GOOGLE_CLOUD_LOCATION", "us-central1")
+
+from a2a import types
+from a2a.server.agent_execution import RequestContext
+from a2a.server.events import EventQueue
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types as genai_types
+
+import a2ui_examples
+import agent
+import agent_executor
+import history_compaction
+import response_cache
+from bench_state_injection import _NoFastPath, _message
+
+SEARCHES = [("dermatology", "30303"), ("cardiology", "30305"), ("pediatrics", "30022"), ("dermatology", "30062")]
+
+
+def _reply(text: str, payload: str):
+  return genai_types.Content(role="model", parts=[genai_types.Part(text=f"{text}\n---a2ui_JSON---\n{payload}")])
+
+
+def _call(name: str, **args):
+  return genai_types.Content(role="model", parts=[genai_types.Part(
+      function_call=genai_types.FunctionCall(name=name, args=args))])
+
+
+def _script() -> list:
+  """30 turns of (user text, action context, model responses in order)."""
+  form = a2ui_examples.PROVIDER_SEARCH_FORM_EXAMPLE
+  turns = [
+      ("Hi, I need a doctor.", None, [_reply("Which plan do you have?", a2ui_examples.PLAN_CLARIFICATION_EXAMPLE)]),
+      ("I have PPO plan", {"plan_type": "PPO"}, [_reply("What are you looking for?", form)]),
+  ]
+  for index, (specialty, zip_code) in enumerate(SEARCHES):
+    provider = f"{specialty}_{zip_code}_1"
+    date = f"2026-10-{20 + index}"
+    turns += [
+        (f"Find a {specialty} near {zip_code}", None, [
+            _call("search_providers", specialty=specialty, zip_code=zip_code, plan_type="PPO"),
+            _reply("Here are providers near you.", '{"render": "provider_list"}'),
+        ]),
+        ("Are any of them in-network?", None, [_reply("All of these are in-network.", form)]),
+        (f"Check availability for {provider}", {"provider_id": provider, "date": date}, [
+            _call("check_availability", provider_id=provider, date=date),
+            _reply("Pick a time.", '{"render": "availability"}'),
+        ]),
+        ("What about the next day?", None, [
+            genai_types.Content(role="model", parts=[genai_types.Part(text="Let me look that up.")]),
+            _call("check_availability", provider_id=provider, date=f"2026-10-{21 + index}"),
+            _reply("Here is the next day.", '{"render": "availability"}'),
+        ]),
+        ("Book 09:00", {"provider_id": provider, "slot": f"{date} 09:00"}, [
+            _call("book_appointment", provider_id=provider, slot=f"{date} 09:00"),
+            _reply("You're booked.", '{"render": "booking_confirmation"}'),
+        ]),
+        ("Thanks! Can I search again?", None, [_reply("Of course.", form)]),
+        ("Which one was closest?", None, [_reply("The first one.", form)]),
+    ]
+  return turns[:30]
+
+
+class ScriptedModel(BaseLlm):
+  """Plays back the responses queued for the current turn."""
+
+  model: str = "scripted-stub"
+  queue: list = []
+  requests: list = []
+
+  async def generate_content_async(self, llm_request, stream=False):
+    self.requests.append(llm_request)
+    yield LlmResponse(content=self.queue.pop(0))
+
+
+def _request_bytes(request) -> int:
+  return len(json.dumps([c.model_dump(mode="json", exclude_none=True) for c in request.contents]))
+
+
+async def _run(callback) -> list:
+  model = ScriptedModel(queue=[], requests=[])
+  agent.root_agent.model = model
+  agent.root_agent.before_model_callback = callback
+  executor = agent_executor.AdkAgentToA2AExecutor()
+  executor._action_router = _NoFastPath()  # pylint: disable=protected-access
+  executor._response_cache = response_cache.ResponseCache(max_entries=0)  # pylint: disable=protected-access
+  sizes = []
+  for text, action_context, responses in _script():
+    model.queue = list(responses)
+    first = len(model.requests)
+    message = _message(text, action_context)
+    await executor.execute(RequestContext(request=types.MessageSendParams(message=message)), EventQueue())
+    sizes.append(_request_bytes(model.requests[first]))
+  return sizes
+
+
+async def _main():
+  original = agent.root_agent.before_model_callback
+  try:
+    before = await _run(None)
+    after = await _run(history_compaction.compact_history)
+  finally:
+    agent.root_agent.before_model_callback = original
+  print(f"{'turn':<5} {'raw bytes':>10} {'~tokens':>8} {'compacted':>10} {'~tokens':>8}")
+  for turn, (b, a) in enumerate(zip(before, after), 1):
+    print(f"{turn:<5} {b:>10} {b / 4:>8.0f} {a:>10} {a / 4:>8.0f}")
+  half = len(before) // 2
+  for name, sizes in (("raw", before), ("compacted", after)):
+    growth = (sizes[-1] - sizes[half - 1]) / (len(sizes) - half)
+    print(f"{name}: turn {len(sizes)} request {sizes[-1]} bytes; "
+          f"growth over the last {len(sizes) - half} turns {growth:.0f} bytes/turn; total {sum(sizes)} bytes")
+
+
+def main():
+  asyncio.run(_main())
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,96 @@
+"""Report: executor stage breakdown, exported metrics and instrumentation overhead.
+
+Runs the 30-turn scripted session from bench_history_growth through the
+executor three times: with instrumentation on, on with OpenTelemetry spans,
+and off. It prints the stage breakdown and the Prometheus counters from the
+instrumented run. It then compares the mean turn time of the three runs and
+the cost of one stage() call.
+
+Run from this directory:
+    python bench_instrumentation.py [--rounds 3]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "bench")
+os.environ.setdefault("GOOGLE_CLOUD_LOCATION", "us-central1")
+
+from a2a import types
+from a2a.server.agent_execution import RequestContext
+from a2a.server.events import EventQueue
+
+import agent
+import agent_executor
+import instrumentation
+import response_cache
+from bench_history_growth import ScriptedModel, _script
+from bench_state_injection import _NoFastPath, _message
+
+
+async def _session(metrics, context_id: str) -> list:
+  """Per-turn wall time in seconds for one scripted session."""
+  model = ScriptedModel(queue=[], requests=[])
+  agent.root_agent.model = model
+  executor = agent_executor.AdkAgentToA2AExecutor()
+  executor._action_router = _NoFastPath()  # pylint: disable=protected-access
+  executor._response_cache = response_cache.ResponseCache(max_entries=0)  # pylint: disable=protected-access
+  executor.metrics = metrics
+  timings = []
+  for text, action_context, responses in _script():
+    model.queue = list(responses)
+    message = _message(text, action_context)
+    message.context_id = context_id
+    start = time.perf_counter()
+    await executor.execute(RequestContext(request=types.MessageSendParams(message=message)), EventQueue())
+    timings.append(time.perf_counter() - start)
+  return timings
+
+
+def _stage_cost(metrics, calls: int = 200_000) -> float:
+  start = time.perf_counter()
+  for _ in range(calls):
+    with metrics.stage("bench"):
+      pass
+  return (time.perf_counter() - start) / calls * 1e9
+
+
+async def _main(args):
+  modes = {
+      "on": lambda: instrumentation.Instrumentation(enabled=True, tracing=False),
+      "on+spans": lambda: instrumentation.Instrumentation(enabled=True, tracing=True),
+      "off": lambda: instrumentation.Instrumentation(enabled=False),
+  }
+  report = modes["on"]()
+  await _session(report, "warmup")
+  report = modes["on"]()
+  await _session(report, "report")
+
+  print(f"{'stage':<18} {'count':>6} {'mean(ms)':>9} {'p95 <=(ms)':>10}")
+  for name, (count, mean, p95) in report.stage_summary().items():
+    print(f"{name:<18} {count:>6} {mean * 1e3:>9.2f} {p95 * 1e3:>10.1f}")
+  print()
+  print("\n".join(line for line in report.prometheus_text().splitlines()
+                  if "_total" in line or "_count" in line))
+  print()
+
+  turn_times = {name: [] for name in modes}
+  for round_index in range(args.rounds):
+    for name, make in modes.items():
+      turn_times[name] += await _session(make(), f"{name}-{round_index}")
+  print(f"{'mode':<10} {'mean turn(ms)':>14} {'stage() call(ns)':>17}")
+  for name, make in modes.items():
+    print(f"{name:<10} {statistics.fmean(turn_times[name]) * 1e3:>14.2f} {_stage_cost(make()):>17.0f}")
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--rounds", type=int, default=3)
+  asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,308 @@
+"""Offline load test: concurrent simulated A2A conversations against the executor.
+
+No network is needed. A deterministic scripted model replaces root_agent's
+Gemini. It reads each request like the real model would and then:
+- calls search_providers, check_availability or book_appointment;
+- answers with A2UI templates or render directives;
+- answers a configurable share of first attempts with a deliberately invalid
+  payload. Half of these can be repaired locally; the rest force a retry.
+
+Each model call takes --model-latency seconds, and the answer is streamed in
+chunks.
+
+Each simulated client runs the booking flow, clicking the buttons of the
+surfaces it gets back:
+1. plan: "Hi, I need a <specialty> doctor".
+2. criteria: click PPO.
+3. search: "Search <specialty> near <zip>".
+4. slots: click a provider's "Check availability".
+5. booking: click a slot.
+
+The report covers:
+- p50/p95/p99 turn latency, overall and per step;
+- turns per second;
+- model calls, retries and local repairs;
+- busy and failed turns, and conversations aborted because the surface
+  had nothing left to click (e.g. every slot already booked);
+- peak RSS.
+
+Run from this directory:
+    python bench_load.py [--conversations 50] [--model-latency 0.2] [--invalid-rate 0.1]
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import logging
+import os
+import re
+import resource
+import statistics
+import time
+import zlib
+
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "bench")
+os.environ.setdefault("GOOGLE_CLOUD_LOCATION", "us-central1")
+
+from a2a import types
+from a2a.server.agent_execution import RequestContext
+from a2a.server.events import EventQueue
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types as genai_types
+
+import a2ui_examples
+import agent
+import agent_executor
+import response_cache
+from bench_state_injection import _NoFastPath, _message
+
+SPECIALTIES = ("dermatology", "cardiology", "pediatrics", "orthopedics", "primary care")
+ZIP_CODES = ("30303", "30305", "30022", "30062", "30301")
+STEPS = ("plan", "criteria", "search", "slots", "booking")
+
+_RENDER_AFTER = {
+    "search_providers": ("Here are providers near you.", "provider_list"),
+    "check_availability": ("Pick a time that works for you.", "availability"),
+    "book_appointment": ("All set.", "booking_confirmation"),
+}
+_STATE_ITEMS = re.compile(r"\[State changes: ([^\]]*)\]|^Known: (.*)$", re.MULTILINE)
+_SEARCH = re.compile(r"Search (.+) near (\d{5})")
+_RETRIED_QUERY = re.compile(r"Please retry the original request: '(.*)'$", re.DOTALL)
+
+
+def _content(part) -> genai_types.Content:
+  return genai_types.Content(role="model", parts=[part])
+
+
+def _reply(text: str, payload: str) -> genai_types.Content:
+  return _content(genai_types.Part(text=f"{text}\n---a2ui_JSON---\n{payload}"))
+
+
+def _call(name: str, **args) -> genai_types.Content:
+  return _content(genai_types.Part(function_call=genai_types.FunctionCall(name=name, args=args)))
+
+
+def _user_texts(contents):
+  for index, content in enumerate(contents):
+    if content.role == "user":
+      for part in content.parts or []:
+        if part.text:
+          yield index, part.text
+
+
+def _known_state(contents) -> dict:
+  """State as the model can reconstruct it from annotations and the summary."""
+  state = {}
+  for _, text in _user_texts(contents):
+    for match in _STATE_ITEMS.finditer(text):
+      for item in (match.group(1) or match.group(2)).split("; "):
+        key, _, value = item.partition("=")
+        try:
+          state[key] = json.loads(value)
+        except ValueError:
+          state[key] = value
+  return state
+
+
+class ScriptedLlm(BaseLlm):
+  """Deterministic stand-in for Gemini that follows the booking flow."""
+
+  model: str = "scripted-load"
+  latency: float = 0.2
+  invalid_rate: float = 0.1
+  stream_chunks: int = 4
+  calls: int = 0
+  invalid_sent: int = 0
+
+  async def generate_content_async(self, llm_request, stream=False):
+    self.calls += 1
+    await asyncio.sleep(self.latency)
+    content = self._respond(llm_request.contents)
+    text = content.parts[0].text
+    if stream and text and self.stream_chunks > 1:
+      size = -(-len(text) // self.stream_chunks)
+      for start in range(0, len(text), size):
+        yield LlmResponse(content=_content(genai_types.Part(text=text[start:start + size])), partial=True)
+    yield LlmResponse(content=content)
+
+  def _respond(self, contents) -> genai_types.Content:
+    queries = [(i, t) for i, t in _user_texts(contents) if not t.startswith("**Current Step**")]
+    index, query = queries[-1]
+    results = [p.function_response for c in contents[index + 1:] for p in c.parts or [] if p.function_response]
+    if results:
+      text, surface = _RENDER_AFTER.get(results[-1].name, ("Done.", "provider_list"))
+      return _reply(text, json.dumps({"render": surface}))
+
+    retried = _RETRIED_QUERY.search(query)
+    answer = self._answer(retried.group(1) if retried else query, contents)
+    if retried or zlib.crc32(query.encode("utf-8")) % 1000 >= self.invalid_rate * 1000:
+      return answer
+    self.invalid_sent += 1
+    text = answer.parts[0].text
+    if text and zlib.crc32(query.encode("utf-8")) // 1000 % 2:
+      # A trailing comma: local repair fixes this one without a retry.
+      return _content(genai_types.Part(text=text.rstrip()[:-1] + ",}"))
+    return _content(genai_types.Part(text="Sure, let me help with that."))
+
+  def _answer(self, query: str, contents) -> genai_types.Content:
+    state = _known_state(contents)
+    search = _SEARCH.match(query)
+    if query.startswith("Hi"):
+      return _reply("Welcome to CareConnect! Which plan do you have?", a2ui_examples.PLAN_CLARIFICATION_EXAMPLE)
+    if search:
+      return _call("search_providers", specialty=search.group(1), zip_code=search.group(2),
+                   plan_type=state.get("plan_type", "PPO"))
+    if query.startswith("Check availability") and state.get("provider_id"):
+      return _call("check_availability", provider_id=state["provider_id"], date=state.get("date"))
+    if query.startswith("Book") and state.get("provider_id"):
+      return _call("book_appointment", provider_id=state["provider_id"], slot=state.get("slot"))
+    return _reply("What kind of doctor are you looking for?", a2ui_examples.PROVIDER_SEARCH_FORM_EXAMPLE)
+
+
+def _button_contexts(events) -> list:
+  """The action contexts of every button in the turn's A2UI artifact."""
+  found = []
+
+  def walk(node):
+    if isinstance(node, dict):
+      if node.get("name") == "submit" and isinstance(node.get("context"), list):
+        found.append({item["key"]: item["value"].get("literalString") for item in node["context"]})
+      for value in node.values():
+        walk(value)
+    elif isinstance(node, list):
+      for value in node:
+        walk(value)
+
+  for event in events:
+    if isinstance(event, types.TaskArtifactUpdateEvent):
+      for part in event.artifact.parts:
+        if isinstance(part.root, types.DataPart):
+          walk(part.root.data)
+  return found
+
+
+def _drain(queue: EventQueue):
+  events = []
+  while not queue.queue.empty():
+    events.append(queue.queue.get_nowait())
+  return events
+
+
+def _final_state(events):
+  states = [e.status.state for e in events if isinstance(e, types.TaskStatusUpdateEvent)]
+  return states[-1] if states else None
+
+
+class LoadTest:
+  def __init__(self, args):
+    self.args = args
+    self.model = ScriptedLlm(latency=args.model_latency, invalid_rate=args.invalid_rate,
+                             stream_chunks=args.stream_chunks)
+    agent.root_agent.model = self.model
+    self.executor = agent_executor.AdkAgentToA2AExecutor()
+    if args.no_fast_path:
+      self.executor._action_router = _NoFastPath()  # pylint: disable=protected-access
+    if args.no_response_cache:
+      self.executor._response_cache = response_cache.ResponseCache(max_entries=0)  # pylint: disable=protected-access
+    self.latencies = collections.defaultdict(list)
+    self.outcomes = collections.Counter()
+
+  async def _turn(self, step: str, context_id: str, text: str, action_context=None) -> list:
+    message = _message(text, action_context)
+    message.context_id = context_id
+    queue = EventQueue()
+    start = time.perf_counter()
+    await self.executor.execute(RequestContext(request=types.MessageSendParams(message=message)), queue)
+    elapsed = time.perf_counter() - start
+    events = _drain(queue)
+    state = _final_state(events)
+    if state == types.TaskState.completed:
+      self.latencies[step].append(elapsed)
+      self.outcomes["completed"] += 1
+    else:
+      self.outcomes["busy" if state == types.TaskState.rejected else "failed"] += 1
+      return None
+    return _button_contexts(events)
+
+  async def conversation(self, index: int):
+    await asyncio.sleep(index * self.args.ramp_seconds / self.args.conversations)
+    specialty = SPECIALTIES[index % len(SPECIALTIES)]
+    zip_code = ZIP_CODES[(index // len(SPECIALTIES)) % len(ZIP_CODES)]
+    context_id = f"load-{index}"
+    script = [
+        ("plan", f"Hi, I need a {specialty} doctor", {}),
+        ("criteria", "I have PPO plan", {"plan_type": "PPO"}),
+        ("search", f"Search {specialty} near {zip_code}", {}),
+        ("slots", None, "date"),
+        ("booking", None, "slot"),
+    ]
+    buttons = []
+    for step, text, action_context in script:
+      if text is None:
+        # Click one of the previous surface's buttons, e.g. a provider's
+        # "Check availability" or one of the offered slots.
+        choices = [dict(b) for b in buttons if b.get(action_context)]
+        if not choices:
+          self.outcomes[f"aborted_at_{step}"] += 1
+          return
+        action_context = choices[index % len(choices)]
+        text = action_context.pop("message", step)
+      buttons = await self._turn(step, context_id, text, action_context or None)
+      if buttons is None:
+        self.outcomes[f"aborted_at_{step}"] += 1
+        return
+      await asyncio.sleep(self.args.think_seconds)
+
+  async def run(self):
+    start = time.perf_counter()
+    await asyncio.gather(*(self.conversation(i) for i in range(self.args.conversations)))
+    return time.perf_counter() - start
+
+
+def _percentiles(values) -> str:
+  if len(values) < 2:
+    return "n/a"
+  q = statistics.quantiles(values, n=100, method="inclusive")
+  return f"{statistics.median(values) * 1e3:>7.0f} {q[94] * 1e3:>7.0f} {q[98] * 1e3:>7.0f}"
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--conversations", type=int, default=50)
+  parser.add_argument("--model-latency", type=float, default=0.2, help="seconds per model call")
+  parser.add_argument("--invalid-rate", type=float, default=0.1, help="share of first answers that are invalid")
+  parser.add_argument("--stream-chunks", type=int, default=4)
+  parser.add_argument("--ramp-seconds", type=float, default=1.0, help="spread of conversation start times")
+  parser.add_argument("--think-seconds", type=float, default=0.0, help="client pause between turns")
+  parser.add_argument("--no-fast-path", action="store_true", help="send button clicks through the model too")
+  parser.add_argument("--no-response-cache", action="store_true", help="run every template turn through the model")
+  parser.add_argument("--verbose", action="store_true", help="keep the executor's debug logging")
+  args = parser.parse_args()
+  if not args.verbose:
+    # Per-turn debug logging would dominate the measured latency.
+    logging.disable(logging.WARNING)
+
+  test = LoadTest(args)
+  elapsed = asyncio.run(test.run())
+  all_latencies = [v for step in STEPS for v in test.latencies[step]]
+  metrics = test.executor.metrics
+  print(f"{args.conversations} conversations, model latency {args.model_latency * 1e3:.0f} ms, "
+        f"invalid rate {args.invalid_rate:.0%}, fast path {'off' if args.no_fast_path else 'on'}, "
+        f"response cache {'off' if args.no_response_cache else 'on'}")
+  print(f"{'step':<9} {'turns':>6} {'p50(ms)':>7} {'p95(ms)':>7} {'p99(ms)':>7}")
+  for step in STEPS:
+    print(f"{step:<9} {len(test.latencies[step]):>6} {_percentiles(test.latencies[step])}")
+  print(f"{'all':<9} {len(all_latencies):>6} {_percentiles(all_latencies)}")
+  print(f"turns/s: {len(all_latencies) / elapsed:.1f} over {elapsed:.1f}s; outcomes: {dict(test.outcomes)}")
+  print(f"model calls: {test.model.calls}; invalid answers sent: {test.model.invalid_sent}; "
+        f"retries: {metrics.counter('retries', reason='invalid_a2ui')}; "
+        f"local repairs: {metrics.counter('repairs', outcome='repaired')}")
+  print(f"response cache: {test.executor._response_cache.stats()}")  # pylint: disable=protected-access
+  print(f"admission: {test.executor._admission.stats()}")  # pylint: disable=protected-access
+  print(f"peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+  main()
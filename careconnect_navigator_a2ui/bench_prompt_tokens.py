@@ -0,0 +1,140 @@
+"""Report: prompt tokens per turn, every example in the system prompt vs. step-aware assembly.
+
+Runs the same scripted conversation (plan -> criteria -> providers -> slots
+-> confirmation) through two agents backed by a recording stub model and
+counts the tokens of each request the stub receives. The legacy agent embeds
+all A2UI examples in its instruction, as agent.py used to. The current agent
+sends STATIC_INSTRUCTION as a fixed, cacheable prefix and only the current
+step's examples after it.
+
+Tokens come from google.genai's offline LocalTokenizer when it is available
+and from a 4-characters-per-token estimate otherwise.
+
+Run from this directory:
+    python bench_prompt_tokens.py
+"""
+
+import asyncio
+import os
+
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "bench")
+os.environ.setdefault("GOOGLE_CLOUD_LOCATION", "us-central1")
+
+from google.adk import runners
+from google.adk.agents import Agent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.sessions import in_memory_session_service
+from google.genai import types as genai_types
+
+import a2ui_examples
+import agent
+import flow_steps
+
+# (user message, state the executor would hold when it arrives)
+SCRIPT = [
+    ("Hi, I need a dermatologist.", {}),
+    ("I have PPO plan", {"plan_type": "PPO"}),
+    ("Search for providers.", {"plan_type": "PPO", "specialty": "Dermatology", "zip_code": "30303"}),
+    ("Check availability for Dr. Alice", {"plan_type": "PPO", "specialty": "Dermatology", "zip_code": "30303",
+                                         "provider_id": "dermatology_30303_1"}),
+    ("Book slot 09:00", {"plan_type": "PPO", "specialty": "Dermatology", "zip_code": "30303",
+                         "provider_id": "dermatology_30303_1", "slot": "09:00"}),
+]
+
+LEGACY_INSTRUCTION = agent.STATIC_INSTRUCTION + "".join(
+    f"\n{title}:\n{example}\n" for title, example in (
+        ("Plan Clarification Example", a2ui_examples.PLAN_CLARIFICATION_EXAMPLE),
+        ("Provider Search Form Example", a2ui_examples.PROVIDER_SEARCH_FORM_EXAMPLE),
+        ("Provider List Example", a2ui_examples.PROVIDER_LIST_EXAMPLE),
+        ("Date Selection Example", a2ui_examples.DATE_SELECTION_EXAMPLE),
+    )
+)
+
+
+def _token_counter():
+  try:
+    from google.genai import local_tokenizer
+    tokenizer = local_tokenizer.LocalTokenizer(model_name="gemini-2.5-flash")
+    tokenizer.count_tokens("warm up")
+    return lambda text: tokenizer.count_tokens(text).total_tokens, "LocalTokenizer"
+  except Exception:  # pylint: disable=broad-except
+    return lambda text: len(text) / 4, "4 chars/token estimate"
+
+
+def _text_of(content) -> str:
+  if content is None:
+    return ""
+  if isinstance(content, str):
+    return content
+  parts = content.parts or []
+  return "".join(p.text or (p.function_call or p.function_response or "").__str__() for p in parts)
+
+
+class RecordingModel(BaseLlm):
+  """Answers every turn with a short reply and keeps the requests it saw."""
+
+  model: str = "recording-stub"
+  requests: list = []
+
+  async def generate_content_async(self, llm_request, stream=False):
+    self.requests.append(llm_request)
+    yield LlmResponse(content=genai_types.Content(role="model", parts=[genai_types.Part(
+        text='Here you go.\n---a2ui_JSON---\n{"render": "provider_list"}'
+    )]))
+
+
+async def _run(test_agent, model) -> list:
+  runner = runners.Runner(
+      app_name="bench", agent=test_agent,
+      session_service=in_memory_session_service.InMemorySessionService(),
+  )
+  await runner.session_service.create_session(app_name="bench", user_id="u", session_id="s", state={})
+  for text, state in SCRIPT:
+    delta = dict(state, flow_step=flow_steps.current_step(state))
+    async for _ in runner.run_async(
+        user_id="u", session_id="s", state_delta=delta,
+        new_message=genai_types.Content(role="user", parts=[genai_types.Part(text=text)]),
+    ):
+      pass
+  return model.requests
+
+
+def _measure(requests, count):
+  """(system tokens, per-turn content tokens) for each captured request."""
+  rows = []
+  for request in requests:
+    system = _text_of(request.config.system_instruction)
+    contents = "".join(_text_of(c) for c in request.contents)
+    rows.append((count(system), count(contents)))
+  return rows
+
+
+async def _main():
+  count, source = _token_counter()
+  legacy_model, step_model = RecordingModel(requests=[]), RecordingModel(requests=[])
+  legacy = Agent(name="legacy", model=legacy_model, instruction=LEGACY_INSTRUCTION, tools=agent.root_agent.tools)
+  stepped = agent.root_agent.clone(update={"model": step_model})
+  legacy_rows = _measure(await _run(legacy, legacy_model), count)
+  step_rows = _measure(await _run(stepped, step_model), count)
+
+  print(f"Token counts: {source}")
+  print(f"{'turn':<5} {'step':<13} {'before':>7} {'after':>7} {'cached prefix':>14} {'uncached':>9}")
+  before_total = after_total = uncached_total = 0
+  for turn, ((text, state), (l_sys, l_con), (s_sys, s_con)) in enumerate(zip(SCRIPT, legacy_rows, step_rows), 1):
+    before, after = l_sys + l_con, s_sys + s_con
+    before_total += before
+    after_total += after
+    uncached_total += s_con
+    print(f"{turn:<5} {flow_steps.current_step(state):<13} {before:>7.0f} {after:>7.0f} {s_sys:>14.0f} {s_con:>9.0f}")
+  print(f"Total prompt tokens: {before_total:.0f} -> {after_total:.0f} "
+        f"({1 - after_total / before_total:.1%} fewer); "
+        f"{uncached_total:.0f} outside the static prefix.")
+
+
+def main():
+  asyncio.run(_main())
+
+
+if __name__ == "__main__":
+  main()
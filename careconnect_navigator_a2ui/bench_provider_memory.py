@@ -0,0 +1,49 @@
+"""Report: bytes per provider for the list-of-dicts directory vs. ProviderDirectory.
+
+Run from this directory:
+    python bench_provider_memory.py [--sizes 1000 100000 1000000]
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+from provider_directory import ProviderDirectory
+from tools import _generate_providers
+
+
+def _retained_bytes(build):
+    """Bytes still allocated (per tracemalloc) after `build()` returns its result."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'providers':>10} {'dicts(B/row)':>13} {'columnar(B/row)':>16} {'ratio':>7}")
+    for size in args.sizes:
+        records, dict_bytes = _retained_bytes(lambda: _generate_providers(size))
+        del records
+        directory, columnar_bytes = _retained_bytes(
+            lambda: ProviderDirectory.from_records(_generate_providers(size))
+        )
+        del directory
+        print(
+            f"{size:>10} {dict_bytes / size:>13.0f} {columnar_bytes / size:>16.0f}"
+            f" {dict_bytes / columnar_bytes:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark: the response cache under the offline load test, on and off.
+
+Runs the bench_load booking flow twice with the same scripted model: once
+with the executor's response cache and once with it disabled. For each run it
+compares:
+- model calls;
+- p50/p95 latency of the plan and criteria turns (the cached surfaces);
+- overall turns/s;
+- the cache's hit rate and entry count.
+
+It then checks, on a standalone cache with a fake clock, LRU and TTL eviction
+and which turns may be cached at all.
+
+Run from this directory:
+    python bench_response_cache.py [--conversations 50] [--model-latency 0.2]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import time
+
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "bench")
+os.environ.setdefault("GOOGLE_CLOUD_LOCATION", "us-central1")
+
+import response_cache
+from bench_load import LoadTest
+
+
+def _p50_p95(values) -> str:
+  if len(values) < 2:
+    return "n/a"
+  q = statistics.quantiles(values, n=20, method="inclusive")
+  return f"{statistics.median(values) * 1e3:.0f}/{q[18] * 1e3:.0f}"
+
+
+def _run(args, cache: bool) -> dict:
+  args.no_response_cache = not cache
+  test = LoadTest(args)
+  start = time.perf_counter()
+  asyncio.run(test.run())
+  elapsed = time.perf_counter() - start
+  turns = sum(len(v) for v in test.latencies.values())
+  return {
+      "model_calls": test.model.calls,
+      "plan_p50/p95_ms": _p50_p95(test.latencies["plan"]),
+      "criteria_p50/p95_ms": _p50_p95(test.latencies["criteria"]),
+      "turns/s": round(turns / elapsed, 1),
+      "completed": test.outcomes["completed"],
+      "cache": test.executor._response_cache.stats(),  # pylint: disable=protected-access
+  }
+
+
+def _eviction_check() -> dict:
+  now = [0.0]
+  cache = response_cache.ResponseCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+  keys = [cache.make_key(f"hello {i}", "plan", {}, first_turn=True, click=False) for i in range(3)]
+  for key in keys:
+    cache.put(key, "text", [{"beginRendering": {}}])
+  lru_evicted = cache.get(keys[0]) is None
+  now[0] = 11.0
+  ttl_expired = cache.get(keys[2]) is None
+  uncacheable = cache.make_key("hello", "providers", {}, first_turn=True, click=False) is None
+  same_key = cache.make_key("  Hello!! ", "plan", {}, first_turn=True, click=False) == cache.make_key(
+      "hello", "plan", {}, first_turn=True, click=False)
+  click_state = {"plan_type": "PPO"}
+  after_text = cache.make_key("ok", "criteria", {}, first_turn=False, click=False) is None
+  click_after_text = cache.make_key(
+      "I have PPO plan", "criteria", dict(click_state, _free_text=True), first_turn=False, click=True) is None
+  click_only = cache.make_key("I have PPO plan", "criteria", click_state, first_turn=False, click=True)
+  return {"lru_evicted": lru_evicted, "ttl_expired": ttl_expired, "providers_uncacheable": uncacheable,
+          "normalized_keys_match": same_key, "text_after_first_turn_uncacheable": after_text,
+          "click_after_typed_text_uncacheable": click_after_text,
+          "click_only_session_key": click_only, "stats": cache.stats()}
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--conversations", type=int, default=50)
+  parser.add_argument("--model-latency", type=float, default=0.2)
+  parser.add_argument("--invalid-rate", type=float, default=0.1)
+  args = parser.parse_args()
+  args.stream_chunks, args.ramp_seconds, args.think_seconds, args.no_fast_path = 4, 1.0, 0.0, False
+  logging.disable(logging.WARNING)
+
+  print(f"{args.conversations} conversations, model latency {args.model_latency * 1e3:.0f} ms")
+  for name, cache in (("cache off", False), ("cache on", True)):
+    print(f"{name:<10} {_run(args, cache)}")
+  print("eviction:", _eviction_check())
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,70 @@
+"""Benchmark: linear scan vs. ProviderDirectory index for search_providers lookups.
+
+Run from this directory:
+    python bench_search_providers.py [--sizes 1000 100000 1000000]
+"""
+
+import argparse
+import random
+import time
+
+from provider_directory import ProviderDirectory
+from tools import _generate_providers
+
+
+def _linear_scan(providers, norm_specialty, norm_zip, norm_plan):
+    """The pre-index search_providers loop, kept as the baseline."""
+    results = []
+    for p in providers:
+        if p["specialty"].lower() == norm_specialty and p["zip"] == norm_zip:
+            results.append((p["id"], norm_plan in p["networks"]))
+    return results
+
+
+def _indexed(index, norm_specialty, norm_zip, norm_plan):
+    return [
+        (index[row].id, index.in_network(row, norm_plan))
+        for row in index.lookup(norm_specialty, norm_zip)
+    ]
+
+
+def _time_per_call(fn, queries, budget_s=2.0):
+    """Average seconds per call, stopping early once the time budget is spent."""
+    calls = 0
+    start = time.perf_counter()
+    for q in queries:
+        fn(*q)
+        calls += 1
+        if time.perf_counter() - start > budget_s:
+            break
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=2_000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'providers':>10} {'build(s)':>9} {'scan(us)':>12} {'index(us)':>10} {'speedup':>9}")
+    for size in args.sizes:
+        providers = _generate_providers(size)
+        start = time.perf_counter()
+        index = ProviderDirectory.from_records(providers)
+        build_s = time.perf_counter() - start
+
+        picks = [rng.choice(providers) for _ in range(args.queries)]
+        queries = [(p["specialty"].lower(), p["zip"], rng.choice(["HMO", "PPO"])) for p in picks]
+
+        # Both paths must agree before timing means anything.
+        for q in queries[:20]:
+            assert _linear_scan(providers, *q) == _indexed(index, *q)
+
+        scan_s = _time_per_call(lambda *q: _linear_scan(providers, *q), queries)
+        index_s = _time_per_call(lambda *q: _indexed(index, *q), queries)
+        print(f"{size:>10} {build_s:>9.2f} {scan_s * 1e6:>12.1f} {index_s * 1e6:>10.2f} {scan_s / index_s:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark: output tokens and latency per step, model-written A2UI vs. server-rendered surfaces.
+
+For steps 3-5 the model used to write the full component JSON. It now writes
+a render directive, and the executor builds the same surface from the tool
+result. Each step below runs the real tools, renders the surface, and
+compares the payload the model would have had to emit with the directive.
+
+Tokens are estimated at --chars-per-token characters per token, and model
+decode time at --decode-tokens-per-s. Both are rough figures for Gemini
+Flash-class models; server time is measured.
+
+Run from this directory:
+    python bench_server_rendering.py
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import a2ui_surfaces
+import tools
+from a2ui_validation import A2uiValidator
+
+
+class _ToolContext:
+  class session:
+    id = "bench"
+
+
+def _step_results():
+  """(step, directive, tool_results) for one pass through steps 3-5."""
+  search = tools.search_providers("dermatology", "30303", "PPO", radius_miles=10, tool_context=_ToolContext)
+  first = search["results"][0]
+  day = first["next_available"][:10]
+  availability = tools.check_availability(first["id"], day, _ToolContext)
+  bulk = asyncio.run(tools.check_availability_bulk(
+      [p["id"] for p in search["results"]], day, _ToolContext
+  ))
+  booking = tools.book_appointment(first["id"], availability["slots"][0], _ToolContext)
+  return [
+      ("3 provider list", "provider_list", {"search_providers": search}),
+      ("4 slot picker", "availability", {"check_availability": availability}),
+      ("4 slot compare", "availability", {"check_availability_bulk": bulk}),
+      ("5 confirmation", "booking_confirmation", {"book_appointment": booking}),
+  ]
+
+
+def _server_ms(directive, results, validator, budget_s=0.5):
+  calls = 0
+  start = time.perf_counter()
+  while time.perf_counter() - start < budget_s or calls < 3:
+    validator.validate(a2ui_surfaces.render(directive, results))
+    calls += 1
+  return (time.perf_counter() - start) / calls * 1e3
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--chars-per-token", type=float, default=4.0)
+  parser.add_argument("--decode-tokens-per-s", type=float, default=150.0)
+  args = parser.parse_args()
+
+  validator = A2uiValidator.from_file()
+  print(f"{'step':<17} {'model tok':>9} {'directive tok':>13} {'saved':>6} "
+        f"{'model ms':>9} {'rendered ms':>11} {'speedup':>8}")
+  total_model = total_directive = 0
+  for step, name, results in _step_results():
+    directive = {"render": name}
+    messages = a2ui_surfaces.render(directive, results)
+    # The model wrote payloads indented like a2ui_examples; compact JSON undercounts slightly.
+    model_tokens = len(json.dumps({"a2ui_messages": messages})) / args.chars_per_token
+    directive_tokens = len(json.dumps(directive)) / args.chars_per_token
+    model_ms = model_tokens / args.decode_tokens_per_s * 1e3
+    rendered_ms = directive_tokens / args.decode_tokens_per_s * 1e3 + _server_ms(directive, results, validator)
+    total_model += model_tokens
+    total_directive += directive_tokens
+    print(f"{step:<17} {model_tokens:>9.0f} {directive_tokens:>13.0f} "
+          f"{1 - directive_tokens / model_tokens:>6.1%} {model_ms:>9.0f} {rendered_ms:>11.1f} "
+          f"{model_ms / rendered_ms:>7.0f}x")
+  print(f"Steps 3-5 output tokens: {total_model:.0f} -> {total_directive:.0f} "
+        f"({1 - total_directive / total_model:.1%} fewer)")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,104 @@
+"""Benchmark: per-turn session overhead, in-memory vs. SQLite backends.
+
+A turn is what the executor does to the session service: one get_session
+and four append_event calls (user message, tool call, tool response, model
+reply), using the events of soak_session_store's booking flow. Each
+conversation runs two turns. After the run the SQLite services are closed
+and reopened to check that every session, event and artifact came back.
+
+Run from this directory:
+    python bench_session_backends.py [--conversations 2000]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from google.adk.sessions import in_memory_session_service
+from google.genai import types as genai_types
+
+import soak_session_store
+import session_store
+import sqlite_store
+
+APP, USER = soak_session_store.APP, soak_session_store.USER
+
+
+async def _run(sessions, artifacts, conversations: int) -> list:
+  """Per-turn wall time in microseconds."""
+  artifact = genai_types.Part(text=json.dumps(soak_session_store._search_result(0)))  # pylint: disable=protected-access
+  timings = []
+  for index in range(conversations):
+    session_id = f"ctx-{index}"
+    await sessions.create_session(app_name=APP, user_id=USER, session_id=session_id)
+    events = soak_session_store._conversation_events(index)  # pylint: disable=protected-access
+    for turn in (events[:4], events[4:]):
+      start = time.perf_counter()
+      session = await sessions.get_session(app_name=APP, user_id=USER, session_id=session_id)
+      for event in turn:
+        await sessions.append_event(session, event)
+      timings.append((time.perf_counter() - start) * 1e6)
+    await artifacts.save_artifact(
+        app_name=APP, user_id=USER, session_id=session_id, filename="response", artifact=artifact
+    )
+  return timings
+
+
+async def _verify_reopen(path: str, conversations: int) -> str:
+  sessions = sqlite_store.SqliteSessionService(path)
+  artifacts = sqlite_store.SqliteArtifactService(path)
+  listed = await sessions.list_sessions(app_name=APP, user_id=USER)
+  missing = 0
+  for index in range(conversations):
+    session = await sessions.get_session(app_name=APP, user_id=USER, session_id=f"ctx-{index}")
+    part = await artifacts.load_artifact(app_name=APP, user_id=USER, session_id=f"ctx-{index}", filename="response")
+    if session is None or len(session.events) != 8 or part is None:
+      missing += 1
+  sessions.close()
+  return f"{len(listed.sessions)} sessions listed, {missing} incomplete after reopen"
+
+
+async def _main(args):
+  results = []
+  plain = in_memory_session_service.InMemorySessionService()
+  results.append(("in-memory", await _run(plain, session_store.SessionArtifactService(), args.conversations), ""))
+  bounded, bounded_artifacts = session_store.make_services("memory")
+  results.append(("bounded", await _run(bounded, bounded_artifacts, args.conversations), ""))
+
+  with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, "sessions.db")
+    sessions = sqlite_store.SqliteSessionService(path)
+    artifacts = sqlite_store.SqliteArtifactService(path)
+    timings = await _run(sessions, artifacts, args.conversations)
+    start = time.perf_counter()
+    sessions.close()
+    close_ms = (time.perf_counter() - start) * 1e3
+    stats = sessions.stats()
+    note = (f"{stats['writes']} writes in {stats['batches']} batches, "
+            f"{stats['write_errors']} errors, final flush {close_ms:.1f} ms")
+    results.append(("sqlite", timings, note))
+    reopen = await _verify_reopen(path, args.conversations)
+
+  print(f"{args.conversations} conversations, {2 * args.conversations} turns (get_session + 4 appends)")
+  print(f"{'backend':<10} {'mean(us)':>9} {'p50(us)':>8} {'p99(us)':>8}")
+  for name, timings, _ in results:
+    p99 = statistics.quantiles(timings, n=100)[98]
+    print(f"{name:<10} {statistics.fmean(timings):>9.0f} {statistics.median(timings):>8.0f} {p99:>8.0f}")
+  for name, _, note in results:
+    if note:
+      print(f"{name}: {note}")
+  print(f"sqlite: {reopen}")
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--conversations", type=int, default=2000)
+  asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+  main()
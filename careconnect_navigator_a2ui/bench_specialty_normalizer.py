@@ -0,0 +1,47 @@
+"""Benchmark: per-call cost of SpecialtyNormalizer.resolve, cold and cached.
+
+Run from this directory:
+    python bench_specialty_normalizer.py
+"""
+
+import time
+
+from specialty_normalizer import SpecialtyNormalizer
+from tools import MOCK_PROVIDERS
+
+INPUTS = [
+    "Dermatology", "skin doctor", "Heart Specialist", "cardiolgy", "pediatrican",
+    "Primary-Care", "dermatolgist", "bone doc", "OB/GYN", "I need a heart doctor for my dad",
+    "physio", "family med", "oncologist", "neurology", "xyz",
+    # Different specialties that only look alike must not match.
+    "radiology", "rheumatology", "hematology", "eye doctor",
+    "family medicine for my kids", "primary care for kids",
+]
+
+
+def _per_call_us(fn, inputs, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in inputs:
+            fn(text)
+    return (time.perf_counter() - start) / (rounds * len(inputs)) * 1e6
+
+
+def main():
+    normalizer = SpecialtyNormalizer(MOCK_PROVIDERS.specialties)
+    width = max(len(text) for text in INPUTS)
+    for text in INPUTS:
+        normalizer.cache_clear()
+        cold = _per_call_us(lambda t: (normalizer.cache_clear(), normalizer.resolve(t)), [text], 200)
+        print(f"{text:<{width}}  -> {str(normalizer.resolve(text)):<16} cold {cold:7.1f} us")
+
+    normalizer.cache_clear()
+    normalizer.resolve("warm-up")
+    cold = _per_call_us(lambda t: (normalizer.cache_clear(), normalizer.resolve(t)), INPUTS, 200)
+    warm = _per_call_us(normalizer.resolve, INPUTS, 20_000)
+    print(f"\nmean cold (uncached): {cold:.1f} us/call")
+    print(f"mean warm (LRU hit):  {warm:.2f} us/call  {normalizer.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Report: prompt bytes spent on session state per turn, full-state vs. changes-only injection.
+
+Drives the real executor through a scripted 30-turn session: several
+searches, provider picks, date and slot choices, and free-text turns that
+change nothing. The model is a recording stub. For each turn it reports the
+state annotations in the request the model received. "this turn" is the
+annotation on the new message. "in prompt" counts every annotation in the
+request, including the ones kept in history.
+
+The full-state run swaps in the old behaviour, which appended every state
+key to every query. The action fast path is disabled so every turn reaches
+the model.
+
+Run from this directory:
+    python bench_state_injection.py
+"""
+
+import asyncio
+import os
+import re
+
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "bench")
+os.environ.setdefault("GOOGLE_CLOUD_LOCATION", "us-central1")
+
+from a2a import types, utils
+from a2a.server.agent_execution import RequestContext
+from a2a.server.events import EventQueue
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types as genai_types
+
+import a2ui_examples
+import agent
+import agent_executor
+import response_cache
+import state_context
+
+_STATE_ANNOTATION = re.compile(r" \[State(?: changes)?: [^\]]*\]")
+_REPLY = "Here you go.\n---a2ui_JSON---\n" + a2ui_examples.PLAN_CLARIFICATION_EXAMPLE
+
+
+def _script() -> list:
+  """30 turns of (text, action context or None)."""
+  turns = [("Hi, I need a doctor.", None), ("PPO", {"plan_type": "PPO"})]
+  searches = [("Dermatology", "30303"), ("Cardiology", "30305"), ("Pediatrics", "30022"),
+              ("Dermatology", "30062")]
+  for index, (specialty, zip_code) in enumerate(searches):
+    provider = f"{specialty.lower()}_{zip_code}_{index % 3 + 1}"
+    turns += [
+        ("Search", {"specialty": specialty, "zip_code": zip_code}),
+        ("Are any of them in-network?", None),
+        ("Pick provider", {"provider_id": provider}),
+        ("Choose date", {"provider_id": provider, "date": f"2026-10-{20 + index}"}),
+        ("What about mornings?", None),
+        ("Book", {"provider_id": provider, "slot": f"2026-10-{20 + index} 09:00"}),
+        ("Thanks!", None),
+    ]
+  return turns[:30]
+
+
+def _full_state(state) -> tuple:
+  """The previous injection: every key, every turn."""
+  state_vars = [f"{k}={v}" for k, v in state.items() if k != state_context.SENT_KEY]
+  return (f" [State: {', '.join(state_vars)}]" if state_vars else ""), {}
+
+
+class _NoFastPath:
+  async def route(self, *args, **kwargs):
+    return None
+
+
+class RecordingModel(BaseLlm):
+  model: str = "recording-stub"
+  requests: list = []
+
+  async def generate_content_async(self, llm_request, stream=False):
+    self.requests.append(llm_request)
+    yield LlmResponse(content=genai_types.Content(role="model", parts=[genai_types.Part(text=_REPLY)]))
+
+
+def _message(text: str, action_context):
+  message = utils.new_agent_text_message(text, context_id="bench-session")
+  message.role = types.Role.user
+  if action_context:
+    message.parts.append(types.Part(root=types.DataPart(
+        data={"userAction": {"context": dict(action_context, message=text)}},
+        metadata={"mimeType": "application/json+a2ui"},
+    )))
+  return message
+
+
+def _user_texts(request) -> list:
+  return [p.text for c in request.contents if c.role == "user" for p in (c.parts or []) if p.text]
+
+
+async def _run(inject) -> list:
+  """Per turn: (bytes on the new message, bytes in the whole request)."""
+  model = RecordingModel(requests=[])
+  agent.root_agent.model = model
+  original, state_context.state_changes = state_context.state_changes, inject
+  try:
+    executor = agent_executor.AdkAgentToA2AExecutor()
+    executor._action_router = _NoFastPath()  # pylint: disable=protected-access
+    executor._response_cache = response_cache.ResponseCache(max_entries=0)  # pylint: disable=protected-access
+    rows = []
+    for text, action_context in _script():
+      message = _message(text, action_context)
+      queue = EventQueue()
+      first = len(model.requests)
+      context = RequestContext(request=types.MessageSendParams(message=message))
+      await executor.execute(context, queue)
+      request = model.requests[first]
+      texts = _user_texts(request)
+      # The dynamic step instruction is the last user content; the query precedes it.
+      query = next(t for t in reversed(texts) if t.startswith(text))
+      now = sum(len(m.encode("utf-8")) for m in _STATE_ANNOTATION.findall(query))
+      total = sum(len(m.encode("utf-8")) for t in texts for m in _STATE_ANNOTATION.findall(t))
+      rows.append((now, total))
+  finally:
+    state_context.state_changes = original
+  return rows
+
+
+async def _main():
+  before = await _run(_full_state)
+  after = await _run(state_context.state_changes)
+  print(f"{'turn':<5} {'full: this turn':>15} {'in prompt':>10} {'changes: this turn':>19} {'in prompt':>10}")
+  for turn, ((b_now, b_total), (a_now, a_total)) in enumerate(zip(before, after), 1):
+    print(f"{turn:<5} {b_now:>15} {b_total:>10} {a_now:>19} {a_total:>10}")
+  print(f"Max bytes on one message: {max(r[0] for r in before)} -> {max(r[0] for r in after)}")
+  print(f"State bytes in the turn-30 prompt: {before[-1][1]} -> {after[-1][1]}")
+  print(f"State bytes sent over 30 turns: {sum(r[1] for r in before)} -> {sum(r[1] for r in after)}")
+
+
+def main():
+  asyncio.run(_main())
+
+
+if __name__ == "__main__":
+  main()
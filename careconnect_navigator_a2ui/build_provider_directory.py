@@ -0,0 +1,70 @@
+"""Convert a provider export into the memory-mapped directory file tools.py loads.
+
+Input records need id, name, specialty, zip and networks fields. JSON input
+is an array of objects (or one object per line for .jsonl); CSV input has
+those columns, with networks separated by "|" or ";".
+
+Run from this directory:
+    python build_provider_directory.py export.csv -o providers.ccdir
+    python build_provider_directory.py --mock [--size 1000000] -o providers.ccdir
+"""
+
+import argparse
+import csv
+import json
+import re
+import time
+
+from provider_directory import ProviderDirectory
+
+_NETWORK_SEPARATORS = re.compile(r"[|;]")
+
+
+def _read_json(path):
+    with open(path) as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+
+def _read_csv(path):
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            row["networks"] = [n for n in _NETWORK_SEPARATORS.split(row["networks"]) if n.strip()]
+            yield row
+
+
+def read_records(path: str):
+    """Stream provider records from a JSON, JSON-lines or CSV export."""
+    if path.endswith(".csv"):
+        return _read_csv(path)
+    return _read_json(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", nargs="?", help="JSON, .jsonl or CSV provider export")
+    parser.add_argument("-o", "--output", default="providers.ccdir")
+    parser.add_argument("--mock", action="store_true", help="build from the synthetic mock generator instead")
+    parser.add_argument("--size", type=int, default=None, help="provider count for --mock")
+    args = parser.parse_args()
+
+    if args.mock:
+        from tools import _generate_providers
+        records = _generate_providers(args.size)
+    elif args.source:
+        records = read_records(args.source)
+    else:
+        parser.error("give a source export or --mock")
+
+    start = time.perf_counter()
+    directory = ProviderDirectory.from_records(records)
+    directory.save(args.output)
+    print(f"Wrote {len(directory)} providers to {args.output} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""Concurrency control for the A2A executor.
+
+ContextLocks keeps each conversation's turns in order. AdmissionController
+bounds how many turns run at once across all conversations and queues the
+rest, up to a limit and a maximum wait. ModelPacer spaces model calls with a
+token bucket and retries rate-limited (429) calls with jittered exponential
+backoff.
+"""
+
+import asyncio
+import collections
+import contextlib
+import logging
+import os
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENT_TURNS = int(os.environ.get("CARECONNECT_MAX_CONCURRENT_TURNS", "32"))
+MAX_QUEUED_TURNS = int(os.environ.get("CARECONNECT_MAX_QUEUED_TURNS", "128"))
+MAX_QUEUE_WAIT_SECONDS = float(os.environ.get("CARECONNECT_MAX_QUEUE_WAIT_SECONDS", "10"))
+MODEL_CALLS_PER_SECOND = float(os.environ.get("CARECONNECT_MODEL_RPS", "10"))
+MODEL_CALL_BURST = int(os.environ.get("CARECONNECT_MODEL_BURST", "20"))
+RATE_LIMIT_RETRIES = 4
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8.0
+
+
+class ContextLocks:
+  """One asyncio.Lock per conversation (A2A context id).
+
+  Turns of one conversation run one at a time, in arrival order (asyncio
+  locks wake waiters first in, first out), while different conversations run
+  in parallel. A lock is dropped once nobody holds or waits for it, so the
+  map only holds active conversations.
+  """
+
+  def __init__(self):
+    # context id -> [lock, holders and waiters]
+    self._locks = {}
+
+  @contextlib.asynccontextmanager
+  async def hold(self, context_id: str):
+    entry = self._locks.get(context_id)
+    if entry is None:
+      entry = self._locks[context_id] = [asyncio.Lock(), 0]
+    entry[1] += 1
+    try:
+      async with entry[0]:
+        yield
+    finally:
+      entry[1] -= 1
+      if not entry[1]:
+        del self._locks[context_id]
+
+  def __len__(self) -> int:
+    return len(self._locks)
+
+
+class Busy(Exception):
+  """Raised when a turn is not admitted; `reason` is queue_full or queue_timeout."""
+
+  def __init__(self, reason: str, retry_after: float):
+    super().__init__(f"Service busy ({reason})")
+    self.reason = reason
+    self.retry_after = retry_after
+
+
+class AdmissionController:
+  """Bounded concurrency with a FIFO wait queue.
+
+  A released slot is handed straight to the oldest waiter, so new arrivals
+  cannot jump the queue. Arrivals that find the queue full are rejected at
+  once; waiters still queued after `max_wait` seconds are rejected then.
+  """
+
+  def __init__(
+      self,
+      max_concurrent: int = MAX_CONCURRENT_TURNS,
+      max_queue: int = MAX_QUEUED_TURNS,
+      max_wait: float = MAX_QUEUE_WAIT_SECONDS,
+  ):
+    self._max_concurrent = max_concurrent
+    self._max_queue = max_queue
+    self._max_wait = max_wait
+    self._active = 0
+    self._waiters = collections.deque()
+    self.counts = collections.Counter()
+    self.peak_queue = 0
+
+  @contextlib.asynccontextmanager
+  async def admit(self):
+    await self.acquire()
+    try:
+      yield
+    finally:
+      self.release()
+
+  async def acquire(self):
+    if self._active < self._max_concurrent and not self._waiters:
+      self._active += 1
+      self.counts["admitted"] += 1
+      return
+    if len(self._waiters) >= self._max_queue:
+      self.counts["rejected_queue_full"] += 1
+      raise Busy("queue_full", retry_after=self._max_wait)
+
+    waiter = asyncio.get_running_loop().create_future()
+    self._waiters.append(waiter)
+    self.peak_queue = max(self.peak_queue, len(self._waiters))
+    try:
+      await asyncio.wait_for(asyncio.shield(waiter), self._max_wait)
+    except BaseException as e:  # Timed out or cancelled while queued.
+      if waiter.done() and not waiter.cancelled():
+        # A slot was handed over at the last moment; pass it on.
+        self.release()
+      else:
+        waiter.cancel()
+        self._waiters.remove(waiter)
+      if isinstance(e, asyncio.TimeoutError):
+        self.counts["rejected_queue_timeout"] += 1
+        raise Busy("queue_timeout", retry_after=self._max_wait) from None
+      raise
+    self.counts["admitted"] += 1
+    self.counts["queued"] += 1
+
+  def release(self):
+    while self._waiters:
+      waiter = self._waiters.popleft()
+      if not waiter.done():
+        waiter.set_result(None)
+        return
+    self._active -= 1
+
+  def stats(self) -> dict:
+    return dict(self.counts, active=self._active, waiting=len(self._waiters), peak_queue=self.peak_queue)
+
+
+class TokenBucket:
+  """Allows `rate` acquisitions per second on average, bursts up to `burst`."""
+
+  def __init__(self, rate: float, burst: int, clock=time.monotonic):
+    self._rate = rate
+    self._burst = burst
+    self._clock = clock
+    self._tokens = float(burst)
+    self._updated = clock()
+    self._lock = None
+
+  def _refill(self):
+    now = self._clock()
+    self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+    self._updated = now
+
+  async def acquire(self):
+    if self._lock is None:
+      self._lock = asyncio.Lock()
+    # Waiters take tokens in arrival order.
+    async with self._lock:
+      while True:
+        self._refill()
+        if self._tokens >= 1:
+          self._tokens -= 1
+          return
+        await asyncio.sleep((1 - self._tokens) / self._rate)
+
+  def drain(self):
+    """Empties the bucket, e.g. after a 429, so waiting callers slow down too."""
+    self._refill()
+    self._tokens = min(self._tokens, 0.0)
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE_SECONDS, cap: float = BACKOFF_MAX_SECONDS) -> float:
+  """Exponential backoff with full jitter."""
+  return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def is_rate_limited(error: Exception) -> bool:
+  return getattr(error, "code", None) == 429 or "RESOURCE_EXHAUSTED" in str(error)
+
+
+class ModelPacer:
+  """Paces model calls through a token bucket and retries 429s with backoff."""
+
+  def __init__(
+      self,
+      rate: float = MODEL_CALLS_PER_SECOND,
+      burst: int = MODEL_CALL_BURST,
+      max_retries: int = RATE_LIMIT_RETRIES,
+      backoff=backoff_delay,
+  ):
+    self.bucket = TokenBucket(rate, burst)
+    self._max_retries = max_retries
+    self._backoff = backoff
+    self.counts = collections.Counter()
+
+  async def run(self, generate, llm_request, stream: bool = False):
+    """Yields from generate(llm_request, stream), retrying it while rate limited.
+
+    A call is only retried if it failed before yielding anything.
+    """
+    for attempt in range(self._max_retries + 1):
+      await self.bucket.acquire()
+      self.counts["calls"] += 1
+      started = False
+      try:
+        async for response in generate(llm_request, stream):
+          started = True
+          yield response
+        return
+      except Exception as e:  # pylint: disable=broad-except
+        if started or not is_rate_limited(e):
+          raise
+        self.counts["rate_limited"] += 1
+        if attempt == self._max_retries:
+          self.counts["gave_up"] += 1
+          raise
+        self.bucket.drain()
+        delay = self._backoff(attempt)
+        logger.warning("Model call rate limited; retrying in %.2fs (attempt %d)", delay, attempt + 1)
+        await asyncio.sleep(delay)
+
+  def stats(self) -> dict:
+    return dict(self.counts)
+
+
+MODEL_PACER = ModelPacer()
@@ -65,7 +65,29 @@ def main():
         },
         "extra_packages": [
             "agent_executor.py",
+            "a2ui_validation.py",
+            "a2ui_repair.py",
+            "a2ui_builder.py",
+            "a2ui_surfaces.py",
+            "action_router.py",
+            "response_stream.py",
+            "instrumentation.py",
+            "concurrency.py",
+            "session_store.py",
+            "sqlite_store.py",
             "tools.py",
+            "provider_directory.py",
+            "availability.py",
+            "reservations.py",
+            "geo.py",
+            "ranking.py",
+            "prefetch.py",
+            "specialty_normalizer.py",
+            "zip_centroids.csv",
+            "flow_steps.py",
+            "state_context.py",
+            "history_compaction.py",
+            "response_cache.py",
             "agent.py",
             "a2ui_examples.py",
             "a2ui_schema.json"
@@ -73,6 +95,11 @@ def main():
         "staging_bucket": storage
     }
 
+    # Ship the prebuilt provider directory (build_provider_directory.py) when
+    # present, so instances memory-map it instead of generating at import.
+    if os.path.exists("providers.ccdir"):
+        config["extra_packages"].append("providers.ccdir")
+
     existing_engine_id = os.environ.get("EXISTING_ENGINE_ID")
     
     if existing_engine_id:
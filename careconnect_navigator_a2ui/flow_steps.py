@@ -0,0 +1,63 @@
+"""Conversation flow steps and the A2UI examples each step needs in the prompt."""
+
+import a2ui_examples
+
+# plan -> criteria -> providers -> slots -> confirmation
+FLOW_STEPS = ("plan", "criteria", "providers", "slots", "confirmation")
+
+# Examples shown at each step. A reply can finish the current step (the user
+# types their plan instead of clicking), so a step also carries the template
+# for whatever the model must show next. Provider, slot and confirmation
+# surfaces are rendered server-side and need no example.
+STEP_EXAMPLES = {
+    "plan": (
+        ("Plan Clarification Example", a2ui_examples.PLAN_CLARIFICATION_EXAMPLE),
+        ("Provider Search Form Example", a2ui_examples.PROVIDER_SEARCH_FORM_EXAMPLE),
+    ),
+    "criteria": (
+        ("Provider Search Form Example", a2ui_examples.PROVIDER_SEARCH_FORM_EXAMPLE),
+    ),
+    "providers": (
+        ("Date Selection Example", a2ui_examples.DATE_SELECTION_EXAMPLE),
+    ),
+    "slots": (
+        ("Date Selection Example", a2ui_examples.DATE_SELECTION_EXAMPLE),
+    ),
+    # After a booking the next thing is usually a new search.
+    "confirmation": (
+        ("Provider Search Form Example", a2ui_examples.PROVIDER_SEARCH_FORM_EXAMPLE),
+    ),
+}
+
+
+def current_step(state) -> str:
+    """
+    The flow step implied by what the session already knows.
+
+    Button clicks and tool calls both set these keys (see
+    tools._set_flow_state), so typed replies advance the step too. A booking
+    clears provider_id and slot and records confirmation_id until the next
+    search or provider pick.
+    """
+    if not state.get("plan_type"):
+        return "plan"
+    if not (state.get("specialty") and state.get("zip_code")):
+        return "criteria"
+    if not state.get("provider_id"):
+        return "confirmation" if state.get("confirmation_id") else "providers"
+    if not state.get("slot"):
+        return "slots"
+    return "confirmation"
+
+
+def step_instruction(step: str) -> str:
+    """The per-turn part of the prompt: the step and its A2UI examples."""
+    if step not in STEP_EXAMPLES:
+        step = FLOW_STEPS[0]
+    lines = [f"**Current Step**: {step} (flow: {' -> '.join(FLOW_STEPS)})."]
+    examples = STEP_EXAMPLES[step]
+    if examples:
+        lines.append("Use the following examples as templates for your A2UI output:")
+        for title, example in examples:
+            lines.append(f"\n{title}:\n{example.strip()}")
+    return "\n".join(lines)
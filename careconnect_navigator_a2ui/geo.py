@@ -0,0 +1,135 @@
+"""Grid spatial index over zip code centroids for radius and nearest searches."""
+
+import csv
+import math
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+
+# Nearest-neighbour searches widen their radius from here, doubling each
+# round, until they have enough zips or reach MAX_SEARCH_MILES.
+INITIAL_SEARCH_MILES = 5.0
+MAX_SEARCH_MILES = 3000.0
+
+
+def haversine_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points, in miles."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+class ZipGrid:
+    """
+    Uniform latitude/longitude grid over zip centroids.
+
+    A radius query only visits the grid cells overlapping the search circle's
+    bounding box, so its cost depends on local zip density rather than on the
+    size of the national table.
+    """
+
+    def __init__(self, centroids: dict, cell_degrees: float = 0.25):
+        self._centroids = dict(centroids)
+        self._cell_degrees = cell_degrees
+        self._cells = {}
+        for zip_code, (lat, lon) in self._centroids.items():
+            self._cells.setdefault(self._cell(lat, lon), []).append(zip_code)
+        # Occupied cell index range; queries never scan outside it.
+        rows = [i for i, _ in self._cells] or [0]
+        cols = [j for _, j in self._cells] or [0]
+        self._bounds = (min(rows), max(rows), min(cols), max(cols))
+
+    @classmethod
+    def from_csv(cls, path: str, **kwargs) -> "ZipGrid":
+        """Load a `zip,lat,lon` centroid table."""
+        with open(path, newline="") as f:
+            centroids = {row["zip"].strip(): (float(row["lat"]), float(row["lon"])) for row in csv.DictReader(f)}
+        return cls(centroids, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self._centroids)
+
+    def __contains__(self, zip_code: str) -> bool:
+        return zip_code in self._centroids
+
+    def _cell(self, lat: float, lon: float):
+        return (math.floor(lat / self._cell_degrees), math.floor(lon / self._cell_degrees))
+
+    def location(self, zip_code: str):
+        """(lat, lon) centroid of a zip, or None if it is not in the table."""
+        return self._centroids.get(zip_code)
+
+    def within(self, zip_code: str, radius_miles: float) -> list:
+        """
+        Zips whose centroid lies within `radius_miles` of `zip_code`'s centroid.
+
+        The radius is clamped to MAX_SEARCH_MILES, and the cells scanned to
+        the occupied part of the grid, so a huge radius costs at most one pass
+        over the occupied cells.
+
+        Returns:
+            A list of (distance_miles, zip) tuples sorted nearest first; the
+            origin zip itself comes first at distance 0.
+
+        Raises:
+            KeyError: If `zip_code` is not in the centroid table.
+        """
+        lat, lon = self._centroids[zip_code]
+        radius_miles = max(0.0, min(float(radius_miles), MAX_SEARCH_MILES))
+        d_lat = radius_miles / MILES_PER_DEGREE_LAT
+        # Longitude degrees shrink towards the poles; size the box for the
+        # widest latitude it covers.
+        widest = min(89.0, abs(lat) + d_lat)
+        d_lon = min(180.0, radius_miles / (MILES_PER_DEGREE_LAT * math.cos(math.radians(widest))))
+        lat_lo, lon_lo = self._cell(max(-90.0, lat - d_lat), lon - d_lon)
+        lat_hi, lon_hi = self._cell(min(90.0, lat + d_lat), lon + d_lon)
+        row_lo, row_hi, col_lo, col_hi = self._bounds
+        lat_lo, lat_hi = max(lat_lo, row_lo), min(lat_hi, row_hi)
+        lon_lo, lon_hi = max(lon_lo, col_lo), min(lon_hi, col_hi)
+
+        if (lat_hi - lat_lo + 1) * (lon_hi - lon_lo + 1) > len(self._cells):
+            # The box spans more cells than are occupied: walk the occupied ones.
+            cells = [zips for (i, j), zips in self._cells.items()
+                     if lat_lo <= i <= lat_hi and lon_lo <= j <= lon_hi]
+        else:
+            cells = [self._cells.get((i, j), ()) for i in range(lat_lo, lat_hi + 1)
+                     for j in range(lon_lo, lon_hi + 1)]
+
+        matches = []
+        for zips in cells:
+            for other in zips:
+                other_lat, other_lon = self._centroids[other]
+                distance = haversine_miles(lat, lon, other_lat, other_lon)
+                if distance <= radius_miles:
+                    matches.append((distance, other))
+        matches.sort()
+        return matches
+
+    def by_distance(self, zip_code: str, max_miles: float = MAX_SEARCH_MILES):
+        """
+        Lazily yield (distance_miles, zip) nearest first, out to `max_miles`.
+
+        Each round doubles the search radius and yields only the zips in the
+        new ring, so callers that stop early (k nearest) never pay for the
+        full radius.
+        """
+        inner = -1.0
+        radius = INITIAL_SEARCH_MILES
+        while inner < max_miles:
+            radius = min(radius, max_miles)
+            for distance, other in self.within(zip_code, radius):
+                if distance > inner:
+                    yield distance, other
+            inner = radius
+            radius *= 2
+
+    def nearest(self, zip_code: str, k: int) -> list:
+        """The `k` zips closest to `zip_code` (including itself), nearest first."""
+        found = []
+        for match in self.by_distance(zip_code):
+            found.append(match)
+            if len(found) == k:
+                break
+        return found
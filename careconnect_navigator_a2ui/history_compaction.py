@@ -0,0 +1,204 @@
+"""History compaction for the model request.
+
+The session keeps every event: retry prompts, state annotations, full A2UI
+payloads and every tool result. Without compaction, all of it goes back to
+the model on every call, so long sessions get slower and more expensive with
+each turn. `compact_history` is the agent's before_model_callback. It
+rewrites only the outgoing request; the session events stay as they are, as
+an audit log.
+
+The current turn is never changed. Before it:
+- an invalid response and the retry prompt that followed it are dropped;
+- only the last KEEP_RECENT_TURNS turns stay verbatim;
+- within those, only the latest A2UI payload and the latest result of each
+  tool are kept in full;
+- older turns collapse into one summary: the known state, the searches, the
+  providers checked, the bookings, and what the user asked for. Each list
+  keeps its newest entries only, so the summary stays small.
+"""
+
+import json
+import re
+
+from google.genai import types as genai_types
+
+import state_context
+from a2ui_repair import A2UI_DELIMITER
+
+KEEP_RECENT_TURNS = 2
+MAX_SUMMARY_ITEMS = 4
+
+# Prompts the executor sends after a response it could not use.
+RETRY_PREFIXES = ("Your previous response was invalid.", "I received no response.")
+
+SUMMARY_HEADER = "[Summary of earlier turns; the full details are no longer shown]"
+A2UI_OMITTED = "[A2UI surface omitted: superseded by a later one]"
+
+_STATE_ANNOTATION = re.compile(r" \[State(?: changes)?: [^\]]*\]$")
+
+
+def _is_user_text(content) -> bool:
+    parts = content.parts or []
+    return content.role == "user" and any(p.text for p in parts) and not any(
+        p.function_response for p in parts
+    )
+
+
+def _text(content) -> str:
+    return "".join(p.text for p in content.parts or [] if p.text)
+
+
+def _current_turn_start(contents, user_content):
+    """Index of the message that started this invocation, or None if it is not there."""
+    if not user_content or not user_content.parts:
+        return None
+    wanted = _text(user_content)
+    for index in range(len(contents) - 1, -1, -1):
+        if _is_user_text(contents[index]) and _text(contents[index]) == wanted:
+            # ADK inserts the per-step instruction just before the new message.
+            while index > 0 and _is_user_text(contents[index - 1]):
+                index -= 1
+            return index
+    return None
+
+
+def _split_turns(contents) -> list:
+    turns = []
+    for content in contents:
+        if _is_user_text(content) or not turns:
+            turns.append([])
+        turns[-1].append(content)
+    return turns
+
+
+def _drop_retries(turns) -> list:
+    """Folds each retry into the turn it retried, without the failed response."""
+    merged = []
+    for turn in turns:
+        if merged and _text(turn[0]).startswith(RETRY_PREFIXES):
+            previous = merged[-1]
+            while len(previous) > 1 and previous[-1].role == "model" and not any(
+                p.function_call for p in previous[-1].parts or []
+            ):
+                previous.pop()
+            previous.extend(turn[1:])
+        else:
+            merged.append(list(turn))
+    return merged
+
+
+def _function_responses(contents):
+    for content in contents:
+        for part in content.parts or []:
+            if part.function_response:
+                yield part.function_response.name, part.function_response.response or {}
+
+
+def _function_calls(contents):
+    for content in contents:
+        for part in content.parts or []:
+            if part.function_call:
+                yield part.function_call.name, part.function_call.args or {}
+
+
+def _compact_result(name: str, response: dict) -> dict:
+    """A superseded tool result cut down to what later turns may refer to."""
+    compact = {"status": response.get("status"), "superseded": True}
+    if name == "search_providers" and response.get("results") is not None:
+        compact["provider_ids"] = [r.get("id") for r in response["results"]]
+        compact["total"] = response.get("total")
+    elif response.get("provider_id"):
+        compact["provider_id"] = response["provider_id"]
+    return compact
+
+
+def _strip_superseded(contents) -> list:
+    """Copies of the contents with only the latest A2UI payload and tool results in full."""
+    contents = [c.model_copy(deep=True) for c in contents]
+    latest_payload = None
+    latest_result = {}
+    for i, content in enumerate(contents):
+        for j, part in enumerate(content.parts or []):
+            if content.role == "model" and part.text and A2UI_DELIMITER in part.text:
+                latest_payload = (i, j)
+            if part.function_response:
+                latest_result[part.function_response.name] = (i, j)
+    keep = {latest_payload} | set(latest_result.values())
+    for i, content in enumerate(contents):
+        for j, part in enumerate(content.parts or []):
+            if (i, j) in keep:
+                continue
+            if content.role == "model" and part.text and A2UI_DELIMITER in part.text:
+                part.text = f"{part.text.split(A2UI_DELIMITER, 1)[0].rstrip()}\n{A2UI_OMITTED}"
+            elif part.function_response:
+                response = part.function_response
+                response.response = _compact_result(response.name, response.response or {})
+    return contents
+
+
+def _newest(items: list) -> list:
+    unique = list(dict.fromkeys(items))
+    return unique[-MAX_SUMMARY_ITEMS:]
+
+
+def summarize(contents, state) -> str:
+    """A short structured summary of collapsed turns plus the known state."""
+    known = {
+        k: v for k, v in state_context.visible_state(state).items()
+        if k != "flow_step"
+    }
+    asked, searches, checked, booked = [], [], [], []
+    for content in contents:
+        if _is_user_text(content):
+            text = _STATE_ANNOTATION.sub("", _text(content)).strip()
+            if text and not text.startswith(RETRY_PREFIXES):
+                asked.append(json.dumps(text[:80]))
+    for name, args in _function_calls(contents):
+        if name == "search_providers":
+            criteria = [args.get(k) for k in ("specialty", "zip_code", "plan_type", "radius_miles") if args.get(k)]
+            searches.append(" ".join(str(c) for c in criteria))
+    for name, response in _function_responses(contents):
+        if response.get("status") != "success":
+            continue
+        if name == "check_availability":
+            checked.append(f"{response.get('provider_name') or ''} ({response.get('provider_id')})".strip())
+        elif name == "book_appointment":
+            booked.append(
+                f"{response.get('provider_name') or response.get('provider_id')} at {response.get('slot')}"
+                f" (confirmation {response.get('confirmation_id')})"
+            )
+
+    lines = [SUMMARY_HEADER]
+    if known:
+        lines.append("Known: " + "; ".join(f"{k}={state_context.encode_value(v)}" for k, v in sorted(known.items())))
+    for label, items in (
+        ("User asked", asked), ("Searches", searches),
+        ("Availability checked", checked), ("Booked", booked),
+    ):
+        if items:
+            lines.append(f"{label}: " + "; ".join(_newest(items)))
+    return "\n".join(lines)
+
+
+def compact_contents(contents, user_content, state) -> list:
+    """The request contents with everything before the current turn compacted."""
+    start = _current_turn_start(contents, user_content)
+    if not start:
+        return contents
+    turns = _drop_retries(_split_turns(contents[:start]))
+    collapsed = [c for turn in turns[:-KEEP_RECENT_TURNS] for c in turn]
+    recent = _strip_superseded([c for turn in turns[-KEEP_RECENT_TURNS:] for c in turn])
+    compacted = []
+    if collapsed:
+        compacted.append(genai_types.Content(
+            role="user", parts=[genai_types.Part(text=summarize(collapsed, state))]
+        ))
+    return compacted + recent + list(contents[start:])
+
+
+def compact_history(callback_context, llm_request):
+    """before_model_callback: compacts the request; returns None so the model is called."""
+    llm_request.contents = compact_contents(
+        llm_request.contents, callback_context.user_content, callback_context.state.to_dict()
+    )
+    return None
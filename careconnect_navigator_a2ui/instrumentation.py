@@ -0,0 +1,276 @@
+"""Per-stage latency, tool-call and session-size metrics for the A2A executor.
+
+Instrumentation records:
+- how long each executor stage takes, e.g. session lookup, the model/tool
+  loop, delimiter split, JSON parse, schema validation, repair and artifact
+  upload;
+- a duration histogram per tool;
+- counters for turns, retries and validation failures;
+- a histogram of session sizes;
+- gauges read from other components' stats() at render time, e.g. the
+  availability prefetch.
+
+prometheus_text() renders all of it in the Prometheus text exposition
+format. start_exporters() publishes it: set CARECONNECT_METRICS_PORT to
+serve it at GET /metrics for a scraper, or CARECONNECT_METRICS_LOG_SECONDS
+to write it to the log at that interval (the option that works on Agent
+Engine, which exposes no extra ports).
+
+When OpenTelemetry is installed, each stage is also a span named
+"careconnect.<stage>". With Agent Engine telemetry enabled, these spans nest
+under the ADK invocation spans in Cloud Trace.
+
+Set CARECONNECT_INSTRUMENTATION=0 to switch it off. stage() then returns a
+shared no-op context manager, and every other call returns at once.
+"""
+
+import bisect
+import collections
+import http.server
+import logging
+import os
+import threading
+import time
+
+try:
+  from opentelemetry import trace as otel_trace
+except ImportError:  # OpenTelemetry is optional.
+  otel_trace = None
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("CARECONNECT_INSTRUMENTATION", "1") != "0"
+METRICS_PORT = int(os.environ.get("CARECONNECT_METRICS_PORT", "0"))
+METRICS_LOG_SECONDS = float(os.environ.get("CARECONNECT_METRICS_LOG_SECONDS", "0"))
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = tuple(2**i for i in range(10, 25, 2))  # 1 KiB .. 16 MiB
+
+_METRIC_PREFIX = "careconnect_"
+
+
+class Histogram:
+  """Cumulative-bucket histogram in the Prometheus sense."""
+
+  def __init__(self, buckets):
+    self.buckets = tuple(buckets)
+    self.counts = [0] * (len(self.buckets) + 1)
+    self.count = 0
+    self.sum = 0.0
+
+  def observe(self, value: float):
+    self.counts[bisect.bisect_left(self.buckets, value)] += 1
+    self.count += 1
+    self.sum += value
+
+  def quantile(self, q: float) -> float:
+    """Upper bound of the bucket holding the q-quantile (inf past the last bucket)."""
+    if not self.count:
+      return 0.0
+    rank, seen = q * self.count, 0
+    for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+      seen += count
+      if seen >= rank:
+        return bound
+    return float("inf")
+
+
+class _NullStage:
+  """What stage() returns when instrumentation is off."""
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc_info):
+    return False
+
+  def stop(self):
+    pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+  """Times one stage and, with OpenTelemetry, wraps it in a span."""
+
+  __slots__ = ("_histogram", "_span", "_scope", "_start")
+
+  def __init__(self, histogram: Histogram, span, scope):
+    self._histogram = histogram
+    self._span = span
+    self._scope = scope
+    self._start = time.perf_counter()
+
+  def __enter__(self):
+    if self._scope is not None:
+      self._scope.__enter__()
+    return self
+
+  def __exit__(self, exc_type, exc, tb):
+    self._histogram.observe(time.perf_counter() - self._start)
+    if self._scope is not None:
+      # The span records the exception and an error status itself.
+      self._scope.__exit__(exc_type, exc, tb)
+    return False
+
+  def stop(self):
+    """Ends a stage started without `with` (the span is not made current)."""
+    self._histogram.observe(time.perf_counter() - self._start)
+    if self._span is not None:
+      self._span.end()
+
+
+class Instrumentation:
+  """Metrics registry for one executor."""
+
+  def __init__(self, enabled: bool = ENABLED, tracing: bool = True):
+    self.enabled = enabled
+    self._tracer = otel_trace.get_tracer(__name__) if (enabled and tracing and otel_trace) else None
+    self._stages = collections.defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+    self._tools = collections.defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+    self._session_bytes = Histogram(BYTES_BUCKETS)
+    # (name, sorted label items) -> value
+    self._counters = collections.Counter()
+    # Gauge name -> callable returning {stat: number}.
+    self._gauges = {}
+
+  def stage(self, name: str):
+    """Context manager timing one stage, inside a span when tracing is on."""
+    if not self.enabled:
+      return _NULL_STAGE
+    histogram = self._stages[name]
+    if self._tracer is None:
+      return _Stage(histogram, None, None)
+    span_name = f"careconnect.{name}"
+    return _Stage(histogram, None, self._tracer.start_as_current_span(span_name))
+
+  def start(self, name: str):
+    """Starts a stage that spans code a `with` block cannot wrap; call stop()."""
+    if not self.enabled:
+      return _NULL_STAGE
+    span = self._tracer.start_span(f"careconnect.{name}") if self._tracer is not None else None
+    return _Stage(self._stages[name], span, None)
+
+  def observe_tool(self, tool_name: str, seconds: float):
+    if self.enabled:
+      self._tools[tool_name].observe(seconds)
+
+  def observe_session_bytes(self, size: int):
+    if self.enabled:
+      self._session_bytes.observe(size)
+
+  def add_gauges(self, name: str, read):
+    """Reports read()'s numeric values as the gauge <name>{stat=...} on every render."""
+    self._gauges[name] = read
+
+  def count(self, name: str, **labels):
+    if self.enabled:
+      self._counters[(name, tuple(sorted(labels.items())))] += 1
+
+  def counter(self, name: str, **labels) -> int:
+    return self._counters[(name, tuple(sorted(labels.items())))]
+
+  def stage_summary(self) -> dict:
+    """Stage -> (count, mean seconds, approximate p95 seconds)."""
+    return {
+        name: (h.count, h.sum / h.count if h.count else 0.0, h.quantile(0.95))
+        for name, h in sorted(self._stages.items())
+    }
+
+  def prometheus_text(self) -> str:
+    lines = []
+    _histogram_lines(lines, "stage_seconds", "Time spent in each executor stage.", "stage", self._stages)
+    _histogram_lines(lines, "tool_call_seconds", "Tool call duration as seen by the executor.", "tool", self._tools)
+    if self._session_bytes.count:
+      _histogram_lines(lines, "session_bytes", "Serialized session size at the start of a turn.", None,
+                       {None: self._session_bytes})
+    names = sorted({name for name, _ in self._counters})
+    for name in names:
+      lines.append(f"# TYPE {_METRIC_PREFIX}{name}_total counter")
+      for (counter_name, labels), value in sorted(self._counters.items()):
+        if counter_name == name:
+          lines.append(f"{_METRIC_PREFIX}{name}_total{_labels(labels)} {value}")
+    for name, read in sorted(self._gauges.items()):
+      lines.append(f"# TYPE {_METRIC_PREFIX}{name} gauge")
+      for stat, value in sorted(read().items()):
+        if isinstance(value, (int, float)):
+          lines.append(f"{_METRIC_PREFIX}{name}{_labels([('stat', stat)])} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+def _labels(items) -> str:
+  if not items:
+    return ""
+  escaped = (
+      f'{k}="' + str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+      for k, v in items
+  )
+  return "{" + ",".join(escaped) + "}"
+
+
+def _histogram_lines(lines, name, help_text, label, histograms):
+  if not histograms:
+    return
+  metric = _METRIC_PREFIX + name
+  lines.append(f"# HELP {metric} {help_text}")
+  lines.append(f"# TYPE {metric} histogram")
+  for key, histogram in sorted(histograms.items(), key=lambda item: str(item[0])):
+    base = [(label, key)] if label else []
+    cumulative = 0
+    for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+      cumulative += count
+      le = "+Inf" if bound == float("inf") else f"{bound:g}"
+      lines.append(f"{metric}_bucket{_labels(base + [('le', le)])} {cumulative}")
+    lines.append(f"{metric}_sum{_labels(base)} {histogram.sum:g}")
+    lines.append(f"{metric}_count{_labels(base)} {histogram.count}")
+
+
+def serve_metrics(metrics: Instrumentation, port: int, host: str = "0.0.0.0") -> http.server.ThreadingHTTPServer:
+  """Serves metrics.prometheus_text() at GET /metrics from a daemon thread."""
+
+  class Handler(http.server.BaseHTTPRequestHandler):
+
+    def do_GET(self):  # pylint: disable=invalid-name
+      if self.path.split("?")[0] != "/metrics":
+        self.send_error(404)
+        return
+      body = metrics.prometheus_text().encode("utf-8")
+      self.send_response(200)
+      self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+      self.send_header("Content-Length", str(len(body)))
+      self.end_headers()
+      self.wfile.write(body)
+
+    def log_message(self, *args):
+      pass
+
+  server = http.server.ThreadingHTTPServer((host, port), Handler)
+  threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+  return server
+
+
+def log_metrics(metrics: Instrumentation, interval: float) -> threading.Event:
+  """Logs metrics.prometheus_text() every `interval` seconds; set the returned event to stop."""
+  stop = threading.Event()
+
+  def run():
+    while not stop.wait(interval):
+      logger.info("Metrics:\n%s", metrics.prometheus_text())
+
+  threading.Thread(target=run, name="metrics-log", daemon=True).start()
+  return stop
+
+
+def start_exporters(metrics: Instrumentation, port: int = METRICS_PORT, log_seconds: float = METRICS_LOG_SECONDS):
+  """Starts whichever exporters are configured; both are off by default."""
+  if not metrics.enabled:
+    return
+  if port:
+    try:
+      serve_metrics(metrics, port)
+    except OSError as e:
+      # Another executor in this process already serves the port.
+      logger.warning("Metrics endpoint not started on port %d: %s", port, e)
+  if log_seconds > 0:
+    log_metrics(metrics, log_seconds)
@@ -0,0 +1,104 @@
+"""Speculative availability prefetch for providers shown in search results."""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# Prefetched slots are only trusted briefly; callers re-validate them anyway.
+PREFETCH_TTL_SECONDS = 30
+MAX_PREFETCH_ENTRIES = 10_000
+PREFETCH_WORKERS = 4
+# Longest `get` waits on a lookup still running before the caller does its own.
+PREFETCH_WAIT_SECONDS = 0.05
+
+
+class AvailabilityPrefetcher:
+    """
+    Per-session, short-TTL cache of availability fetched in the background.
+
+    `prefetch` submits lookups to a small thread pool (so it works whether
+    the calling tool runs on the event loop or in ADK's tool thread pool)
+    and `get` returns the result if it was prefetched for the same session,
+    provider and date. Results are a hint: the caller still places holds,
+    which drops any slot that was booked in the meantime.
+    """
+
+    def __init__(self, fetch, ttl: float = PREFETCH_TTL_SECONDS, max_entries: int = MAX_PREFETCH_ENTRIES,
+                 workers: int = PREFETCH_WORKERS, wait: float = PREFETCH_WAIT_SECONDS, clock=time.monotonic):
+        self._fetch = fetch
+        self._ttl = ttl
+        self._wait = wait
+        self._max_entries = max_entries
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="availability_prefetch")
+        # (session_id, provider_id, date) -> (expires_at, future)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.timeouts = 0
+        self.scheduled = 0
+
+    def prefetch(self, session_id: str, requests):
+        """Start background lookups for (provider_id, date) pairs not already cached."""
+        now = self._clock()
+        with self._lock:
+            for provider_id, date in requests:
+                key = (session_id, provider_id, date)
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    continue
+                future = self._executor.submit(self._fetch, provider_id, date, session_id)
+                self._entries[key] = (now + self._ttl, future)
+                self._entries.move_to_end(key)
+                self.scheduled += 1
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, session_id: str, provider_id: str, date: str):
+        """
+        Return prefetched slots, or None on a miss.
+
+        A lookup that is still running is waited on for at most the `wait`
+        given at construction; if it has not finished by then (say the pool
+        is backed up), this is a miss and the caller looks up directly.
+        """
+        key = (session_id, provider_id, date)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                entry = None
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            slots = entry[1].result(timeout=self._wait)
+        except FutureTimeoutError:
+            with self._lock:
+                self.timeouts += 1
+                self.misses += 1
+            return None
+        except Exception:  # pylint: disable=broad-except
+            with self._lock:
+                self._entries.pop(key, None)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return slots
+
+    def stats(self) -> dict:
+        """Hit/miss counters for confirming the prefetch pays off."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "timeouts": self.timeouts,
+                "scheduled": self.scheduled,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
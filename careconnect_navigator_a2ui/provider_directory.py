@@ -0,0 +1,478 @@
+"""Columnar, memory-compact provider directory for CareConnect."""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+# ----------------------------------------------------------------------
+# Network bitmask
+# ----------------------------------------------------------------------
+NETWORK_BITS = {"HMO": 1 << 0, "PPO": 1 << 1, "OON": 1 << 2}
+
+
+def network_mask(networks) -> int:
+    """Pack a list of network names (e.g. ["HMO", "PPO"]) into a bitmask."""
+    mask = 0
+    for network in networks:
+        mask |= NETWORK_BITS.get(network.upper().strip(), 0)
+    return mask
+
+
+def network_names(mask: int) -> list:
+    """Unpack a network bitmask back into its list of names."""
+    return [name for name, bit in NETWORK_BITS.items() if mask & bit]
+
+
+def specialty_key(specialty: str) -> str:
+    """Normalized form of a specialty name used as the index key."""
+    return specialty.lower().strip()
+
+
+def _bucket_key(specialty_code: int, zip_code: int) -> int:
+    return (zip_code << 16) | specialty_code
+
+
+class _StringTable:
+    """Interns repeated strings (specialties, zips) into small integer codes."""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def intern(self, key: str, value: str) -> int:
+        code = self._codes.get(key)
+        if code is None:
+            code = self._codes[key] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def code(self, key: str):
+        return self._codes.get(key)
+
+
+class _StringColumn:
+    """Per-row unique strings packed into one UTF-8 blob plus an offsets array."""
+
+    def __init__(self):
+        self._blob = bytearray()
+        self._offsets = array("I", [0])
+
+    def append(self, value: str):
+        self._blob += value.encode("utf-8")
+        self._offsets.append(len(self._blob))
+
+    def __getitem__(self, row: int) -> str:
+        return self._blob[self._offsets[row]:self._offsets[row + 1]].decode("utf-8")
+
+
+# ----------------------------------------------------------------------
+# Row view
+# ----------------------------------------------------------------------
+class ProviderRow:
+    """Lightweight view of one directory row; fields are decoded on access."""
+
+    __slots__ = ("_directory", "row")
+
+    def __init__(self, directory, row: int):
+        self._directory = directory
+        self.row = row
+
+    @property
+    def id(self) -> str:
+        return self._directory._id_of(self.row)
+
+    @property
+    def name(self) -> str:
+        return self._directory._name_of(self.row)
+
+    @property
+    def specialty(self) -> str:
+        return self._directory._specialty_of(self.row)
+
+    @property
+    def zip(self) -> str:
+        return self._directory._zip_of(self.row)
+
+    @property
+    def networks(self) -> list:
+        return network_names(self._directory._networks_of(self.row))
+
+    def __getitem__(self, field: str):
+        # Dict-style access keeps callers written against the old records working.
+        if field not in ("id", "name", "specialty", "zip", "networks"):
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "specialty": self.specialty,
+            "zip": self.zip,
+            "networks": self.networks,
+        }
+
+    def __repr__(self) -> str:
+        return f"ProviderRow({self.to_dict()!r})"
+
+
+# ----------------------------------------------------------------------
+# Queries shared by the in-memory and memory-mapped directories
+# ----------------------------------------------------------------------
+class _DirectoryQueries:
+    """
+    Lookups over the prebuilt index arrays.
+
+    Subclasses provide `_bucket_keys` (sorted), `_bucket_starts`,
+    `_bucket_rows` and `_id_order` as integer sequences, plus the per-row
+    field accessors used by ProviderRow and the code lookups below.
+    """
+
+    def __len__(self) -> int:
+        return self._row_count()
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield ProviderRow(self, row)
+
+    def __getitem__(self, row: int) -> ProviderRow:
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return ProviderRow(self, row)
+
+    def lookup(self, specialty: str, zip_code: str):
+        """
+        Return the row numbers of providers matching a specialty and zip.
+
+        Args:
+            specialty: Specialty name, already resolved from any synonyms.
+            zip_code: The 5-digit zip code.
+
+        Returns:
+            A (possibly empty) sequence of row numbers into the directory.
+        """
+        specialty_code = self._specialty_code(specialty_key(specialty))
+        zip_index = self._zip_index(zip_code.strip())
+        if specialty_code is None or zip_index is None:
+            return ()
+        key = _bucket_key(specialty_code, zip_index)
+        bucket = bisect_left(self._bucket_keys, key)
+        if bucket == len(self._bucket_keys) or self._bucket_keys[bucket] != key:
+            return ()
+        return self._bucket_rows[self._bucket_starts[bucket]:self._bucket_starts[bucket + 1]]
+
+    def find(self, provider_id: str):
+        """Return the row view for a provider id, or None if it is not listed."""
+        position = bisect_left(self._id_order, provider_id, key=self._id_of)
+        if position < len(self._id_order):
+            row = self._id_order[position]
+            if self._id_of(row) == provider_id:
+                return ProviderRow(self, row)
+        return None
+
+    def in_network(self, row: int, plan_type: str) -> bool:
+        """True if the provider at `row` accepts the given plan type."""
+        return bool(self._networks_of(row) & NETWORK_BITS.get(plan_type, 0))
+
+
+# ----------------------------------------------------------------------
+# In-memory directory
+# ----------------------------------------------------------------------
+class ProviderDirectory(_DirectoryQueries):
+    """
+    Provider directory stored column-wise instead of as a list of dicts.
+
+    Specialty and zip strings are interned into code tables, the per-row
+    columns are typed arrays, and network membership is a one-byte bitfield.
+    Rows are grouped by (specialty, zip) behind a sorted bucket-key array, so
+    `lookup` costs O(log buckets + results) regardless of directory size.
+    """
+
+    def __init__(self):
+        self._specialties = _StringTable()
+        self._zips = _StringTable()
+        self._ids = _StringColumn()
+        self._names = _StringColumn()
+        self._specialty_col = array("H")
+        self._zip_col = array("I")
+        self._network_col = array("B")
+
+        # Built by _build_index(): rows ordered by bucket key / by id.
+        self._bucket_keys = array("Q")
+        self._bucket_starts = array("I")
+        self._bucket_rows = array("I")
+        self._id_order = array("I")
+
+    @classmethod
+    def from_records(cls, records) -> "ProviderDirectory":
+        """
+        Build a directory from provider dicts (id, name, specialty, zip, networks).
+
+        `records` may be any iterable, so large exports can be streamed in
+        without materializing the list of dicts first.
+        """
+        directory = cls()
+        for record in records:
+            directory._append(record)
+        directory._build_index()
+        return directory
+
+    def _append(self, record: dict):
+        specialty = record["specialty"].strip()
+        zip_code = record["zip"].strip()
+        self._ids.append(record["id"])
+        self._names.append(record["name"])
+        self._specialty_col.append(self._specialties.intern(specialty_key(specialty), specialty))
+        self._zip_col.append(self._zips.intern(zip_code, zip_code))
+        self._network_col.append(network_mask(record["networks"]))
+
+    def _build_index(self):
+        count = len(self)
+        keys = [_bucket_key(self._specialty_col[r], self._zip_col[r]) for r in range(count)]
+        ordered = sorted(range(count), key=keys.__getitem__)
+        self._bucket_rows = array("I", ordered)
+
+        self._bucket_keys = array("Q")
+        self._bucket_starts = array("I")
+        previous = None
+        for position, row in enumerate(ordered):
+            if keys[row] != previous:
+                previous = keys[row]
+                self._bucket_keys.append(previous)
+                self._bucket_starts.append(position)
+        self._bucket_starts.append(count)
+
+        self._id_order = array("I", sorted(range(count), key=self._ids.__getitem__))
+
+    def _row_count(self) -> int:
+        return len(self._network_col)
+
+    def _id_of(self, row: int) -> str:
+        return self._ids[row]
+
+    def _name_of(self, row: int) -> str:
+        return self._names[row]
+
+    def _specialty_of(self, row: int) -> str:
+        return self._specialties.values[self._specialty_col[row]]
+
+    def _zip_of(self, row: int) -> str:
+        return self._zips.values[self._zip_col[row]]
+
+    def _networks_of(self, row: int) -> int:
+        return self._network_col[row]
+
+    def _specialty_code(self, key: str):
+        return self._specialties.code(key)
+
+    def _zip_index(self, zip_code: str):
+        return self._zips.code(zip_code)
+
+    @property
+    def specialties(self) -> list:
+        """Display names of every specialty in the directory."""
+        return list(self._specialties.values)
+
+    def save(self, path: str):
+        """Write the directory in the memory-mappable format read by MappedProviderDirectory."""
+        write_directory_file(self, path)
+
+
+# ----------------------------------------------------------------------
+# On-disk format
+# ----------------------------------------------------------------------
+# A directory file is a header, a section table and 8-byte aligned sections:
+# fixed-width row records, a shared UTF-8 string table for ids and names,
+# the specialty and zip code tables, and the prebuilt index arrays. Every
+# section is used in place through memoryviews over an mmap, so opening a
+# file costs the same whatever its size and rows are decoded only on access.
+# Every integer, in the header, the records and the index arrays, is
+# little-endian. Big-endian hosts byteswap the arrays on write and copy them
+# on open instead of mapping them in place.
+FILE_MAGIC = b"CCDIR\x00\x00\x01"
+_HEADER = struct.Struct("<8sIIII")
+_SECTION = struct.Struct("<QQ")
+# id offset, name offset, zip code, id length, name length, specialty code, networks
+_RECORD = struct.Struct("<IIIHHHBx")
+_SECTIONS = (
+    "records", "strings",
+    "specialty_offsets", "specialty_blob",
+    "zip_offsets", "zip_blob", "zip_order",
+    "bucket_keys", "bucket_starts", "bucket_rows", "id_order",
+)
+# Array sections by type code, matching the standard sizes the format uses.
+_ARRAY_SIZES = {"I": 4, "Q": 8}
+_LITTLE_ENDIAN_HOST = sys.byteorder == "little"
+
+
+def _check_itemsize(typecode: str):
+    if array(typecode).itemsize != _ARRAY_SIZES[typecode]:
+        raise ValueError(f"Array type {typecode!r} is not {_ARRAY_SIZES[typecode]} bytes on this platform.")
+
+
+def _le_bytes(values: array) -> bytes:
+    """An array's contents in the file's (little-endian) byte order."""
+    _check_itemsize(values.typecode)
+    if not _LITTLE_ENDIAN_HOST:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _le_array(view: memoryview, typecode: str):
+    """A little-endian array section: zero-copy on little-endian hosts."""
+    _check_itemsize(typecode)
+    if _LITTLE_ENDIAN_HOST:
+        return view.cast(typecode)
+    values = array(typecode)
+    values.frombytes(view)
+    values.byteswap()
+    return values
+
+
+def _pack_table(values):
+    blob = bytearray()
+    offsets = array("I", [0])
+    for value in values:
+        blob += value.encode("utf-8")
+        offsets.append(len(blob))
+    return _le_bytes(offsets), bytes(blob)
+
+
+def write_directory_file(directory: ProviderDirectory, path: str):
+    """Serialize an in-memory ProviderDirectory; the file is replaced atomically."""
+    strings = bytearray()
+    records = bytearray(_RECORD.size * len(directory))
+    for row in range(len(directory)):
+        id_bytes = directory._id_of(row).encode("utf-8")
+        name_bytes = directory._name_of(row).encode("utf-8")
+        id_offset = len(strings)
+        strings += id_bytes
+        name_offset = len(strings)
+        strings += name_bytes
+        _RECORD.pack_into(
+            records, row * _RECORD.size,
+            id_offset, name_offset, directory._zip_col[row], len(id_bytes), len(name_bytes),
+            directory._specialty_col[row], directory._network_col[row],
+        )
+
+    zip_values = directory._zips.values
+    specialty_offsets, specialty_blob = _pack_table(directory._specialties.values)
+    zip_offsets, zip_blob = _pack_table(zip_values)
+    payloads = {
+        "records": bytes(records),
+        "strings": bytes(strings),
+        "specialty_offsets": specialty_offsets,
+        "specialty_blob": specialty_blob,
+        "zip_offsets": zip_offsets,
+        "zip_blob": zip_blob,
+        "zip_order": _le_bytes(array("I", sorted(range(len(zip_values)), key=zip_values.__getitem__))),
+        "bucket_keys": _le_bytes(directory._bucket_keys),
+        "bucket_starts": _le_bytes(directory._bucket_starts),
+        "bucket_rows": _le_bytes(directory._bucket_rows),
+        "id_order": _le_bytes(directory._id_order),
+    }
+
+    position = _HEADER.size + _SECTION.size * len(_SECTIONS)
+    table = []
+    for name in _SECTIONS:
+        position += -position % 8
+        table.append((position, len(payloads[name])))
+        position += len(payloads[name])
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(FILE_MAGIC, len(directory), len(directory._specialties.values),
+                             len(zip_values), len(directory._bucket_keys)))
+        for offset, size in table:
+            f.write(_SECTION.pack(offset, size))
+        for name, (offset, _) in zip(_SECTIONS, table):
+            f.write(b"\x00" * (offset - f.tell()))
+            f.write(payloads[name])
+    os.replace(tmp_path, path)
+
+
+class MappedProviderDirectory(_DirectoryQueries):
+    """
+    Read-only provider directory backed by a memory-mapped directory file.
+
+    Opening maps the file and wraps its sections in memoryviews; nothing
+    is decoded up front except the (small) specialty table, so cold-start
+    time and resident memory do not grow with the number of providers.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, self._rows, specialty_count, zip_count, _ = _HEADER.unpack_from(view, 0)
+        if magic != FILE_MAGIC:
+            raise ValueError(f"{path} is not a provider directory file.")
+        sections = {}
+        for i, name in enumerate(_SECTIONS):
+            offset, size = _SECTION.unpack_from(view, _HEADER.size + i * _SECTION.size)
+            sections[name] = view[offset:offset + size]
+
+        self._records = sections["records"]
+        self._strings = sections["strings"]
+        self._zip_offsets = _le_array(sections["zip_offsets"], "I")
+        self._zip_blob = sections["zip_blob"]
+        self._zip_order = _le_array(sections["zip_order"], "I")
+        self._bucket_keys = _le_array(sections["bucket_keys"], "Q")
+        self._bucket_starts = _le_array(sections["bucket_starts"], "I")
+        self._bucket_rows = _le_array(sections["bucket_rows"], "I")
+        self._id_order = _le_array(sections["id_order"], "I")
+
+        specialty_offsets = _le_array(sections["specialty_offsets"], "I")
+        specialty_blob = sections["specialty_blob"]
+        self._specialty_names = [
+            bytes(specialty_blob[specialty_offsets[i]:specialty_offsets[i + 1]]).decode("utf-8")
+            for i in range(specialty_count)
+        ]
+        self._specialty_codes = {specialty_key(name): code for code, name in enumerate(self._specialty_names)}
+
+    def _record(self, row: int):
+        return _RECORD.unpack_from(self._records, row * _RECORD.size)
+
+    def _row_count(self) -> int:
+        return self._rows
+
+    def _id_of(self, row: int) -> str:
+        id_offset, _, _, id_length, _, _, _ = self._record(row)
+        return bytes(self._strings[id_offset:id_offset + id_length]).decode("utf-8")
+
+    def _name_of(self, row: int) -> str:
+        _, name_offset, _, _, name_length, _, _ = self._record(row)
+        return bytes(self._strings[name_offset:name_offset + name_length]).decode("utf-8")
+
+    def _specialty_of(self, row: int) -> str:
+        return self._specialty_names[self._record(row)[5]]
+
+    def _zip_value(self, code: int) -> str:
+        return bytes(self._zip_blob[self._zip_offsets[code]:self._zip_offsets[code + 1]]).decode("utf-8")
+
+    def _zip_of(self, row: int) -> str:
+        return self._zip_value(self._record(row)[2])
+
+    def _networks_of(self, row: int) -> int:
+        return self._record(row)[6]
+
+    def _specialty_code(self, key: str):
+        return self._specialty_codes.get(key)
+
+    def _zip_index(self, zip_code: str):
+        position = bisect_left(self._zip_order, zip_code, key=self._zip_value)
+        if position < len(self._zip_order):
+            code = self._zip_order[position]
+            if self._zip_value(code) == zip_code:
+                return code
+        return None
+
+    @property
+    def specialties(self) -> list:
+        """Display names of every specialty in the directory."""
+        return list(self._specialty_names)
@@ -0,0 +1,108 @@
+"""Top-k ranking and opaque keyset cursors for paged provider results."""
+
+import base64
+import hashlib
+import heapq
+import json
+import threading
+from collections import OrderedDict
+
+DEFAULT_PAGE_SIZE = 5
+MAX_PAGE_SIZE = 10
+
+# Rank value for providers with nothing open inside the lookahead window.
+NO_AVAILABILITY = 1 << 62
+# Searches whose rank snapshot is kept for their later pages.
+MAX_RANK_SNAPSHOTS = 1024
+
+
+class CursorError(ValueError):
+    """Raised when a cursor is malformed or belongs to a different search."""
+
+
+def query_fingerprint(*parts) -> str:
+    """Short stable hash of the normalized search parameters."""
+    return hashlib.sha1(json.dumps(parts, default=str).encode("utf-8")).hexdigest()[:12]
+
+
+def encode_cursor(fingerprint: str, after: tuple, as_of: str = None) -> str:
+    payload = {"q": fingerprint, "after": list(after)}
+    if as_of is not None:
+        payload["at"] = as_of
+    payload = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, fingerprint: str):
+    """
+    Return the rank key a cursor resumes after and the time it ranks as of.
+
+    Returns:
+        (after, as_of): as_of is None for cursors issued without one.
+
+    Raises:
+        CursorError: If the cursor cannot be decoded or was issued for a
+            different search.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        after = tuple(payload["after"])
+        issued_for = payload["q"]
+        as_of = payload.get("at")
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise CursorError(f"Malformed cursor: {e}") from e
+    if issued_for != fingerprint:
+        raise CursorError("Cursor was issued for a different search.")
+    return after, as_of
+
+
+class RankSnapshots:
+    """
+    Bounded LRU of per-search rank values that change over time.
+
+    A search's first page computes them (e.g. each provider's first open
+    day) and later pages reuse them, so keyset cursors neither skip nor
+    repeat entries when bookings land between pages. A search evicted from
+    here is recomputed as of the cursor's time instead.
+    """
+
+    def __init__(self, max_entries: int = MAX_RANK_SNAPSHOTS):
+        self._max_entries = max_entries
+        self._snapshots = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None:
+                self._snapshots.move_to_end(key)
+                return snapshot
+        snapshot = compute()
+        with self._lock:
+            self._snapshots[key] = snapshot
+            self._snapshots.move_to_end(key)
+            while len(self._snapshots) > self._max_entries:
+                self._snapshots.popitem(last=False)
+        return snapshot
+
+
+def top_k_page(candidates, rank_key, page_size: int, after: tuple = None):
+    """
+    Select one page of the best-ranked candidates.
+
+    Uses heap selection, so a page costs O(n log page_size) and the
+    candidates are never fully sorted. `rank_key` must give every candidate
+    a distinct key (include an id as the last element) so keyset resumption
+    neither skips nor repeats entries.
+
+    Returns:
+        (page, last_key, has_more): the page in rank order, the key of its
+        last entry and whether further candidates remain.
+    """
+    if after is not None:
+        candidates = (c for c in candidates if rank_key(c) > after)
+    remaining = list(candidates)
+    page = heapq.nsmallest(page_size, remaining, key=rank_key)
+    last_key = rank_key(page[-1]) if page else after
+    return page, last_key, len(remaining) > len(page)
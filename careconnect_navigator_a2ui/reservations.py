@@ -0,0 +1,283 @@
+"""Slot holds and atomic booking commits on top of a SlotCalendar."""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from availability import FULL_DAY, MAX_LOOKAHEAD_DAYS, current_slot_key, iter_bits, format_slot, parse_day, parse_slot
+
+# Displayed slots stay reserved for the session that saw them this long.
+HOLD_TTL_SECONDS = 120
+# Striped locks: providers hash onto a fixed pool, so memory does not grow
+# with the directory and bookings for different providers rarely contend.
+LOCK_STRIPES = 256
+# Completed bookings remembered for idempotent retries.
+MAX_IDEMPOTENCY_KEYS = 50_000
+
+
+class ReservationBook:
+    """
+    Short-lived holds plus atomic commit/release for provider slots.
+
+    A hold is taken when slots are shown to a session; other sessions do not
+    see held slots until the hold expires or is released. A session only
+    holds what it was shown last: `release_all` gives back the rest when it
+    is shown new slots or its turn ends without them. Expired holds are
+    dropped when their provider's day is read, and swept across all
+    providers once per TTL, so holds on providers nobody queries again do
+    not pile up.
+
+    `commit` books the slot in the calendar under the provider's lock and
+    records the result under (holder, idempotency key). A retried call returns
+    the original confirmation instead of failing or double-booking. A key
+    reused for a different provider or slot is rejected.
+    """
+
+    def __init__(self, calendar, hold_ttl: float = HOLD_TTL_SECONDS, lock_stripes: int = LOCK_STRIPES,
+                 max_idempotency_keys: int = MAX_IDEMPOTENCY_KEYS, clock=time.monotonic):
+        self._calendar = calendar
+        self._hold_ttl = hold_ttl
+        self._locks = [threading.Lock() for _ in range(lock_stripes)]
+        self._clock = clock
+        # provider_id -> {(day, index): (holder, expires_at)}
+        self._holds = {}
+        # holder -> provider_ids it holds slots on, so a session's holds can be
+        # released without scanning every provider. Updated under the
+        # provider's lock, then this one.
+        self._held_providers = {}
+        self._index_lock = threading.Lock()
+        # (holder, idempotency key) -> successful commit result
+        self._confirmations = OrderedDict()
+        self._confirmations_lock = threading.Lock()
+        self._max_idempotency_keys = max_idempotency_keys
+        self._last_sweep = clock()
+
+    def _lock_for(self, provider_id: str) -> threading.Lock:
+        return self._locks[hash(provider_id) % len(self._locks)]
+
+    def _held_by_others(self, provider_id: str, day: int, holder: str, now: float) -> int:
+        """Bitmap of slots on `day` held by anyone other than `holder`; drops expired holds."""
+        holds = self._holds.get(provider_id)
+        if not holds:
+            return 0
+        mask = 0
+        expired = []
+        for key in [k for k in holds if k[0] == day]:
+            owner, expires_at = holds[key]
+            if expires_at <= now:
+                expired.append(key)
+            elif owner != holder:
+                mask |= 1 << key[1]
+        if expired:
+            self._drop_holds(provider_id, expired)
+        return mask
+
+    def _drop_holds(self, provider_id: str, keys):
+        """Delete holds on `provider_id` and unindex holders left with none; caller holds its lock."""
+        holds = self._holds.get(provider_id)
+        if not holds:
+            return
+        owners = set()
+        for key in keys:
+            owners.add(holds.pop(key)[0])
+        remaining = {owner for owner, _ in holds.values()}
+        if not holds:
+            del self._holds[provider_id]
+        with self._index_lock:
+            for owner in owners - remaining:
+                providers = self._held_providers.get(owner)
+                if providers is not None:
+                    providers.discard(provider_id)
+                    if not providers:
+                        del self._held_providers[owner]
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def visible_slots(self, provider_id: str, start_date: str, end_date: str, holder: str) -> list:
+        """Free slots in a date range that are not held by another session and have not started."""
+        first, last = parse_day(start_date), parse_day(end_date)
+        if last < first:
+            raise ValueError("end_date must not be before start_date.")
+        today, index = current_slot_key()
+        with self._lock_for(provider_id):
+            now = self._clock()
+            slots = []
+            for day in range(max(first, today), last + 1):
+                bits = self._calendar.free_bits(provider_id, day) & ~self._held_by_others(provider_id, day, holder, now)
+                if day == today:
+                    bits &= FULL_DAY & ~((1 << index) - 1)
+                slots.extend(format_slot(day, i) for i in iter_bits(bits))
+            return slots
+
+    def next_visible(self, provider_id: str, after: str, holder: str) -> str:
+        """
+        The first free slot at or after `after` not held by another session.
+
+        Args:
+            provider_id: The provider to look up.
+            after: A YYYY-MM-DD date or 'YYYY-MM-DD HH:MM' slot to start from.
+            holder: The session asking; its own holds count as free.
+
+        Returns:
+            The slot, or None if nothing is open within MAX_LOOKAHEAD_DAYS.
+        """
+        if " " in after.strip():
+            day, index = parse_slot(after)
+            floor = FULL_DAY & ~((1 << index) - 1)
+        else:
+            day, floor = parse_day(after), FULL_DAY
+        with self._lock_for(provider_id):
+            now = self._clock()
+            for offset in range(MAX_LOOKAHEAD_DAYS):
+                bits = self._calendar.free_bits(provider_id, day + offset) & floor
+                if bits:
+                    bits &= ~self._held_by_others(provider_id, day + offset, holder, now)
+                for i in iter_bits(bits):
+                    return format_slot(day + offset, i)
+                floor = FULL_DAY
+        return None
+
+    # ------------------------------------------------------------------
+    # Holds
+    # ------------------------------------------------------------------
+    def hold(self, provider_id: str, slots, holder: str) -> list:
+        """
+        Reserve `slots` for `holder` for the hold TTL.
+
+        Returns:
+            The slots actually held; slots that are booked or held by someone
+            else are skipped.
+        """
+        held = []
+        with self._lock_for(provider_id):
+            now = self._clock()
+            for slot in slots:
+                day, index = parse_slot(slot)
+                bit = 1 << index
+                if not self._calendar.free_bits(provider_id, day) & bit:
+                    continue
+                if self._held_by_others(provider_id, day, holder, now) & bit:
+                    continue
+                self._holds.setdefault(provider_id, {})[(day, index)] = (holder, now + self._hold_ttl)
+                held.append(slot)
+            if held:
+                with self._index_lock:
+                    self._held_providers.setdefault(holder, set()).add(provider_id)
+        if now - self._last_sweep >= self._hold_ttl:
+            self.sweep_expired()
+        return held
+
+    def sweep_expired(self) -> int:
+        """Drop expired holds on every provider; returns how many were dropped."""
+        now = self._last_sweep = self._clock()
+        dropped = 0
+        for provider_id in list(self._holds):
+            with self._lock_for(provider_id):
+                holds = self._holds.get(provider_id)
+                if not holds:
+                    continue
+                expired = [k for k, (_, expires_at) in holds.items() if expires_at <= now]
+                self._drop_holds(provider_id, expired)
+                dropped += len(expired)
+        return dropped
+
+    def hold_count(self) -> int:
+        """Holds currently stored, expired or not."""
+        return sum(len(holds) for holds in list(self._holds.values()))
+
+    def release(self, provider_id: str, holder: str, slot: str = None, keep=()):
+        """
+        Drop `holder`'s hold on one slot, or on all of its slots for the provider.
+
+        Args:
+            keep: 'YYYY-MM-DD HH:MM' slots to go on holding.
+        """
+        target = parse_slot(slot) if slot else None
+        kept = {parse_slot(s) for s in keep}
+        with self._lock_for(provider_id):
+            holds = self._holds.get(provider_id)
+            if not holds:
+                return
+            self._drop_holds(provider_id, [
+                k for k, (owner, _) in holds.items()
+                if owner == holder and (target is None or k == target) and k not in kept
+            ])
+
+    def release_all(self, holder: str, keep=()):
+        """
+        Drop every hold `holder` has, on any provider.
+
+        Args:
+            holder: The session whose holds go back to the pool.
+            keep: (provider_id, slot) pairs to go on holding, e.g. the slots
+                just shown to it.
+        """
+        kept = {}
+        for provider_id, slot in keep:
+            kept.setdefault(provider_id, []).append(slot)
+        with self._index_lock:
+            providers = list(self._held_providers.get(holder, ()))
+        for provider_id in providers:
+            self.release(provider_id, holder, keep=kept.get(provider_id, ()))
+
+    # ------------------------------------------------------------------
+    # Commit
+    # ------------------------------------------------------------------
+    def commit(self, provider_id: str, slot: str, holder: str, idempotency_key: str = None) -> dict:
+        """
+        Atomically book `slot` for `holder`.
+
+        Args:
+            provider_id: The provider to book.
+            slot: The 'YYYY-MM-DD HH:MM' slot.
+            holder: The session committing the booking.
+            idempotency_key: Key identifying this booking request, scoped to
+                `holder`. Repeating it for the same provider and slot returns
+                the first result unchanged; reusing it for another booking is
+                an error.
+
+        Returns:
+            A tool-style result dict with `status` "success" (and a
+            `confirmation_id`) or "error".
+        """
+        day, index = parse_slot(slot)
+        bit = 1 << index
+        scoped_key = (holder, idempotency_key) if idempotency_key is not None else None
+        with self._lock_for(provider_id):
+            if scoped_key is not None:
+                with self._confirmations_lock:
+                    previous = self._confirmations.get(scoped_key)
+                if previous is not None:
+                    if previous["provider_id"] != provider_id or previous["slot"] != slot:
+                        return {"status": "error", "message": (
+                            f"Idempotency key {idempotency_key!r} was already used for a different booking."
+                        )}
+                    return previous
+
+            if (day, index) < current_slot_key():
+                return {"status": "error", "message": f"Slot {slot} has already started or passed."}
+            if self._held_by_others(provider_id, day, holder, self._clock()) & bit:
+                return {"status": "error", "message": f"Slot {slot} is currently held by another session."}
+            if not self._calendar.book(provider_id, slot):
+                return {"status": "error", "message": f"Slot {slot} is not available for provider {provider_id}."}
+
+            # The booking is final; the session's other holds on this provider go back to the pool.
+            holds = self._holds.get(provider_id)
+            if holds:
+                self._drop_holds(provider_id, [k for k, (owner, _) in holds.items() if owner == holder])
+
+            result = {
+                "status": "success",
+                "message": f"Appointment successfully booked for provider {provider_id} at {slot}.",
+                "confirmation_id": str(uuid.uuid4())[:8],
+                "provider_id": provider_id,
+                "slot": slot,
+            }
+            if scoped_key is not None:
+                with self._confirmations_lock:
+                    self._confirmations[scoped_key] = result
+                    while len(self._confirmations) > self._max_idempotency_keys:
+                        self._confirmations.popitem(last=False)
+            return result
@@ -0,0 +1,110 @@
+"""Cache of validated A2UI responses for the flow's template surfaces.
+
+The plan clarification and the search criteria form come out the same for
+almost everyone, yet each one costs a model generation. The executor looks
+these turns up here before running the model. The key is the normalized
+query, the flow step and the whole visible session state.
+
+A reply can echo anything in the conversation, so a turn is only cacheable
+when the key covers everything the model saw:
+- the first turn of a session, where the query is the whole conversation;
+- a button click in a session that has had no free-text turns, so the
+  history consists of clicks whose contexts are all in the state.
+Once a user has typed a message, nothing in that session is cached. Replies
+that called tools or rendered tool output are never stored.
+
+Entries expire after a TTL and are evicted least recently used beyond a size
+cap. A size of 0 disables the cache.
+"""
+
+import collections
+import json
+import os
+import re
+import time
+
+import state_context
+
+RESPONSE_CACHE_SIZE = int(os.environ.get("CARECONNECT_RESPONSE_CACHE_SIZE", "256"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.environ.get("CARECONNECT_RESPONSE_CACHE_TTL_SECONDS", "3600"))
+
+# Steps whose surfaces are templates. Other steps show results (providers,
+# slots, bookings) and are never cached.
+CACHEABLE_STEPS = ("plan", "criteria")
+
+# Set in session state by the first free-text turn; the session is then
+# never cached again.
+FREE_TEXT_KEY = "_free_text"
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_query(query: str) -> str:
+  """Lowercase, punctuation dropped, whitespace collapsed."""
+  return " ".join(_PUNCTUATION.sub(" ", query.lower()).split())
+
+
+class ResponseCache:
+  """LRU of (text, A2UI messages) with a TTL, keyed by make_key()."""
+
+  def __init__(
+      self,
+      max_entries: int = RESPONSE_CACHE_SIZE,
+      ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS,
+      clock=time.monotonic,
+  ):
+    self._max_entries = max_entries
+    self._ttl = ttl_seconds
+    self._clock = clock
+    # key -> (stored at, text, messages as JSON), least recently used first.
+    self._entries = collections.OrderedDict()
+    self.counts = collections.Counter()
+
+  def make_key(self, query: str, step: str, state, first_turn: bool, click: bool) -> tuple:
+    """The cache key for a turn, or None if the turn is not cacheable.
+
+    `state` must already include the click's context.
+    """
+    if self._max_entries <= 0 or step not in CACHEABLE_STEPS:
+      return None
+    if not first_turn and not (click and not state.get(FREE_TEXT_KEY)):
+      return None
+    visible = state_context.visible_state(state)
+    return (
+        normalize_query(query),
+        step,
+        tuple(sorted((k, state_context.encode_value(v)) for k, v in visible.items())),
+    )
+
+  def get(self, key):
+    """(text, messages) for the key, or None on a miss."""
+    entry = self._entries.get(key)
+    if entry is not None and self._clock() - entry[0] > self._ttl:
+      del self._entries[key]
+      self.counts["expired"] += 1
+      entry = None
+    if entry is None:
+      self.counts["misses"] += 1
+      return None
+    self._entries.move_to_end(key)
+    self.counts["hits"] += 1
+    # A fresh copy per hit: the parts built from it must not share dicts.
+    return entry[1], json.loads(entry[2])
+
+  def put(self, key, text: str, messages: list):
+    self._entries[key] = (self._clock(), text, json.dumps(messages))
+    self._entries.move_to_end(key)
+    self.counts["stores"] += 1
+    while len(self._entries) > self._max_entries:
+      self._entries.popitem(last=False)
+      self.counts["evictions"] += 1
+
+  def hit_rate(self) -> float:
+    lookups = self.counts["hits"] + self.counts["misses"]
+    return self.counts["hits"] / lookups if lookups else 0.0
+
+  def stats(self) -> dict:
+    return dict(self.counts, entries=len(self._entries), hit_rate=round(self.hit_rate(), 3))
+
+  def __len__(self) -> int:
+    return len(self._entries)
@@ -0,0 +1,95 @@
+"""Incremental handling of streamed agent responses for the A2A executor."""
+
+from a2ui_repair import A2UI_DELIMITER
+
+# Status lines shown while a tool call is in flight.
+TOOL_PROGRESS = {
+    "search_providers": "Searching providers…",
+    "check_availability": "Checking availability…",
+    "check_availability_bulk": "Comparing availability…",
+    "book_appointment": "Booking your appointment…",
+    "get_session_state": "Reviewing your details…",
+}
+
+
+def tool_progress_text(tool_name: str) -> str:
+  return TOOL_PROGRESS.get(tool_name, "Working…")
+
+
+# A response opening with one of these is JSON without its text part;
+# none of it is shown unless the delimiter turns up after all.
+_JSON_OPENERS = ("{", "[", "```")
+
+
+class DelimiterStreamParser:
+  """Splits a streamed response into conversational text and A2UI JSON.
+
+  `feed` returns the text that is safe to show right away. A chunk may end
+  midway through the delimiter, so the longest tail that could still start
+  it is held back until the next chunk settles the question. Everything
+  after the delimiter is buffered for validation once the stream ends.
+
+  A response whose first non-whitespace characters are `{`, `[` or a code
+  fence is likely raw JSON with no delimiter, so it is withheld until the
+  delimiter arrives; it is never shown if the delimiter does not.
+  """
+
+  def __init__(self, delimiter: str = A2UI_DELIMITER):
+    self._delimiter = delimiter
+    self._pending = ""
+    self._json_parts = []
+    # None until the response's opening characters are known.
+    self._looks_like_json = None
+    self.text = ""
+    self.found_delimiter = False
+
+  def feed(self, chunk: str) -> str:
+    if self.found_delimiter:
+      self._json_parts.append(chunk)
+      return ""
+    buffer = self._pending + chunk
+    index = buffer.find(self._delimiter)
+    if index != -1:
+      self.found_delimiter = True
+      self._pending = ""
+      self._json_parts.append(buffer[index + len(self._delimiter):])
+      return self._emit(buffer[:index])
+    if self._withholding(buffer):
+      self._pending = buffer
+      return ""
+    hold = self._partial_delimiter_length(buffer)
+    self._pending = buffer[len(buffer) - hold:] if hold else ""
+    return self._emit(buffer[:len(buffer) - hold])
+
+  def close(self) -> str:
+    """Flushes held-back text at the end of the stream; withheld JSON is dropped."""
+    pending, self._pending = self._pending, ""
+    if self._looks_like_json is not False:
+      return ""
+    return self._emit(pending)
+
+  @property
+  def json_text(self) -> str:
+    return "".join(self._json_parts)
+
+  def _withholding(self, buffer: str) -> bool:
+    """Whether output waits: the opening looks like JSON, or is not known yet."""
+    if self._looks_like_json is None:
+      opening = buffer.lstrip()
+      if not opening or any(
+          len(opening) < len(opener) and opener.startswith(opening)
+          for opener in _JSON_OPENERS
+      ):
+        return True
+      self._looks_like_json = opening.startswith(_JSON_OPENERS)
+    return self._looks_like_json
+
+  def _emit(self, text: str) -> str:
+    self.text += text
+    return text
+
+  def _partial_delimiter_length(self, buffer: str) -> int:
+    for length in range(min(len(buffer), len(self._delimiter) - 1), 0, -1):
+      if self._delimiter.startswith(buffer[-length:]):
+        return length
+    return 0
@@ -0,0 +1,207 @@
+"""Bounded in-memory session service for the A2A executor.
+
+InMemorySessionService keeps every session forever. BoundedSessionService
+keeps the same storage but tracks each session's last access and
+approximate size, and evicts sessions when they exceed a count cap, an idle
+TTL or a byte budget. Eviction also frees the session's artifacts.
+
+Sizes are the events' serialized JSON length; the Python objects holding
+them take several times that, so set the byte budget accordingly.
+
+make_services() picks the backend from CARECONNECT_SESSION_BACKEND:
+"memory" (default) for this module's bounded services, or "sqlite" for the
+durable services in sqlite_store.
+"""
+
+import collections
+import logging
+import os
+import time
+
+from google.adk.artifacts import in_memory_artifact_service
+from google.adk.sessions import in_memory_session_service
+
+logger = logging.getLogger(__name__)
+
+MAX_SESSIONS = int(os.environ.get("CARECONNECT_MAX_SESSIONS", "10000"))
+SESSION_IDLE_TTL_SECONDS = float(os.environ.get("CARECONNECT_SESSION_TTL_SECONDS", "1800"))
+SESSION_BYTE_BUDGET = int(os.environ.get("CARECONNECT_SESSION_BYTES", str(256 * 1024 * 1024)))
+SESSION_BACKEND = os.environ.get("CARECONNECT_SESSION_BACKEND", "memory")
+
+# Artifacts with this prefix belong to the user, not the session, and survive eviction.
+_USER_ARTIFACT_PREFIX = "user:"
+
+
+def event_size(event) -> int:
+  """Approximate bytes an event holds: its serialized JSON length."""
+  return len(event.model_dump_json(exclude_none=True))
+
+
+class SessionArtifactService(in_memory_artifact_service.InMemoryArtifactService):
+  """InMemoryArtifactService that indexes filenames by session.
+
+  The base class lists a session's artifacts by scanning every stored path,
+  which made freeing an evicted session's artifacts O(all artifacts).
+  """
+
+  def __init__(self):
+    super().__init__()
+    self._session_files = collections.defaultdict(set)
+
+  async def save_artifact(self, *, app_name, user_id, filename, artifact, session_id=None, custom_metadata=None):
+    version = await super().save_artifact(
+        app_name=app_name, user_id=user_id, filename=filename, artifact=artifact,
+        session_id=session_id, custom_metadata=custom_metadata,
+    )
+    if not filename.startswith(_USER_ARTIFACT_PREFIX):
+      self._session_files[(app_name, user_id, session_id)].add(filename)
+    return version
+
+  async def delete_artifact(self, *, app_name, user_id, filename, session_id=None):
+    await super().delete_artifact(
+        app_name=app_name, user_id=user_id, filename=filename, session_id=session_id
+    )
+    key = (app_name, user_id, session_id)
+    files = self._session_files.get(key)
+    if files is not None:
+      files.discard(filename)
+      if not files:
+        del self._session_files[key]
+
+  def session_filenames(self, app_name, user_id, session_id) -> list:
+    """Session-scoped artifact names, without scanning other sessions."""
+    return sorted(self._session_files.get((app_name, user_id, session_id), ()))
+
+
+class BoundedSessionService(in_memory_session_service.InMemorySessionService):
+  """InMemorySessionService with LRU, idle-TTL and byte-budget eviction.
+
+  Sessions are kept in least-recently-used order, so expired sessions and
+  LRU victims are always at the front. A session touched by the current
+  call is never evicted by it.
+  """
+
+  def __init__(
+      self,
+      artifact_service=None,
+      max_sessions: int = MAX_SESSIONS,
+      idle_ttl_seconds: float = SESSION_IDLE_TTL_SECONDS,
+      max_bytes: int = SESSION_BYTE_BUDGET,
+      clock=time.monotonic,
+  ):
+    super().__init__()
+    self._artifact_service = artifact_service
+    self._max_sessions = max_sessions
+    self._idle_ttl = idle_ttl_seconds
+    self._max_bytes = max_bytes
+    self._clock = clock
+    # (app, user, session id) -> [last access, bytes], oldest access first.
+    self._entries = collections.OrderedDict()
+    self._bytes = 0
+    self.evictions = collections.Counter()
+    self.artifacts_freed = 0
+
+  async def create_session(self, *, app_name, user_id, state=None, session_id=None):
+    session = await super().create_session(
+        app_name=app_name, user_id=user_id, state=state, session_id=session_id
+    )
+    key = (app_name, user_id, session.id)
+    self._touch(key, len(repr(session.state)))
+    await self._evict(keep=key)
+    return session
+
+  async def get_session(self, *, app_name, user_id, session_id, config=None):
+    await self._evict()
+    session = await super().get_session(
+        app_name=app_name, user_id=user_id, session_id=session_id, config=config
+    )
+    if session is not None:
+      self._touch((app_name, user_id, session_id))
+    return session
+
+  async def append_event(self, session, event):
+    event = await super().append_event(session=session, event=event)
+    key = (session.app_name, session.user_id, session.id)
+    if not event.partial and key in self._entries:
+      self._touch(key, event_size(event))
+      await self._evict(keep=key)
+    return event
+
+  async def delete_session(self, *, app_name, user_id, session_id):
+    await self._drop((app_name, user_id, session_id))
+
+  def session_bytes(self, app_name, user_id, session_id) -> int:
+    """Tracked size of one session, 0 if it is not held."""
+    entry = self._entries.get((app_name, user_id, session_id))
+    return entry[1] if entry else 0
+
+  def stats(self) -> dict:
+    return {
+        "sessions": len(self._entries),
+        "bytes": self._bytes,
+        "evicted_lru": self.evictions["lru"],
+        "evicted_ttl": self.evictions["ttl"],
+        "evicted_bytes": self.evictions["bytes"],
+        "artifacts_freed": self.artifacts_freed,
+    }
+
+  def _touch(self, key, added_bytes: int = 0):
+    entry = self._entries.get(key)
+    if entry is None:
+      entry = self._entries[key] = [0.0, 0]
+    else:
+      self._entries.move_to_end(key)
+    entry[0] = self._clock()
+    entry[1] += added_bytes
+    self._bytes += added_bytes
+
+  async def _evict(self, keep=None):
+    now = self._clock()
+    while self._entries:
+      key, (last_access, _) = next(iter(self._entries.items()))
+      if key == keep:
+        break
+      if now - last_access > self._idle_ttl:
+        reason = "ttl"
+      elif len(self._entries) > self._max_sessions:
+        reason = "lru"
+      elif self._bytes > self._max_bytes:
+        reason = "bytes"
+      else:
+        break
+      self.evictions[reason] += 1
+      logger.debug("Evicting session %s (%s)", key[2], reason)
+      await self._drop(key)
+
+  async def _drop(self, key):
+    entry = self._entries.pop(key, None)
+    if entry is not None:
+      self._bytes -= entry[1]
+    app_name, user_id, session_id = key
+    self._delete_session_impl(app_name=app_name, user_id=user_id, session_id=session_id)
+    if self._artifact_service is None:
+      return
+    if isinstance(self._artifact_service, SessionArtifactService):
+      filenames = self._artifact_service.session_filenames(app_name, user_id, session_id)
+    else:
+      filenames = await self._artifact_service.list_artifact_keys(
+          app_name=app_name, user_id=user_id, session_id=session_id
+      )
+    for filename in filenames:
+      if filename.startswith(_USER_ARTIFACT_PREFIX):
+        continue
+      await self._artifact_service.delete_artifact(
+          app_name=app_name, user_id=user_id, filename=filename, session_id=session_id
+      )
+      self.artifacts_freed += 1
+
+
+def make_services(backend: str = SESSION_BACKEND):
+  """(session service, artifact service) for the configured backend."""
+  if backend == "memory":
+    artifact_service = SessionArtifactService()
+    return BoundedSessionService(artifact_service=artifact_service), artifact_service
+  if backend == "sqlite":
+    import sqlite_store  # pylint: disable=import-outside-toplevel
+    return sqlite_store.SqliteSessionService(), sqlite_store.SqliteArtifactService()
+  raise ValueError(f"Unknown session backend {backend!r}; expected 'memory' or 'sqlite'.")
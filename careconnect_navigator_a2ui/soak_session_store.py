@@ -0,0 +1,137 @@
+"""Soak test: process RSS over many simulated conversations, bounded vs. unbounded session store.
+
+Each conversation creates a session and appends one booking flow's worth of
+events: user messages, search and availability tool calls with realistic
+responses, and model replies. It also saves one artifact. A simulated clock
+advances --arrival-ms per conversation so the idle TTL is exercised without
+waiting.
+
+Run from this directory:
+    python soak_session_store.py [--conversations 100000] [--unbounded]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from google.adk.artifacts import in_memory_artifact_service
+from google.adk.events import Event
+from google.adk.sessions import in_memory_session_service
+from google.genai import types as genai_types
+
+import session_store
+
+APP, USER = "careconnect_navigator_a2ui", "remote_agent"
+
+
+class _SimulatedClock:
+  def __init__(self):
+    self.now = 0.0
+
+  def __call__(self):
+    return self.now
+
+
+def _rss_mb() -> float:
+  with open("/proc/self/status") as f:
+    for line in f:
+      if line.startswith("VmRSS:"):
+        return int(line.split()[1]) / 1024
+  return 0.0
+
+
+def _search_result(index: int) -> dict:
+  return {
+      "status": "success",
+      "matched_specialty": "Dermatology",
+      "results": [
+          {"id": f"dermatology_{30000 + index % 500}_{i}", "name": f"Dr. Provider {i} Dermatology",
+           "specialty": "Dermatology", "zip": str(30000 + index % 500), "network_status": "In-Network",
+           "next_available": "2026-10-20 09:00"}
+          for i in range(5)
+      ],
+      "total": 12,
+      "next_cursor": "eyJmIjoiYWJjZGVmIiwiayI6WzAsMSwyXX0",
+  }
+
+
+def _conversation_events(index: int) -> list:
+  def text(role, body):
+    return genai_types.Content(role=role, parts=[genai_types.Part(text=body)])
+
+  def call(name, args):
+    return genai_types.Content(role="model", parts=[genai_types.Part(
+        function_call=genai_types.FunctionCall(name=name, args=args))])
+
+  def response(name, body):
+    return genai_types.Content(role="user", parts=[genai_types.Part(
+        function_response=genai_types.FunctionResponse(name=name, response=body))])
+
+  provider_id = f"dermatology_{30000 + index % 500}_1"
+  turns = [
+      ("user", text("user", "Hi, I need a dermatologist near 30303. [State: plan_type=PPO]")),
+      (APP, call("search_providers", {"specialty": "dermatology", "zip_code": "30303", "plan_type": "PPO"})),
+      (APP, response("search_providers", _search_result(index))),
+      (APP, text("model", 'Here are dermatologists near you.\n---a2ui_JSON---\n{"render": "provider_list"}')),
+      ("user", text("user", f"Check availability for {provider_id}")),
+      (APP, call("check_availability", {"provider_id": provider_id, "date": "2026-10-20"})),
+      (APP, response("check_availability", {"status": "success", "provider_id": provider_id,
+                                            "date": "2026-10-20",
+                                            "slots": ["2026-10-20 09:00", "2026-10-20 10:00", "2026-10-20 14:00"]})),
+      (APP, text("model", 'Pick a time.\n---a2ui_JSON---\n{"render": "availability"}')),
+  ]
+  return [Event(invocation_id=f"e-{index}", author=author, content=content) for author, content in turns]
+
+
+async def _soak(args):
+  clock = _SimulatedClock()
+  if args.unbounded:
+    artifacts = in_memory_artifact_service.InMemoryArtifactService()
+    sessions = in_memory_session_service.InMemorySessionService()
+  else:
+    artifacts = session_store.SessionArtifactService()
+    sessions = session_store.BoundedSessionService(
+        artifact_service=artifacts, max_sessions=args.max_sessions,
+        idle_ttl_seconds=args.ttl, max_bytes=args.max_mb * 1024 * 1024, clock=clock,
+    )
+  artifact = genai_types.Part(text=json.dumps(_search_result(0)))
+
+  print(f"{'conversations':>13} {'rss(MB)':>8} {'sessions':>9} {'MB held':>8} {'evicted':>8} {'elapsed(s)':>10}")
+  start = time.perf_counter()
+  for index in range(1, args.conversations + 1):
+    clock.now += args.arrival_ms / 1e3
+    session = await sessions.create_session(app_name=APP, user_id=USER, session_id=f"ctx-{index}")
+    for event in _conversation_events(index):
+      await sessions.append_event(session, event)
+    await artifacts.save_artifact(
+        app_name=APP, user_id=USER, session_id=session.id, filename="response", artifact=artifact
+    )
+    if index % args.report_every == 0:
+      if args.unbounded:
+        held, evicted = len(sessions.sessions.get(APP, {}).get(USER, {})), 0
+        held_mb = float("nan")
+      else:
+        stats = sessions.stats()
+        held, held_mb = stats["sessions"], stats["bytes"] / 2**20
+        evicted = stats["evicted_lru"] + stats["evicted_ttl"] + stats["evicted_bytes"]
+      print(f"{index:>13} {_rss_mb():>8.0f} {held:>9} {held_mb:>8.1f} {evicted:>8} "
+            f"{time.perf_counter() - start:>10.1f}")
+  if not args.unbounded:
+    print(sessions.stats())
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--conversations", type=int, default=100_000)
+  parser.add_argument("--report-every", type=int, default=10_000)
+  parser.add_argument("--unbounded", action="store_true", help="plain InMemorySessionService for comparison")
+  parser.add_argument("--max-sessions", type=int, default=session_store.MAX_SESSIONS)
+  parser.add_argument("--ttl", type=float, default=session_store.SESSION_IDLE_TTL_SECONDS)
+  parser.add_argument("--max-mb", type=int, default=64)
+  parser.add_argument("--arrival-ms", type=float, default=20.0)
+  asyncio.run(_soak(parser.parse_args()))
+
+
+if __name__ == "__main__":
+  main()
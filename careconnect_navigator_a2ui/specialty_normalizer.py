@@ -0,0 +1,198 @@
+"""Alias + typo-tolerant matching of free-text specialty requests onto the directory vocabulary."""
+
+import functools
+import re
+
+# Common phrasings mapped to directory specialty names. Keys are in the
+# normalized form produced by `normalize_text`.
+SPECIALTY_ALIASES = {
+    "pediatrician": "Pediatrics",
+    "paediatrician": "Pediatrics",
+    "paediatrics": "Pediatrics",
+    "child doctor": "Pediatrics",
+    "kids doctor": "Pediatrics",
+    "childrens doctor": "Pediatrics",
+    "kids": "Pediatrics",
+    "children": "Pediatrics",
+    "gynecologist": "Gynecology",
+    "gynaecologist": "Gynecology",
+    "gynaecology": "Gynecology",
+    "womens health": "Gynecology",
+    "ob gyn": "Gynecology",
+    "obgyn": "Gynecology",
+    "obstetrician": "Obstetrics",
+    "child birth": "Obstetrics",
+    "childbirth": "Obstetrics",
+    "pregnancy": "Obstetrics",
+    "prenatal care": "Obstetrics",
+    "orthopedic": "Orthopedics",
+    "orthopaedics": "Orthopedics",
+    "orthopedist": "Orthopedics",
+    "ortho": "Orthopedics",
+    "bone doctor": "Orthopedics",
+    "bone case": "Orthopedics",
+    "bone": "Orthopedics",
+    "bones": "Orthopedics",
+    "dermatologist": "Dermatology",
+    "skin doctor": "Dermatology",
+    "skin specialist": "Dermatology",
+    "skin": "Dermatology",
+    "cardiologist": "Cardiology",
+    "heart doctor": "Cardiology",
+    "heart specialist": "Cardiology",
+    "heart": "Cardiology",
+    "oncologist": "Oncology",
+    "cancer doctor": "Oncology",
+    "cancer specialist": "Oncology",
+    "cancer": "Oncology",
+    "pcp": "Primary Care",
+    "primary care physician": "Primary Care",
+    "primary care doctor": "Primary Care",
+    "general practitioner": "Primary Care",
+    "gp": "Primary Care",
+    "internist": "Primary Care",
+    "family doctor": "Family Medicine",
+    "family physician": "Family Medicine",
+    "family practice": "Family Medicine",
+    "family med": "Family Medicine",
+    "physical therapist": "Physical Therapy",
+    "physiotherapist": "Physical Therapy",
+    "physiotherapy": "Physical Therapy",
+    "physio": "Physical Therapy",
+    "pt": "Physical Therapy",
+}
+
+# Most edits a typo may take. Similar-looking specialties ("radiology" and
+# "cardiology", "hematology" and "dermatology") are only a few edits apart, so
+# only typo-scale differences are accepted; anything else is no match.
+MAX_TYPO_EDITS = 2
+# Terms shorter than this must match exactly ("gp", "pt", "skin").
+MIN_TYPO_LENGTH = 5
+NORMALIZER_CACHE_SIZE = 1024
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def typo_budget(term: str, max_edits: int = MAX_TYPO_EDITS) -> int:
+    """Edits allowed when matching `term`: none for short terms, one up to 8 letters."""
+    if len(term) < MIN_TYPO_LENGTH:
+        return 0
+    return min(max_edits, 1 if len(term) < 9 else 2)
+
+
+def _windows(words: list, size: int):
+    for start in range(len(words) - size + 1):
+        yield " ".join(words[start:start + size])
+
+
+def edit_distance(a: str, b: str, limit: int = None) -> int:
+    """
+    Levenshtein distance between two strings.
+
+    With `limit`, gives up as soon as the distance must exceed it and
+    returns limit + 1, which keeps rejected candidates cheap.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class SpecialtyNormalizer:
+    """
+    Resolve free-text specialty requests ("skin doctor", "cardiolgy") to a
+    directory specialty name.
+
+    Resolution order:
+    1. exact specialty name or alias;
+    2. the longest name or alias that appears in the phrase as whole words,
+       so "family medicine for my kids" is Family Medicine, not Pediatrics;
+    3. a typo: a name or alias within a small edit distance, with the same
+       first letter.
+    A tie between different specialties, or nothing close enough, resolves
+    to None rather than a guess. Results are LRU-cached on the normalized
+    input.
+    """
+
+    def __init__(self, vocabulary, aliases=SPECIALTY_ALIASES, max_edits: int = MAX_TYPO_EDITS,
+                 cache_size: int = NORMALIZER_CACHE_SIZE):
+        self._targets = {normalize_text(name): name for name in vocabulary}
+        self._names = set(self._targets)
+        known = set(self._targets.values())
+        # Aliases for specialties this directory does not carry are ignored.
+        for alias, name in aliases.items():
+            if name in known:
+                self._targets.setdefault(normalize_text(alias), name)
+        # Word count -> targets with that many words, longest phrases first.
+        self._by_words = {}
+        for key in self._targets:
+            self._by_words.setdefault(len(key.split()), []).append(key)
+        self._word_counts = sorted(self._by_words, reverse=True)
+        self._max_edits = max_edits
+        self.vocabulary = sorted(known)
+        self._resolve_normalized = functools.lru_cache(maxsize=cache_size)(self._match)
+
+    def resolve(self, text: str):
+        """Return the matching specialty name, or None if nothing matches unambiguously."""
+        return self._resolve_normalized(normalize_text(text))
+
+    def cache_info(self):
+        return self._resolve_normalized.cache_info()
+
+    def cache_clear(self):
+        self._resolve_normalized.cache_clear()
+
+    def _match(self, key: str):
+        if not key:
+            return None
+        exact = self._targets.get(key)
+        if exact is not None:
+            return exact
+
+        words = key.split()
+        # A longer phrase containing a known term ("a heart doctor for my dad").
+        for count in self._word_counts:
+            found = {window for window in _windows(words, count) if window in self._targets}
+            if found:
+                return self._pick(found, {window: 0 for window in found})
+
+        # A misspelled term: same word count, same first letter, few edits.
+        distances = {}
+        for count in self._word_counts:
+            for window in set(_windows(words, count)):
+                for target in self._by_words[count]:
+                    limit = typo_budget(target, self._max_edits)
+                    if not limit or window[0] != target[0]:
+                        continue
+                    distance = edit_distance(window, target, limit)
+                    if distance <= limit and distance < distances.get(target, limit + 1):
+                        distances[target] = distance
+        if not distances:
+            return None
+        best = min(distances.values())
+        return self._pick({t for t, d in distances.items() if d == best}, distances)
+
+    def _pick(self, terms: set, distances: dict):
+        """One specialty for the matched terms, or None if they disagree."""
+        specialties = {self._targets[term] for term in terms}
+        if len(specialties) == 1:
+            return specialties.pop()
+        # A full specialty name outranks an alias ("oncology" over "skin").
+        named = {self._targets[term] for term in terms if term in self._names}
+        if len(named) == 1:
+            return named.pop()
+        return None
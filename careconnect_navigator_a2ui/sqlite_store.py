@@ -0,0 +1,635 @@
+"""Durable SQLite session and artifact services for the A2A executor.
+
+Sessions survive restarts. The database runs in WAL mode. Writes for
+events and state deltas are queued and committed by a background thread in
+batches, at most every FLUSH_INTERVAL_SECONDS, so a turn only pays for
+serializing its events. Recently used sessions are served from an in-memory
+hot cache, and cache misses read the database in a worker thread, off the
+event loop.
+
+One process owns a database file. The hot cache is never invalidated and
+event sequence numbers come from the cached session, so two processes
+writing the same file would overwrite each other's events.
+
+A crash can lose the writes of the last flush interval; close() and flush()
+commit everything queued. A batch that fails with an operational error
+(locked, disk full) stays queued and is retried. A batch with a statement
+that can never succeed is committed statement by statement; the failing
+statements are counted as lost, and flush() raises for them.
+"""
+
+import asyncio
+import collections
+import copy
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from google.adk.artifacts.base_artifact_service import ArtifactVersion, BaseArtifactService, ensure_part
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.errors.input_validation_error import InputValidationError
+from google.adk.events import Event
+from google.adk.sessions.base_session_service import BaseSessionService, ListSessionsResponse
+from google.adk.sessions.session import Session
+from google.adk.sessions.state import State
+from google.genai import types as genai_types
+
+logger = logging.getLogger(__name__)
+
+SQLITE_PATH = os.environ.get("CARECONNECT_SQLITE_PATH", "careconnect_sessions.db")
+FLUSH_INTERVAL_SECONDS = 0.05
+MAX_BATCH_WRITES = 1024
+HOT_CACHE_SESSIONS = 1000
+# Failed batches are retried after this long, doubling up to the maximum.
+RETRY_BASE_SECONDS = 0.05
+RETRY_MAX_SECONDS = 2.0
+# Attempts at the final batch on close() before its writes count as lost.
+CLOSE_RETRIES = 3
+# Primary result codes of errors that can go away on retry.
+_TRANSIENT_ERRORS = (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED, sqlite3.SQLITE_IOERR, sqlite3.SQLITE_FULL)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL, user_id TEXT NOT NULL, session_id TEXT NOT NULL,
+    state TEXT NOT NULL, update_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS events (
+    app_name TEXT NOT NULL, user_id TEXT NOT NULL, session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL, event TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS app_states (
+    app_name TEXT PRIMARY KEY, state TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS user_states (
+    app_name TEXT NOT NULL, user_id TEXT NOT NULL, state TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS artifacts (
+    app_name TEXT NOT NULL, user_id TEXT NOT NULL, scope TEXT NOT NULL,
+    filename TEXT NOT NULL, version INTEGER NOT NULL,
+    part TEXT NOT NULL, meta TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id, scope, filename, version)
+) WITHOUT ROWID;
+"""
+
+_UPSERT_SESSION = (
+    "INSERT INTO sessions VALUES (?, ?, ?, ?, ?) ON CONFLICT (app_name, user_id, session_id)"
+    " DO UPDATE SET state = excluded.state, update_time = excluded.update_time"
+)
+# A plain INSERT: a second writer reusing a sequence number fails loudly
+# instead of replacing the event.
+_INSERT_EVENT = "INSERT INTO events VALUES (?, ?, ?, ?, ?)"
+_UPSERT_APP_STATE = "INSERT OR REPLACE INTO app_states VALUES (?, ?)"
+_UPSERT_USER_STATE = "INSERT OR REPLACE INTO user_states VALUES (?, ?, ?)"
+
+
+def connect(path: str) -> sqlite3.Connection:
+  """Opens the database in WAL mode and creates the schema if needed."""
+  conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+  conn.execute("PRAGMA journal_mode=WAL")
+  # With WAL, NORMAL only risks the last commits on power loss, never corruption.
+  conn.execute("PRAGMA synchronous=NORMAL")
+  conn.execute("PRAGMA busy_timeout=5000")
+  conn.executescript(_SCHEMA)
+  return conn
+
+
+def _transient(error: sqlite3.Error) -> bool:
+  code = getattr(error, "sqlite_errorcode", None)
+  return code is not None and code & 0xFF in _TRANSIENT_ERRORS
+
+
+def _split_state(delta: dict):
+  """Splits a state delta into (app, user, session) parts; temp keys are dropped."""
+  app, user, session = {}, {}, {}
+  for key, value in delta.items():
+    if key.startswith(State.APP_PREFIX):
+      app[key[len(State.APP_PREFIX):]] = value
+    elif key.startswith(State.USER_PREFIX):
+      user[key[len(State.USER_PREFIX):]] = value
+    elif not key.startswith(State.TEMP_PREFIX):
+      session[key] = value
+  return app, user, session
+
+
+class WriteBehindQueue:
+  """Commits queued statements in batches from a background thread."""
+
+  def __init__(self, path: str, interval: float = FLUSH_INTERVAL_SECONDS, max_batch: int = MAX_BATCH_WRITES):
+    self._conn = connect(path)
+    self._interval = interval
+    self._max_batch = max_batch
+    self._cond = threading.Condition()
+    # (sequence number, sql, params) in queue order.
+    self._pending = []
+    self._enqueued = 0
+    self._committed = 0
+    # Sequence numbers of writes that could not be committed.
+    self._lost = set()
+    self._flush_requested = False
+    self._closed = False
+    self.batches = 0
+    self.writes = 0
+    self.errors = 0
+    self.last_error = None
+    self._thread = threading.Thread(target=self._run, name="sqlite-write-behind", daemon=True)
+    self._thread.start()
+
+  def put(self, sql: str, params: tuple) -> int:
+    """Queues a write and returns its sequence number."""
+    with self._cond:
+      self._enqueued += 1
+      self._pending.append((self._enqueued, sql, params))
+      if len(self._pending) == 1 or len(self._pending) >= self._max_batch:
+        self._cond.notify()
+      return self._enqueued
+
+  @property
+  def committed(self) -> int:
+    """Sequence number up to which every write is committed or lost."""
+    return self._committed
+
+  @property
+  def backlog(self) -> int:
+    with self._cond:
+      return self._enqueued - self._committed
+
+  @property
+  def lost_writes(self) -> int:
+    with self._cond:
+      return len(self._lost)
+
+  def flush(self, upto: int = None):
+    """Blocks until the writes queued so far (or up to `upto`) are committed.
+
+    Raises:
+      sqlite3.DatabaseError: If any of those writes was lost.
+    """
+    with self._cond:
+      target = self._enqueued if upto is None else upto
+      start = self._committed
+      if start < target:
+        self._flush_requested = True
+        self._cond.notify_all()
+        self._cond.wait_for(lambda: self._committed >= target)
+      lost = [seq for seq in self._lost if start < seq <= target]
+    if lost:
+      raise sqlite3.DatabaseError(f"{len(lost)} session writes were not committed: {self.last_error}")
+
+  def close(self):
+    with self._cond:
+      self._closed = True
+      self._cond.notify_all()
+    self._thread.join()
+    self._conn.close()
+
+  def _run(self):
+    failures = 0
+    while True:
+      with self._cond:
+        self._cond.wait_for(lambda: self._pending or self._closed)
+        if failures:
+          # Back off before retrying a failed batch, unless closing.
+          delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (failures - 1))
+          self._cond.wait_for(lambda: self._closed, timeout=delay)
+        elif not (self._closed or self._flush_requested) and len(self._pending) < self._max_batch:
+          # Let the batch fill for one interval before committing it.
+          self._cond.wait_for(
+              lambda: self._closed or self._flush_requested or len(self._pending) >= self._max_batch,
+              timeout=self._interval,
+          )
+        batch, self._pending = self._pending, []
+        self._flush_requested = False
+        closing = self._closed
+      if not batch:
+        if closing:
+          return
+        continue
+
+      done = self._commit(batch)
+      if not done and closing and failures + 1 >= CLOSE_RETRIES:
+        logger.error("Giving up on %d session writes at close", len(batch))
+        with self._cond:
+          self._lost.update(seq for seq, _, _ in batch)
+        done = True
+      with self._cond:
+        if done:
+          failures = 0
+          self._committed = batch[-1][0]
+          self._cond.notify_all()
+        else:
+          failures += 1
+          # Keep the writes, in order, ahead of anything queued since.
+          self._pending[:0] = batch
+
+  def _commit(self, batch) -> bool:
+    """Commits a batch; False if it should be retried."""
+    try:
+      self._execute(batch)
+      self.batches += 1
+      self.writes += len(batch)
+      return True
+    except sqlite3.Error as e:
+      if _transient(e):
+        self._failed(e, "Failed to commit %d session writes; retrying", len(batch))
+        return False
+      self._failed(e, "Failed to commit %d session writes; committing one by one", len(batch))
+    # Some statement can never succeed: commit the rest around it.
+    for write in batch:
+      try:
+        self._execute([write])
+        self.writes += 1
+      except sqlite3.Error as e:
+        if _transient(e):
+          # The writes committed so far stay committed; the batch is retried
+          # from here.
+          self._failed(e, "Failed to commit session write %d; retrying", write[0])
+          del batch[:batch.index(write)]
+          return False
+        self._failed(e, "Dropping session write %d", write[0])
+        with self._cond:
+          self._lost.add(write[0])
+    return True
+
+  def _execute(self, batch):
+    try:
+      self._conn.execute("BEGIN")
+      for _, sql, params in batch:
+        self._conn.execute(sql, params)
+      self._conn.execute("COMMIT")
+    except sqlite3.Error:
+      if self._conn.in_transaction:
+        self._conn.execute("ROLLBACK")
+      raise
+
+  def _failed(self, error, message, *args):
+    self.errors += 1
+    self.last_error = error
+    logger.warning(message + ": %s", *args, error)
+
+
+class SqliteSessionService(BaseSessionService):
+  """ADK session service persisted to SQLite, with a hot cache and write-behind."""
+
+  def __init__(
+      self,
+      path: str = SQLITE_PATH,
+      flush_interval: float = FLUSH_INTERVAL_SECONDS,
+      hot_cache_sessions: int = HOT_CACHE_SESSIONS,
+  ):
+    self._writer = WriteBehindQueue(path, flush_interval)
+    self._reader = connect(path)
+    # The reader is used from worker threads, one at a time.
+    self._read_lock = threading.Lock()
+    self._cache_size = hot_cache_sessions
+    # (app, user, session id) -> stored Session, least recently used first.
+    self._cache = collections.OrderedDict()
+    # Cached session key -> total length of its serialized events.
+    self._bytes = {}
+    # Session key -> sequence number of its last queued write.
+    self._last_write = {}
+    self._app_state = {}
+    self._user_state = {}
+    self.cache_hits = 0
+    self.cache_misses = 0
+
+  async def create_session(self, *, app_name, user_id, state=None, session_id=None):
+    session_id = session_id.strip() if session_id and session_id.strip() else str(uuid.uuid4())
+    key = (app_name, user_id, session_id)
+    if await self._load(key) is not None:
+      raise AlreadyExistsError(f"Session with id {session_id} already exists.")
+    await self._load_shared_state(app_name, user_id)
+    app_delta, user_delta, session_state = _split_state(state or {})
+    self._update_shared_state(app_name, user_id, app_delta, user_delta)
+    session = Session(
+        app_name=app_name, user_id=user_id, id=session_id,
+        state=session_state, last_update_time=time.time(),
+    )
+    self._cache_put(key, session, 0)
+    self._put(key, _UPSERT_SESSION, (*key, json.dumps(session_state), session.last_update_time))
+    return self._merged_copy(session)
+
+  async def get_session(self, *, app_name, user_id, session_id, config=None):
+    stored = await self._load((app_name, user_id, session_id))
+    if stored is None:
+      return None
+    session = copy.deepcopy(stored)
+    if config:
+      if config.num_recent_events:
+        session.events = session.events[-config.num_recent_events:]
+      if config.after_timestamp:
+        session.events = [e for e in session.events if e.timestamp >= config.after_timestamp]
+    return self._merged_copy(session, copied=True)
+
+  async def list_sessions(self, *, app_name, user_id=None):
+    rows = await asyncio.to_thread(self._read_sessions, app_name, user_id)
+    for row_user in {row[0] for row in rows}:
+      await self._load_shared_state(app_name, row_user)
+    sessions = [
+        self._merged_copy(Session(
+            app_name=app_name, user_id=row_user, id=row_id,
+            state=json.loads(state), last_update_time=update_time,
+        ), copied=True)
+        for row_user, row_id, state, update_time in rows
+    ]
+    return ListSessionsResponse(sessions=sessions)
+
+  async def delete_session(self, *, app_name, user_id, session_id):
+    key = (app_name, user_id, session_id)
+    self._cache.pop(key, None)
+    self._bytes.pop(key, None)
+    self._put(key, "DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?", key)
+    self._put(key, "DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND session_id = ?", key)
+    # Session-scoped artifacts use the session id as their scope.
+    self._put(key, "DELETE FROM artifacts WHERE app_name = ? AND user_id = ? AND scope = ?", key)
+
+  async def append_event(self, session, event):
+    if event.partial:
+      return event
+    event = await super().append_event(session=session, event=event)
+    session.last_update_time = event.timestamp
+    key = (session.app_name, session.user_id, session.id)
+    stored = await self._load(key)
+    if stored is None:
+      logger.warning("Failed to append event to session %s: not found", session.id)
+      return event
+
+    seq = len(stored.events)
+    event_json = event.model_dump_json(exclude_none=True)
+    stored.events.append(event)
+    self._bytes[key] = self._bytes.get(key, 0) + len(event_json)
+    stored.last_update_time = event.timestamp
+    if event.actions and event.actions.state_delta:
+      app_delta, user_delta, session_delta = _split_state(event.actions.state_delta)
+      self._update_shared_state(session.app_name, session.user_id, app_delta, user_delta)
+      stored.state.update(session_delta)
+    self._put(key, _INSERT_EVENT, (*key, seq, event_json))
+    self._put(key, _UPSERT_SESSION, (*key, json.dumps(stored.state), stored.last_update_time))
+    return event
+
+  def session_bytes(self, app_name, user_id, session_id) -> int:
+    """Serialized size of a cached session's events, 0 if it is not cached."""
+    return self._bytes.get((app_name, user_id, session_id), 0)
+
+  async def flush(self):
+    """Waits until every queued write is committed, off the event loop."""
+    await asyncio.to_thread(self._writer.flush)
+
+  def close(self):
+    self._writer.close()
+    self._reader.close()
+
+  def stats(self) -> dict:
+    return {
+        "cached_sessions": len(self._cache),
+        "cache_hits": self.cache_hits,
+        "cache_misses": self.cache_misses,
+        "write_backlog": self._writer.backlog,
+        "batches": self._writer.batches,
+        "writes": self._writer.writes,
+        "write_errors": self._writer.errors,
+        "lost_writes": self._writer.lost_writes,
+    }
+
+  async def _load(self, key):
+    stored = self._cache.get(key)
+    if stored is not None:
+      self._cache.move_to_end(key)
+      self.cache_hits += 1
+      return stored
+    self.cache_misses += 1
+    loaded = await asyncio.to_thread(self._read_session, key, self._last_write.get(key))
+    if loaded is None:
+      return None
+    # Another turn may have loaded (and changed) the session meanwhile.
+    cached = self._cache.get(key)
+    if cached is not None:
+      return cached
+    self._cache_put(key, *loaded)
+    return loaded[0]
+
+  def _read_session(self, key, last_write):
+    """(session, serialized event bytes) from the database; runs in a worker thread."""
+    # The database only has committed writes; wait for this session's queued ones.
+    if last_write is not None:
+      self._writer.flush(last_write)
+    with self._read_lock:
+      row = self._reader.execute(
+          "SELECT state, update_time FROM sessions WHERE app_name = ? AND user_id = ? AND session_id = ?", key
+      ).fetchone()
+      if row is None:
+        return None
+      events = self._reader.execute(
+          "SELECT event FROM events WHERE app_name = ? AND user_id = ? AND session_id = ? ORDER BY seq", key
+      ).fetchall()
+    self._read_shared_state(key[0], key[1])
+    session = Session(
+        app_name=key[0], user_id=key[1], id=key[2],
+        state=json.loads(row[0]), last_update_time=row[1],
+        events=[Event.model_validate_json(e) for (e,) in events],
+    )
+    return session, sum(len(e) for (e,) in events)
+
+  def _read_sessions(self, app_name, user_id):
+    """Rows of list_sessions(); runs in a worker thread."""
+    self._writer.flush()
+    with self._read_lock:
+      if user_id is None:
+        return self._reader.execute(
+            "SELECT user_id, session_id, state, update_time FROM sessions WHERE app_name = ?", (app_name,)
+        ).fetchall()
+      return self._reader.execute(
+          "SELECT user_id, session_id, state, update_time FROM sessions WHERE app_name = ? AND user_id = ?",
+          (app_name, user_id),
+      ).fetchall()
+
+  def _put(self, key, sql: str, params: tuple):
+    self._last_write[key] = self._writer.put(sql, params)
+
+  def _cache_put(self, key, session, size: int):
+    self._cache[key] = session
+    self._cache.move_to_end(key)
+    self._bytes[key] = size
+    while len(self._cache) > self._cache_size:
+      # Every change is already queued, so dropping the cached copy loses nothing.
+      evicted, _ = self._cache.popitem(last=False)
+      self._bytes.pop(evicted, None)
+    if len(self._last_write) > 2 * self._cache_size:
+      committed = self._writer.committed
+      self._last_write = {k: seq for k, seq in self._last_write.items() if seq > committed}
+
+  async def _load_shared_state(self, app_name, user_id):
+    """Reads app: and user: state into the caches, off the event loop."""
+    if (app_name,) not in self._app_state or (app_name, user_id) not in self._user_state:
+      await asyncio.to_thread(self._read_shared_state, app_name, user_id)
+
+  def _read_shared_state(self, app_name, user_id):
+    self._read_shared("app_states", self._app_state, (app_name,))
+    self._read_shared("user_states", self._user_state, (app_name, user_id))
+
+  def _read_shared(self, table: str, cache: dict, key: tuple):
+    if key not in cache:
+      where = " AND ".join(f"{col} = ?" for col in ("app_name", "user_id")[:len(key)])
+      with self._read_lock:
+        row = self._reader.execute(f"SELECT state FROM {table} WHERE {where}", key).fetchone()
+      # The event loop may have filled it meanwhile; its copy is newer.
+      cache.setdefault(key, json.loads(row[0]) if row else {})
+
+  def _shared_state(self, table: str, cache: dict, key: tuple) -> dict:
+    if key not in cache:
+      # Callers load shared state off the event loop first; this is a fallback.
+      self._read_shared(table, cache, key)
+    return cache[key]
+
+  def _update_shared_state(self, app_name, user_id, app_delta, user_delta):
+    if app_delta:
+      state = self._shared_state("app_states", self._app_state, (app_name,))
+      state.update(app_delta)
+      self._writer.put(_UPSERT_APP_STATE, (app_name, json.dumps(state)))
+    if user_delta:
+      state = self._shared_state("user_states", self._user_state, (app_name, user_id))
+      state.update(user_delta)
+      self._writer.put(_UPSERT_USER_STATE, (app_name, user_id, json.dumps(state)))
+
+  def _merged_copy(self, session, copied: bool = False):
+    """A copy of the session with app: and user: state merged in."""
+    if not copied:
+      session = copy.deepcopy(session)
+    app_state = self._shared_state("app_states", self._app_state, (session.app_name,))
+    user_state = self._shared_state("user_states", self._user_state, (session.app_name, session.user_id))
+    for key, value in app_state.items():
+      session.state[State.APP_PREFIX + key] = value
+    for key, value in user_state.items():
+      session.state[State.USER_PREFIX + key] = value
+    return session
+
+
+class SqliteArtifactService(BaseArtifactService):
+  """ADK artifact service persisted to SQLite.
+
+  Artifacts are written synchronously: they are rare next to events, and a
+  saved artifact must be loadable immediately. Every statement runs in a
+  worker thread, so the event loop never waits on SQLite.
+  """
+
+  def __init__(self, path: str = SQLITE_PATH):
+    self._conn = connect(path)
+    self._lock = threading.Lock()
+
+  def _scope(self, filename: str, session_id) -> str:
+    if filename.startswith(State.USER_PREFIX):
+      return "user"
+    if session_id is None:
+      raise InputValidationError("Session ID must be provided for session-scoped artifacts.")
+    return session_id
+
+  def _query(self, sql: str, params, fetch=None):
+    """Runs one statement under the connection lock; fetch is "one", "all" or None."""
+    with self._lock:
+      cursor = self._conn.execute(sql, params)
+      if fetch == "one":
+        return cursor.fetchone()
+      if fetch == "all":
+        return cursor.fetchall()
+      return None
+
+  async def save_artifact(self, *, app_name, user_id, filename, artifact, session_id=None, custom_metadata=None):
+    artifact = ensure_part(artifact)
+    scope = self._scope(filename, session_id)
+    mime_type = None
+    if artifact.inline_data is not None:
+      mime_type = artifact.inline_data.mime_type
+    elif artifact.text is not None:
+      mime_type = "text/plain"
+    elif artifact.file_data is not None:
+      mime_type = artifact.file_data.mime_type
+    return await asyncio.to_thread(
+        self._insert_version, app_name, user_id, scope, filename, artifact, mime_type, custom_metadata
+    )
+
+  def _insert_version(self, app_name, user_id, scope, filename, artifact, mime_type, custom_metadata) -> int:
+    with self._lock:
+      (latest,) = self._conn.execute(
+          "SELECT MAX(version) FROM artifacts WHERE app_name = ? AND user_id = ? AND scope = ? AND filename = ?",
+          (app_name, user_id, scope, filename),
+      ).fetchone()
+      version = 0 if latest is None else latest + 1
+      artifact_version = ArtifactVersion(
+          version=version,
+          canonical_uri=f"sqlite://apps/{app_name}/users/{user_id}/{scope}/artifacts/{filename}/versions/{version}",
+          custom_metadata=custom_metadata or {},
+          mime_type=mime_type,
+      )
+      self._conn.execute(
+          "INSERT INTO artifacts VALUES (?, ?, ?, ?, ?, ?, ?)",
+          (app_name, user_id, scope, filename, version,
+           artifact.model_dump_json(exclude_none=True), artifact_version.model_dump_json()),
+      )
+    return version
+
+  async def _row(self, columns, app_name, user_id, filename, session_id, version):
+    scope = self._scope(filename, session_id)
+    if version is None:
+      return await asyncio.to_thread(
+          self._query,
+          f"SELECT {columns} FROM artifacts WHERE app_name = ? AND user_id = ? AND scope = ? AND filename = ?"
+          " ORDER BY version DESC LIMIT 1",
+          (app_name, user_id, scope, filename),
+          "one",
+      )
+    return await asyncio.to_thread(
+        self._query,
+        f"SELECT {columns} FROM artifacts WHERE app_name = ? AND user_id = ? AND scope = ? AND filename = ?"
+        " AND version = ?",
+        (app_name, user_id, scope, filename, version),
+        "one",
+    )
+
+  async def load_artifact(self, *, app_name, user_id, filename, session_id=None, version=None):
+    row = await self._row("part", app_name, user_id, filename, session_id, version)
+    return genai_types.Part.model_validate_json(row[0]) if row else None
+
+  async def list_artifact_keys(self, *, app_name, user_id, session_id=None):
+    scopes = ("user",) if session_id is None else ("user", session_id)
+    rows = await asyncio.to_thread(
+        self._query,
+        f"SELECT DISTINCT filename FROM artifacts WHERE app_name = ? AND user_id = ?"
+        f" AND scope IN ({', '.join('?' for _ in scopes)})",
+        (app_name, user_id, *scopes),
+        "all",
+    )
+    return sorted(filename for (filename,) in rows)
+
+  async def delete_artifact(self, *, app_name, user_id, filename, session_id=None):
+    scope = self._scope(filename, session_id)
+    await asyncio.to_thread(
+        self._query,
+        "DELETE FROM artifacts WHERE app_name = ? AND user_id = ? AND scope = ? AND filename = ?",
+        (app_name, user_id, scope, filename),
+    )
+
+  async def list_versions(self, *, app_name, user_id, filename, session_id=None):
+    return [v.version for v in await self.list_artifact_versions(
+        app_name=app_name, user_id=user_id, filename=filename, session_id=session_id
+    )]
+
+  async def list_artifact_versions(self, *, app_name, user_id, filename, session_id=None):
+    scope = self._scope(filename, session_id)
+    rows = await asyncio.to_thread(
+        self._query,
+        "SELECT meta FROM artifacts WHERE app_name = ? AND user_id = ? AND scope = ? AND filename = ?"
+        " ORDER BY version",
+        (app_name, user_id, scope, filename),
+        "all",
+    )
+    return [ArtifactVersion.model_validate_json(meta) for (meta,) in rows]
+
+  async def get_artifact_version(self, *, app_name, user_id, filename, session_id=None, version=None):
+    row = await self._row("meta", app_name, user_id, filename, session_id, version)
+    return ArtifactVersion.model_validate_json(row[0]) if row else None
@@ -0,0 +1,70 @@
+"""Compact session-state context for the model.
+
+The executor used to append every state key to every query. Those suffixes
+stay in the session history, so the bytes spent on state grew with both the
+state size and the turn count. Now each query only carries the keys that
+changed since the last query that reached the model. The encoding is
+canonical: keys are sorted, values are compact JSON, and plain strings are
+left unquoted. The model can call the `get_session_state` tool when it needs
+the full state.
+
+A snapshot of what the model has been told is kept in the state itself,
+under SENT_KEY. It holds a short digest per key, not the values.
+"""
+
+import hashlib
+import json
+import re
+
+SENT_KEY = "_state_sent"
+
+# Already in the per-turn instruction, so sending it again would be redundant.
+_INSTRUCTION_KEYS = {"flow_step"}
+
+# Strings that can go unquoted without making the encoding ambiguous.
+_BARE_STRING = re.compile(r"[\w .:/@+-]{1,64}")
+
+
+def visible_state(state) -> dict:
+    """State the model may see: no internal (_*) or temp: keys."""
+    return {
+        k: v for k, v in state.items()
+        if not k.startswith("_") and not k.startswith("temp:")
+    }
+
+
+def encode_value(value) -> str:
+    if isinstance(value, str) and _BARE_STRING.fullmatch(value) and value.strip() == value:
+        if value not in ("null", "true", "false") and not _is_number(value):
+            return value
+    return json.dumps(value, separators=(",", ":"), sort_keys=True, default=str)
+
+
+def _is_number(text: str) -> bool:
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
+
+
+def _digest(encoded: str) -> str:
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=4).hexdigest()
+
+
+def state_changes(state) -> tuple:
+    """(suffix for the query, new SENT_KEY value).
+
+    The suffix is "" when nothing changed. Removed keys are sent as null.
+    """
+    sent = state.get(SENT_KEY) or {}
+    current = {
+        k: encode_value(v) for k, v in visible_state(state).items()
+        if k not in _INSTRUCTION_KEYS
+    }
+    digests = {k: _digest(v) for k, v in current.items()}
+    changed = [f"{k}={current[k]}" for k in sorted(current) if sent.get(k) != digests[k]]
+    changed += [f"{k}=null" for k in sorted(sent) if k not in current]
+    if not changed:
+        return "", sent
+    return f" [State changes: {'; '.join(changed)}]", digests
@@ -0,0 +1,197 @@
+"""Stress test: per-conversation ordering, cross-conversation parallelism and cancel.
+
+1. Ordering. Several conversations each get a burst of concurrent button
+   clicks. Every click sets its own state key, and a stub model with latency
+   answers each one by calling a count_click tool. The tool increments a
+   counter in session state (read, modify, write), and the model's latency
+   sits between the turn loading its session and that write. The test
+   checks three things per conversation:
+   - the final state holds every click's key and the counter equals the
+     number of clicks (no lost updates);
+   - each turn's events are contiguous in the history (no interleaving);
+   - the turns ran in the order the clicks arrived.
+   It runs with the per-context locks and with them disabled, for comparison.
+2. Parallelism. One turn in each of N conversations at once should take
+   about one model latency in total, not N.
+3. Cancel. A turn is cancelled while the model is still generating. The
+   test reports:
+   - how long until the turn has unwound;
+   - whether the model stream was closed;
+   - whether a canceled status was published;
+   - how long the next queued turn in that conversation waited.
+
+Run from this directory:
+    python stress_context_serialization.py [--conversations 20] [--clicks 8]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import time
+
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "bench")
+os.environ.setdefault("GOOGLE_CLOUD_LOCATION", "us-central1")
+
+from a2a import types
+from a2a.server.agent_execution import RequestContext
+from a2a.server.events import EventQueue
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types as genai_types
+
+import a2ui_examples
+import agent
+import agent_executor
+import response_cache
+from bench_state_injection import _NoFastPath, _message
+
+_REPLY = "Here you go.\n---a2ui_JSON---\n" + a2ui_examples.PLAN_CLARIFICATION_EXAMPLE
+
+
+def count_click(tool_context: ToolContext) -> dict:
+  """Counts a click in session state."""
+  clicks = tool_context.state.get("clicks", 0) + 1
+  tool_context.state["clicks"] = clicks
+  return {"status": "success", "clicks": clicks}
+
+
+def _called_this_turn(contents) -> bool:
+  """Whether a tool answered since the model's last text reply."""
+  for content in reversed(contents):
+    if any(p.function_response for p in content.parts or ()):
+      return True
+    if content.role == "model" and any(p.text for p in content.parts or ()):
+      return False
+  return False
+
+
+class SlowModel(BaseLlm):
+  """Replies after `latency` seconds; counts streams opened and closed.
+
+  With `count_clicks`, it first calls count_click and replies once the tool
+  has answered.
+  """
+
+  model: str = "slow-stub"
+  latency: float = 0.02
+  count_clicks: bool = False
+  opened: int = 0
+  closed: int = 0
+
+  async def generate_content_async(self, llm_request, stream=False):
+    self.opened += 1
+    try:
+      await asyncio.sleep(self.latency)
+      if self.count_clicks and not _called_this_turn(llm_request.contents):
+        part = genai_types.Part(function_call=genai_types.FunctionCall(name="count_click", args={}))
+      else:
+        part = genai_types.Part(text=_REPLY)
+      yield LlmResponse(content=genai_types.Content(role="model", parts=[part]))
+    finally:
+      self.closed += 1
+
+
+class _NoLocks:
+  @contextlib.asynccontextmanager
+  async def hold(self, context_id):
+    yield
+
+
+def _executor(model, locks=True):
+  agent.root_agent.model = model
+  if count_click not in agent.root_agent.tools:
+    agent.root_agent.tools.append(count_click)
+  executor = agent_executor.AdkAgentToA2AExecutor()
+  executor._action_router = _NoFastPath()  # pylint: disable=protected-access
+  executor._response_cache = response_cache.ResponseCache(max_entries=0)  # pylint: disable=protected-access
+  if not locks:
+    executor._context_locks = _NoLocks()  # pylint: disable=protected-access
+  return executor
+
+
+def _request(text: str, context_id: str, action_context=None) -> RequestContext:
+  message = _message(text, action_context)
+  message.context_id = context_id
+  return RequestContext(request=types.MessageSendParams(message=message))
+
+
+async def _ordering(conversations: int, clicks: int, locks: bool) -> dict:
+  executor = _executor(SlowModel(latency=0.01, count_clicks=True), locks=locks)
+  jobs = []
+  for c in range(conversations):
+    for k in range(clicks):
+      request = _request(f"click {k}", f"conv-{c}", {"plan_type": "PPO", f"click_{k}": k})
+      jobs.append(asyncio.create_task(executor.execute(request, EventQueue())))
+  await asyncio.gather(*jobs)
+
+  lost = interleaved = reordered = 0
+  for c in range(conversations):
+    session = await executor._runner.session_service.get_session(  # pylint: disable=protected-access
+        app_name=agent.root_agent.name, user_id="remote_agent", session_id=f"conv-{c}"
+    )
+    lost += sum(1 for k in range(clicks) if f"click_{k}" not in session.state)
+    lost += clicks - session.state.get("clicks", 0)
+    invocations = [e.invocation_id for e in session.events]
+    blocks = [i for n, i in enumerate(invocations) if n == 0 or invocations[n - 1] != i]
+    interleaved += len(blocks) - len(set(blocks))
+    order = [int(e.content.parts[0].text.split()[1]) for e in session.events
+             if e.author == "user" and e.content and e.content.parts[0].text.startswith("click")]
+    reordered += order != sorted(order)
+  return {"lost_updates": lost, "interleaved_turns": interleaved, "conversations_out_of_order": reordered}
+
+
+async def _parallelism(conversations: int, latency: float) -> float:
+  executor = _executor(SlowModel(latency=latency))
+  start = time.perf_counter()
+  await asyncio.gather(*(
+      executor.execute(_request("hi", f"par-{c}"), EventQueue()) for c in range(conversations)
+  ))
+  return time.perf_counter() - start
+
+
+async def _cancel() -> dict:
+  model = SlowModel(latency=10.0)
+  executor = _executor(model)
+  first = _request("slow question", "cancel-me")
+  running = asyncio.create_task(executor.execute(first, EventQueue()))
+  await asyncio.sleep(0.1)
+  model.latency = 0.01
+  queued = asyncio.create_task(executor.execute(_request("next question", "cancel-me"), EventQueue()))
+  await asyncio.sleep(0.01)
+
+  queue = EventQueue()
+  start = time.perf_counter()
+  await executor.cancel(RequestContext(task_id=first.task_id, context_id=first.context_id), queue)
+  unwound = time.perf_counter() - start
+  status = await queue.dequeue_event()
+  await queued
+  return {
+      "unwound_ms": round(unwound * 1e3, 1),
+      "turn_cancelled": running.cancelled(),
+      "model_streams_open": model.opened - model.closed,
+      "status": status.status.state.value,
+      "next_turn_done_ms": round((time.perf_counter() - start) * 1e3, 1),
+  }
+
+
+async def _main(args):
+  print("ordering with per-context locks:", await _ordering(args.conversations, args.clicks, locks=True))
+  print("ordering without locks:         ", await _ordering(args.conversations, args.clicks, locks=False))
+  elapsed = await _parallelism(args.conversations, args.latency)
+  print(f"parallelism: {args.conversations} conversations x {args.latency * 1e3:.0f} ms model "
+        f"-> {elapsed * 1e3:.0f} ms total")
+  print("cancel:", await _cancel())
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--conversations", type=int, default=20)
+  parser.add_argument("--clicks", type=int, default=8)
+  parser.add_argument("--latency", type=float, default=0.2)
+  asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+  main()
@@ -1,5 +1,21 @@
 from google.adk.tools.tool_context import ToolContext
+import asyncio
+import datetime
+import heapq
+import itertools
 import logging
+import os
+from operator import itemgetter
+
+from availability import DEFAULT_OPEN_TIMES, SlotCalendar, current_slot, parse_day, slots_mask
+from geo import MAX_SEARCH_MILES, ZipGrid
+from prefetch import AvailabilityPrefetcher
+from provider_directory import MappedProviderDirectory, ProviderDirectory
+from ranking import (DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NO_AVAILABILITY, CursorError, RankSnapshots,
+                     decode_cursor, encode_cursor, query_fingerprint, top_k_page)
+from reservations import ReservationBook
+from specialty_normalizer import SpecialtyNormalizer
+from state_context import visible_state
 
 # Set up logging to verify tool calls
 logging.basicConfig(level=logging.INFO)
@@ -8,10 +24,18 @@ logging.basicConfig(level=logging.INFO)
 # Mock Database (Greater Atlanta Area)
 # ----------------------------------------------------------------------
 # Programmatic Data Generator to ensure 3 per specialty/zip coverage
-def _generate_providers():
+def _generate_providers(num_providers: int = None):
     providers = []
     specialties = ["Dermatology", "Primary Care", "Physical Therapy", "Cardiology", "Pediatrics", "Family Medicine", "Orthopedics", "Oncology", "Gynecology", "Obstetrics"]
     zips = ["30303", "30301", "30305", "30022", "30062"]
+
+    # Synthetic directories (benchmarks) pad the Atlanta zips with extra
+    # 5-digit codes until the requested provider count is covered.
+    if num_providers:
+        per_zip = len(specialties) * 3
+        extra = max(0, -(-num_providers // per_zip) - len(zips))
+        synthetic = (f"{z:05d}" for z in range(10000, 100000))
+        zips = zips + [z for z in synthetic if z not in zips][:extra]
     
     # We generate 3 doctors per specialty per zip with distinct network profiles
     for zip_code in zips:
@@ -44,9 +68,27 @@ def _generate_providers():
                 "zip": zip_code,
                 "networks": ["OON"]
             })
+    if num_providers:
+        del providers[num_providers:]
     return providers
 
-MOCK_PROVIDERS = _generate_providers()
+# A prebuilt directory file (see build_provider_directory.py) is memory-mapped,
+# so cold start does not depend on directory size; otherwise fall back to
+# generating the mock directory in process.
+PROVIDER_DIRECTORY_PATH = os.environ.get(
+    "CARECONNECT_PROVIDER_DIRECTORY",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "providers.ccdir"),
+)
+if os.path.exists(PROVIDER_DIRECTORY_PATH):
+    MOCK_PROVIDERS = MappedProviderDirectory(PROVIDER_DIRECTORY_PATH)
+else:
+    MOCK_PROVIDERS = ProviderDirectory.from_records(_generate_providers())
+
+# Maps free-text specialty requests ("skin doctor", typos) onto directory names.
+SPECIALTY_NORMALIZER = SpecialtyNormalizer(MOCK_PROVIDERS.specialties)
+
+# Offline zip centroid table for radius / nearest-provider searches.
+ZIP_GRID = ZipGrid.from_csv(os.path.join(os.path.dirname(os.path.abspath(__file__)), "zip_centroids.csv"))
 
 
 MOCK_AVAILABILITY = {
@@ -57,40 +99,82 @@ MOCK_AVAILABILITY = {
     "pt_1": ["2025-10-24 10:00", "2025-10-24 11:00"],
 }
 
+# Single store for what is free and what is booked: check_availability reads
+# it and book_appointment writes it. Directory providers without an explicit
+# MOCK_AVAILABILITY schedule follow the default daily template.
+CALENDAR = SlotCalendar(
+    default_template=slots_mask(DEFAULT_OPEN_TIMES),
+    is_known=lambda provider_id: MOCK_PROVIDERS.find(provider_id) is not None,
+)
+for _provider_id, _slots in MOCK_AVAILABILITY.items():
+    CALENDAR.set_open(_provider_id, _slots)
+
+# Holds displayed slots per session and serializes commits per provider.
+RESERVATIONS = ReservationBook(CALENDAR)
+
+# Each search's first open days, so all of its pages rank on the same snapshot.
+RANK_SNAPSHOTS = RankSnapshots()
+
+
+# Availability for providers just shown in search results, fetched in the
+# background because "Check Availability" on one of them is the usual next step.
+PREFETCH = AvailabilityPrefetcher(
+    lambda provider_id, date, holder: RESERVATIONS.visible_slots(provider_id, date, date, holder)
+)
+
+
+def _session_key(tool_context: ToolContext) -> str:
+    """Identify the calling conversation for slot holds and idempotency keys."""
+    try:
+        return tool_context.session.id
+    except AttributeError:
+        return "anonymous"
+
 # ----------------------------------------------------------------------
 # Tools
 # ----------------------------------------------------------------------
 
-def search_providers(specialty: str, zip_code: str, plan_type: str, date_time: str = None) -> dict:
+def search_providers(specialty: str, zip_code: str, plan_type: str, date_time: str = None,
+                     radius_miles: float = None, nearest: int = None,
+                     page_size: int = DEFAULT_PAGE_SIZE, cursor: str = None,
+                     tool_context: ToolContext = None) -> dict:
     """
     Search for healthcare providers by specialty, zip code, and network status.
     Optionally filters by availability if date_time is provided.
+
+    Results are ranked in-network first, then by soonest availability (first
+    open day), then by distance, and returned one page at a time. Each result
+    shows its next available slot.
     
     Args:
         specialty: The specialty of the doctor (e.g., Dermatology, Primary Care).
         zip_code: The 5-digit zip code area to search in (e.g., 30303, 30301).
         plan_type: The user's insurance plan type (HMO or PPO).
         date_time: Optional. The date/time to check availability (e.g., 2024-10-24, 2024-10-24 09:00).
+        radius_miles: Optional. Search every zip within this many miles of zip_code instead of zip_code alone
+            (at most 3000 miles).
+        nearest: Optional. Limit the search to the N providers closest to zip_code.
+        page_size: Optional. Maximum results to return (default 5, at most 10).
+        cursor: Optional. The `next_cursor` from a previous call with the same criteria, to fetch the next page.
     
     Returns:
-        A list of matching providers with their network status (In-Network or out-of-network).
+        A page of matching providers with their network status (In-Network or out-of-network)
+        and next available slot, the total match count, and a `next_cursor` when more pages remain.
+        Distance searches also include each provider's distance_miles.
     """
-    logging.info(f"[Tool] search_providers called with specialty={specialty}, zip={zip_code}, plan={plan_type}, date_time={date_time}")
+    logging.info(f"[Tool] search_providers called with specialty={specialty}, zip={zip_code}, plan={plan_type}, date_time={date_time}, radius_miles={radius_miles}, nearest={nearest}, page_size={page_size}, cursor={cursor}")
     
     filtered_providers = []
     
-    # Normalize inputs and handle common synonyms
-    norm_specialty = specialty.lower().strip()
-    
-    if norm_specialty in ["pediatrician", "paediatrician"]:
-        norm_specialty = "pediatrics"
-    elif norm_specialty in ["gynecologist", "gynaecologist"]:
-        norm_specialty = "gynecology"
-    elif norm_specialty in ["obstetrician", "child birth", "childbirth"]:
-        norm_specialty = "obstetrics"
-    elif norm_specialty in ["orthopedic", "bone doctor", "bone case", "bones"]:
-        norm_specialty = "orthopedics"
-        
+    # Normalize inputs; synonyms and typos resolve to a directory specialty
+    norm_specialty = SPECIALTY_NORMALIZER.resolve(specialty)
+    if norm_specialty is None:
+        return {
+            "status": "error",
+            "message": f"Unrecognized specialty '{specialty}'. Ask the user to choose one of the supported specialties.",
+            "supported_specialties": SPECIALTY_NORMALIZER.vocabulary,
+        }
+
     norm_zip = zip_code.strip()
     norm_plan = plan_type.upper().strip()
 
@@ -98,87 +182,347 @@ def search_providers(specialty: str, zip_code: str, plan_type: str, date_time: s
     if norm_plan not in ["HMO", "PPO"]:
         return {"status": "error", "message": "Invalid plan type. Must be HMO or PPO."}
 
-    for p in MOCK_PROVIDERS:
-        if p["specialty"].lower() == norm_specialty and p["zip"] == norm_zip:
-            # Determine network status
-            is_in_network = norm_plan in p["networks"]
-            network_label = "In-Network" if is_in_network else "Out-of-Network"
-            
-            # Simulate availability check if date_time provided
-            if date_time:
-                # Simple mock: skip if id ends with _3 (just to show tool filtering works)
-                if p["id"].endswith("_3"):
-                    continue
-            
-            filtered_providers.append({
-                "id": p["id"],
-                "name": p["name"],
-                "specialty": p["specialty"],
-                "zip": p["zip"],
-                "network_status": network_label
-            })
+    if radius_miles:
+        radius_miles = min(float(radius_miles), MAX_SEARCH_MILES)
+
+    # Candidate zips as (distance, zip); distance is None for exact-zip searches.
+    if radius_miles or nearest:
+        if norm_zip not in ZIP_GRID:
+            return {"status": "error", "message": f"Unknown zip code {norm_zip} for distance search."}
+        if radius_miles:
+            candidate_zips = ZIP_GRID.within(norm_zip, radius_miles)
+        else:
+            candidate_zips = ZIP_GRID.by_distance(norm_zip)
+    else:
+        candidate_zips = [(None, norm_zip)]
+
+    for distance, candidate_zip in candidate_zips:
+        if nearest and len(filtered_providers) >= nearest:
+            break
+        filtered_providers.extend(_providers_in_zip(norm_specialty, candidate_zip, norm_plan, date_time, distance))
+
+    if nearest:
+        del filtered_providers[int(nearest):]
+
+    fingerprint = query_fingerprint(norm_specialty, norm_zip, norm_plan, date_time, radius_miles, nearest)
+    try:
+        after, as_of = decode_cursor(cursor, fingerprint) if cursor else (None, None)
+    except CursorError as e:
+        return {"status": "error", "message": str(e)}
+
+    # Availability ranks as of the first page (the cursor carries its slot),
+    # from a snapshot later pages share; next_available is always current.
+    start = max(date_time.strip(), current_slot()) if date_time else current_slot()
+    as_of = as_of or start
+    try:
+        first_open = RANK_SNAPSHOTS.get_or_compute(
+            (fingerprint, as_of), lambda: _first_open_days(filtered_providers, as_of))
+    except ValueError as e:
+        return {"status": "error", "message": f"Invalid date_time: {e}"}
+
+    page_size = max(1, min(int(page_size or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    ranked = [(_rank_key(entry, first_open), entry) for entry in filtered_providers]
+    page, last_key, has_more = top_k_page(ranked, itemgetter(0), page_size, after)
+    results = [entry for _, entry in page]
 
-    return {"status": "success", "results": filtered_providers}
+    holder = _session_key(tool_context)
+    for entry in results:
+        entry["next_available"] = RESERVATIONS.next_visible(entry["id"], start, holder)
 
+    # Warm check_availability for the dates the user is most likely to pick.
+    PREFETCH.prefetch(_session_key(tool_context), [
+        (entry["id"], (date_time or entry["next_available"])[:10])
+        for entry in results
+        if date_time or entry["next_available"]
+    ])
 
-def check_availability(provider_id: str, date: str, tool_context: ToolContext) -> dict:
+    # A new search starts provider selection over.
+    _set_flow_state(tool_context, plan_type=norm_plan, specialty=norm_specialty, zip_code=norm_zip,
+                    provider_id=None, slot=None, confirmation_id=None)
+    return {
+        "status": "success",
+        "matched_specialty": norm_specialty,
+        "results": results,
+        "total": len(filtered_providers),
+        "next_cursor": encode_cursor(fingerprint, last_key, as_of) if has_more else None,
+    }
+
+
+def _rank_key(entry: dict, first_open: dict) -> tuple:
+    """Rank key: in-network first, then soonest open day, then distance."""
+    return (
+        entry["network_status"] != "In-Network",
+        first_open.get(entry["id"], NO_AVAILABILITY),
+        entry.get("distance_miles", 0.0),
+        entry["id"],
+    )
+
+
+def _first_open_days(entries: list, as_of: str) -> dict:
+    """
+    Day ordinal of each provider's first free slot at or after `as_of`.
+
+    Day granularity keeps the ranking from reshuffling as single slots are
+    booked; providers with nothing open within MAX_LOOKAHEAD_DAYS are left
+    out and rank last.
+    """
+    first_open = {}
+    for entry in entries:
+        upcoming = CALENDAR.next_open(entry["id"], as_of, 1)
+        if upcoming:
+            first_open[entry["id"]] = parse_day(upcoming[0])
+    return first_open
+
+
+def _providers_in_zip(norm_specialty: str, zip_code: str, norm_plan: str, date_time: str, distance: float) -> list:
+    """Result entries for one (specialty, zip) directory bucket."""
+    results = []
+    for row in MOCK_PROVIDERS.lookup(norm_specialty, zip_code):
+        p = MOCK_PROVIDERS[row]
+
+        # Determine network status
+        is_in_network = MOCK_PROVIDERS.in_network(row, norm_plan)
+        network_label = "In-Network" if is_in_network else "Out-of-Network"
+
+        # Simulate availability check if date_time provided
+        if date_time:
+            # Simple mock: skip if id ends with _3 (just to show tool filtering works)
+            if p.id.endswith("_3"):
+                continue
+
+        entry = {
+            "id": p.id,
+            "name": p.name,
+            "specialty": p.specialty,
+            "zip": p.zip,
+            "network_status": network_label
+        }
+        if distance is not None:
+            entry["distance_miles"] = round(distance, 1)
+        results.append(entry)
+    return results
+
+
+def _set_flow_state(tool_context: ToolContext, **values):
+    """Record in session state what a successful call established; None clears a key."""
+    state = getattr(tool_context, "state", None)
+    if state is not None:
+        state.update(values)
+
+
+def _provider_name(provider_id: str):
+    """Display name for a provider id, so result surfaces need no extra lookup."""
+    row = MOCK_PROVIDERS.find(provider_id)
+    return row.name if row is not None else None
+
+
+# Longest date range one availability call covers.
+MAX_AVAILABILITY_DAYS = 14
+# Most slots one availability call returns and holds; the slot surface shows
+# at most this many buttons (a2ui_surfaces.MAX_SLOT_BUTTONS).
+MAX_SLOTS_SHOWN = 12
+
+
+def _availability_end(start_date: str, end_date: str = None) -> str:
+    """The range's last date, clamped to MAX_AVAILABILITY_DAYS; raises ValueError on bad dates."""
+    first = parse_day(start_date)
+    last = parse_day(end_date) if end_date else first
+    if last < first:
+        raise ValueError("end_date must not be before start_date.")
+    return datetime.date.fromordinal(min(last, first + MAX_AVAILABILITY_DAYS - 1)).isoformat()
+
+
+def check_availability(provider_id: str, date: str, tool_context: ToolContext, end_date: str = None) -> dict:
     """
     Retrieve available time slots for a specific provider on a given date.
     
     Args:
         provider_id: The unique ID of the provider.
         date: The date to check availability for (YYYY-MM-DD).
+        end_date: Optional. Last date (YYYY-MM-DD) of a multi-day range starting at `date`;
+            ranges longer than 14 days are cut to 14.
     
     Returns:
-        A list of available time slots or an error if not found.
+        Up to 12 available time slots (earliest first) or an error if not found.
+        `more_available` is true when later slots in the range were left out.
     """
-    logging.info(f"[Tool] check_availability called for provider={provider_id} on date={date}")
+    logging.info(f"[Tool] check_availability called for provider={provider_id} on date={date}, end_date={end_date}")
     
-    if provider_id not in MOCK_AVAILABILITY:
-        # If no explicit mock availability exists, generate some dummy slots
-        # Just to make the demo work for all providers
-        return {
-            "status": "success",
-            "provider_id": provider_id,
-            "date": date,
-            "slots": [f"{date} 09:00", f"{date} 10:00", f"{date} 14:00"]
-        }
+    if not CALENDAR.knows(provider_id):
+        return {"status": "error", "message": f"Unknown provider {provider_id}."}
 
-    slots = MOCK_AVAILABILITY.get(provider_id, [])
-    # Filter by date if slots contain date
-    filtered_slots = [s for s in slots if s.startswith(date)]
+    holder = _session_key(tool_context)
+    try:
+        last_date = _availability_end(date, end_date)
+    except ValueError as e:
+        return {"status": "error", "message": f"Invalid date: {e}"}
+    slots = PREFETCH.get(holder, provider_id, date) if end_date in (None, date) else None
+    if slots is None:
+        slots = RESERVATIONS.visible_slots(provider_id, date, last_date, holder)
+    # Reserve what we show so another session cannot take it mid-conversation,
+    # and give back what this session was shown before.
+    shown = RESERVATIONS.hold(provider_id, slots[:MAX_SLOTS_SHOWN], holder)
+    RESERVATIONS.release_all(holder, keep=[(provider_id, slot) for slot in shown])
+    _set_flow_state(tool_context, provider_id=provider_id, slot=None, confirmation_id=None)
 
-    return {
+    result = {
         "status": "success",
         "provider_id": provider_id,
+        "provider_name": _provider_name(provider_id),
         "date": date,
-        "slots": filtered_slots
+        "slots": shown,
+        "more_available": len(slots) > MAX_SLOTS_SHOWN,
+    }
+    if end_date:
+        result["end_date"] = last_date
+    return result
+
+
+# Upper bound on providers per bulk availability call, to keep the tool response small.
+MAX_BULK_PROVIDERS = 20
+
+
+async def _fetch_availability(provider_id: str, start_date: str, end_date: str, holder: str) -> list:
+    """Visible slots for one provider; runs off the event loop."""
+    if not CALENDAR.knows(provider_id):
+        raise KeyError(f"Unknown provider {provider_id}.")
+    return await asyncio.to_thread(RESERVATIONS.visible_slots, provider_id, start_date, end_date, holder)
+
+
+async def check_availability_bulk(provider_ids: list[str], start_date: str, tool_context: ToolContext, end_date: str = None) -> dict:
+    """
+    Retrieve available time slots for several providers at once, to compare them.
+    
+    Args:
+        provider_ids: The unique IDs of the providers to compare (at most 20).
+        start_date: The first date to check (YYYY-MM-DD).
+        end_date: Optional. The last date to check (YYYY-MM-DD); defaults to start_date.
+            Ranges longer than 14 days are cut to 14.
+    
+    Returns:
+        The earliest 12 {provider_id, slot} entries across all providers, in time
+        order, plus per-provider errors for IDs that could not be checked.
+        `more_available` is true when later slots were left out.
+    """
+    logging.info(f"[Tool] check_availability_bulk called for providers={provider_ids} from {start_date} to {end_date}")
+
+    if not provider_ids:
+        return {"status": "error", "message": "No provider IDs given."}
+    if len(provider_ids) > MAX_BULK_PROVIDERS:
+        return {"status": "error", "message": f"At most {MAX_BULK_PROVIDERS} providers can be compared at once."}
+    try:
+        last_date = _availability_end(start_date, end_date)
+    except ValueError as e:
+        return {"status": "error", "message": f"Invalid date: {e}"}
+
+    holder = _session_key(tool_context)
+    unique_ids = list(dict.fromkeys(provider_ids))
+    fetched = await asyncio.gather(
+        *(_fetch_availability(pid, start_date, last_date, holder) for pid in unique_ids),
+        return_exceptions=True,
+    )
+
+    per_provider = []
+    errors = []
+    names = {}
+    for provider_id, result in zip(unique_ids, fetched):
+        if isinstance(result, KeyError):
+            errors.append({"provider_id": provider_id, "message": result.args[0]})
+        elif isinstance(result, ValueError):
+            errors.append({"provider_id": provider_id, "message": f"Invalid date: {result}"})
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            names[provider_id] = _provider_name(provider_id)
+            per_provider.append([{"provider_id": provider_id, "slot": slot} for slot in result])
+
+    # Each provider's slots are already time-ordered; a k-way merge keeps the
+    # whole list sorted, and only the earliest ones are needed.
+    merged = heapq.merge(*per_provider, key=itemgetter("slot"))
+    shown = list(itertools.islice(merged, MAX_SLOTS_SHOWN))
+    more_available = next(merged, None) is not None
+
+    # Hold only what is shown; a slot taken in the meantime is dropped.
+    by_provider = {}
+    for entry in shown:
+        by_provider.setdefault(entry["provider_id"], []).append(entry["slot"])
+    held = set()
+    for provider_id, slots in by_provider.items():
+        held.update((provider_id, slot) for slot in RESERVATIONS.hold(provider_id, slots, holder))
+    RESERVATIONS.release_all(holder, keep=held)
+
+    return {
+        "status": "success",
+        "start_date": start_date,
+        "end_date": last_date,
+        "slots": [entry for entry in shown if (entry["provider_id"], entry["slot"]) in held],
+        "more_available": more_available,
+        "provider_names": names,
+        "errors": errors,
     }
 
 
-def book_appointment(provider_id: str, slot: str, tool_context: ToolContext) -> dict:
+def release_shown(holder: str, results: dict):
+    """
+    Give back the holds behind availability results the user will not see,
+    e.g. those of a turn that failed.
+
+    Args:
+        holder: The session the results were held for.
+        results: Tool name -> latest response, as collected for a turn.
+    """
+    single = results.get("check_availability") or {}
+    bulk = results.get("check_availability_bulk") or {}
+    for slot in single.get("slots") or ():
+        RESERVATIONS.release(single["provider_id"], holder, slot)
+    for entry in bulk.get("slots") or ():
+        RESERVATIONS.release(entry["provider_id"], holder, entry["slot"])
+
+
+def prefetch_stats() -> dict:
+    """Hit/miss counters for the search-results availability prefetch."""
+    return PREFETCH.stats()
+
+
+def get_session_state(tool_context: ToolContext) -> dict:
+    """
+    Read everything known about this conversation so far.
+
+    Each user message only carries the state that changed since the previous
+    one; call this when you need a value that was set earlier.
+
+    Returns:
+        dict: The session state, e.g. plan_type, specialty, zip_code, provider_id.
+    """
+    return {"status": "success", "state": visible_state(tool_context.state.to_dict())}
+
+
+def book_appointment(provider_id: str, slot: str, tool_context: ToolContext, idempotency_key: str = None) -> dict:
     """
     Confirm booking an appointment for a provider at a specific time slot.
     
     Args:
         provider_id: The unique ID of the provider.
         slot: The specific date and time slot (YYYY-MM-DD HH:MM).
+        idempotency_key: Optional. Key for this booking request; retrying with the
+            same key returns the original confirmation. Defaults to one derived
+            from the session, provider and slot.
     
     Returns:
         Confirmation details or error if slot is unavailable.
     """
     logging.info(f"[Tool] book_appointment called for provider={provider_id} at slot={slot}")
     
-    # In a real system, we would check if the slot is still open in DB
-    # For mock, we just confirm it.
-    
-    import uuid
-    confirmation_id = str(uuid.uuid4())[:8]
-    
-    return {
-        "status": "success",
-        "message": f"Appointment successfully booked for provider {provider_id} at {slot}.",
-        "confirmation_id": confirmation_id,
-        "provider_id": provider_id,
-        "slot": slot
-    }
+    holder = _session_key(tool_context)
+    if idempotency_key is None:
+        idempotency_key = f"{holder}:{provider_id}:{slot}"
+
+    try:
+        result = RESERVATIONS.commit(provider_id, slot, holder, idempotency_key)
+    except ValueError as e:
+        return {"status": "error", "message": f"Invalid slot: {e}"}
+    if result["status"] == "success":
+        result = dict(result, provider_name=_provider_name(provider_id))
+        # Booked: the next step is a new search, not this provider's slots.
+        _set_flow_state(tool_context, provider_id=None, slot=None, confirmation_id=result["confirmation_id"])
+    return result